@@ -1,5 +1,8 @@
 import os
+import re
 import yaml
+from dataclasses import MISSING, dataclass, fields, asdict
+from functools import cache
 from loguru import logger  # O usa print si no estás usando loguru
 
 
@@ -71,6 +74,7 @@ class ConfigWrapper:
             config (dict): Diccionario para envolver.
         """
         self.__config_dict = config_dict
+        self.__hijos = {}
 
     @property
     def as_dict(self):
@@ -93,9 +97,18 @@ class ConfigWrapper:
         Raises:
             AttributeError: Si la clave no existe en el diccionario."""
 
+        # Los atributos especiales no son claves de configuración; resolverlos
+        # aquí rompe pickle (necesario para enviar la config a procesos hijos).
+        if item.startswith("__"):
+            raise AttributeError(item)
+
         value = self.as_dict.get(item)
         if isinstance(value, dict):
-            return ConfigWrapper(value)
+            # Se reutiliza el wrapper del nivel anidado en lugar de crear uno por acceso.
+            hijo = self.__hijos.get(item)
+            if hijo is None:
+                hijo = self.__hijos[item] = ConfigWrapper(value)
+            return hijo
         return value
 
     def get(self, key, default=None):
@@ -112,4 +125,297 @@ class ConfigWrapper:
         return self.as_dict.get(key, default)
 
 NOM_CONFIG = "config.yaml"
-config_dict = Procesar_configuracion(NOM_CONFIG)
\ No newline at end of file
+MODOS_EXTRACCION_PRODUCTOS = ("texto", "palabras")
+
+
+# ---------------------------------------------------------------------------
+# Configuración compilada
+#
+# `config.yaml` se lee, valida y compila una sola vez (en el primer uso) a
+# dataclasses congeladas con __slots__. Las listas se vuelven tuplas y los
+# patrones y etiquetas de cabecera quedan precompilados, de modo que en los
+# caminos calientes del parser el acceso es una lectura de slot.
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigPaths:
+    path_facturas: str
+    path_insumos_adic: str
+    path_plant_encabezado: str
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigInsumo:
+    nom_base: str
+    nom_hoja: str
+    cols: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigInsumos:
+    maestra_precios: ConfigInsumo
+    maestra_megatiendas: ConfigInsumo
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigClavesPDF:
+    productos: tuple
+    mapeo_cabecera: tuple  # ((etiqueta, clave), ...) en el orden del YAML
+    patrones_cabecera: tuple  # ((clave, re.Pattern), ...)
+    motivos_devolucion: tuple
+    cols_finales: tuple
+    etiquetas_cabecera: tuple  # etiquetas del mapeo, para búsqueda rápida
+    regex_etiquetas: re.Pattern  # alternación de todas las etiquetas
+    # "texto" (líneas de extract_text) o "palabras" (bandas x de extract_words)
+    extraccion_productos: str = "texto"
+    columnas_tabla: tuple = ()  # ((título del encabezado, clave o None), ...)
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "ConfigClavesPDF":
+        """
+        Compila la sección `config_claves_pdf`.
+
+        Args:
+            datos (dict): Sección tal como viene del YAML.
+        """
+        _validar_claves(
+            datos,
+            ("productos", "mapeo_cabecera", "patrones_cabecera",
+             "motivos_devolucion", "cols_finales"),
+            "config_claves_pdf",
+        )
+        mapeo = tuple(datos["mapeo_cabecera"].items())
+        etiquetas = tuple(etiqueta for etiqueta, _ in mapeo)
+        try:
+            patrones = tuple(
+                (clave, re.compile(patron))
+                for clave, patron in datos["patrones_cabecera"].items()
+            )
+        except re.error as e:
+            raise ValueError(f"Patrón inválido en config_claves_pdf.patrones_cabecera: {e}")
+
+        extraccion = datos.get("extraccion_productos", "texto")
+        if extraccion not in MODOS_EXTRACCION_PRODUCTOS:
+            raise ValueError(
+                f"config_claves_pdf.extraccion_productos inválido '{extraccion}': "
+                f"use {MODOS_EXTRACCION_PRODUCTOS}"
+            )
+        columnas_tabla = tuple((datos.get("columnas_tabla") or {}).items())
+        if extraccion == "palabras":
+            claves_tabla = {clave for _, clave in columnas_tabla}
+            faltantes = [c for c in ("EAN_UN", *datos["productos"]) if c not in claves_tabla]
+            if faltantes:
+                raise ValueError(
+                    f"config_claves_pdf.columnas_tabla no asigna columna a: {faltantes}"
+                )
+
+        return cls(
+            productos=tuple(datos["productos"]),
+            mapeo_cabecera=mapeo,
+            patrones_cabecera=patrones,
+            motivos_devolucion=tuple(datos["motivos_devolucion"]),
+            cols_finales=tuple(datos["cols_finales"]),
+            etiquetas_cabecera=etiquetas,
+            regex_etiquetas=re.compile("|".join(map(re.escape, etiquetas))),
+            extraccion_productos=extraccion,
+            columnas_tabla=columnas_tabla,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PathsResultados:
+    plantillas: str
+    cods_faltantes: str
+    mat_duplicados: str
+    errores: str
+    validacion: str
+    changelog_maestras: str
+    dataset_lineas: str | None = None  # vacío: no se escribe el dataset de líneas
+    consolidado: str | None = None  # salida única (config_reportes.salida_devoluciones)
+
+
+@dataclass(frozen=True, slots=True)
+class PathsCache:
+    dir: str
+    manifiesto_procesados: str
+    maestras: str
+    trabajos: str
+    extracciones: str
+    manifiesto_salidas: str | None = None  # vacío: las salidas se reescriben siempre
+    paginas: str | None = None  # vacío: sin caché por página
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigPipeline:
+    tam_cola: int = 4
+    workers_extraccion: int = 2
+    dtype_maestras: str = "object"  # "object", "string[pyarrow]" o "category"
+    lectura_maestras: str = "pandas"  # "pandas" o "streaming"
+    filas_por_bloque: int = 50_000
+    precarga_en_procesos: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigAislamiento:
+    workers: int = 2
+    timeout_s: float = 60
+    limite_memoria_mb: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigIncremental:
+    intervalo_vigilancia_s: float = 30
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigReportes:
+    formato_faltantes: str = "csv"  # "csv", "parquet" o "txt" (formato anterior)
+    salida_devoluciones: str = "plantillas"  # "plantillas", "libro_unico", "csv" o "parquet"
+    disposicion_libro: str = "hojas"  # "hojas" (una por factura) o "larga"
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigLogs:
+    nivel: str = "DEBUG"
+    formato: str = "texto"  # "texto" o "json" (una línea JSON por registro)
+    asincrono: bool = False  # enqueue=True: se escribe en un hilo aparte
+    archivo: str | None = None  # vacío: consola
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigServicio:
+    host: str = "127.0.0.1"
+    puerto: int = 8765
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigDescubrimiento:
+    patrones: tuple = ("*.pdf",)
+    excluir: tuple = ("~$*", ".*")
+    recursivo: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigCompilada:
+    config_paths: ConfigPaths
+    Insumos: ConfigInsumos
+    config_claves_pdf: ConfigClavesPDF
+    paths_resultados: PathsResultados
+    paths_cache: PathsCache
+    config_pipeline: ConfigPipeline
+    config_aislamiento: ConfigAislamiento
+    config_incremental: ConfigIncremental
+    config_descubrimiento: ConfigDescubrimiento
+    config_servicio: ConfigServicio
+    config_reportes: ConfigReportes
+    config_logs: ConfigLogs
+
+    def como_dict(self) -> dict:
+        """Retorna la configuración compilada como diccionario (para firmas)."""
+        return asdict(self)
+
+
+def _validar_claves(datos, requeridas: tuple, seccion: str):
+    """
+    Verifica que `datos` sea un diccionario con todas las claves requeridas.
+
+    Raises:
+        ValueError: Si la sección no es un diccionario o falta alguna clave.
+    """
+    if not isinstance(datos, dict):
+        raise ValueError(f"La sección '{seccion}' de {NOM_CONFIG} debe ser un diccionario.")
+    faltantes = [clave for clave in requeridas if clave not in datos]
+    if faltantes:
+        raise ValueError(f"Faltan claves en '{seccion}' de {NOM_CONFIG}: {faltantes}")
+
+
+def _compilar_seccion(clase, datos: dict | None, seccion: str):
+    """
+    Construye una dataclass plana a partir de su sección del YAML, validando
+    las claves sin valor por defecto y convirtiendo listas en tuplas.
+    """
+    datos = {} if datos is None else datos
+    requeridas = tuple(
+        campo.name for campo in fields(clase)
+        if campo.default is MISSING and campo.default_factory is MISSING
+    )
+    _validar_claves(datos, requeridas, seccion)
+    valores = {
+        campo.name: tuple(datos[campo.name]) if isinstance(datos[campo.name], list)
+        else datos[campo.name]
+        for campo in fields(clase)
+        if campo.name in datos
+    }
+    return clase(**valores)
+
+
+def compilar_config(config: dict) -> ConfigCompilada:
+    """
+    Valida y compila el diccionario de configuración.
+
+    Args:
+        config (dict): Contenido de `config.yaml`.
+
+    Returns:
+        ConfigCompilada: Configuración inmutable.
+
+    Raises:
+        ValueError: Si falta alguna sección o clave requerida.
+    """
+    insumos = config.get("Insumos") or {}
+    _validar_claves(insumos, ("maestra_precios", "maestra_megatiendas"), "Insumos")
+
+    return ConfigCompilada(
+        config_paths=_compilar_seccion(ConfigPaths, config.get("config_paths"), "config_paths"),
+        Insumos=ConfigInsumos(
+            maestra_precios=_compilar_seccion(
+                ConfigInsumo, insumos["maestra_precios"], "Insumos.maestra_precios"),
+            maestra_megatiendas=_compilar_seccion(
+                ConfigInsumo, insumos["maestra_megatiendas"], "Insumos.maestra_megatiendas"),
+        ),
+        config_claves_pdf=ConfigClavesPDF.desde_dict(config.get("config_claves_pdf")),
+        paths_resultados=_compilar_seccion(
+            PathsResultados, config.get("paths_resultados"), "paths_resultados"),
+        paths_cache=_compilar_seccion(PathsCache, config.get("paths_cache"), "paths_cache"),
+        config_pipeline=_compilar_seccion(
+            ConfigPipeline, config.get("config_pipeline"), "config_pipeline"),
+        config_aislamiento=_compilar_seccion(
+            ConfigAislamiento, config.get("config_aislamiento"), "config_aislamiento"),
+        config_incremental=_compilar_seccion(
+            ConfigIncremental, config.get("config_incremental"), "config_incremental"),
+        config_descubrimiento=_compilar_seccion(
+            ConfigDescubrimiento, config.get("config_descubrimiento"), "config_descubrimiento"),
+        config_servicio=_compilar_seccion(
+            ConfigServicio, config.get("config_servicio"), "config_servicio"),
+        config_reportes=_compilar_seccion(
+            ConfigReportes, config.get("config_reportes"), "config_reportes"),
+        config_logs=_compilar_seccion(ConfigLogs, config.get("config_logs"), "config_logs"),
+    )
+
+
+@cache
+def obtener_config_dict() -> dict:
+    """
+    Lee `config.yaml` la primera vez que se solicita y retorna siempre el
+    mismo diccionario.
+    """
+    return Procesar_configuracion(NOM_CONFIG)
+
+
+@cache
+def obtener_config() -> ConfigCompilada:
+    """
+    Retorna la configuración compilada, leyéndola y validándola en el primer uso.
+    """
+    return compilar_config(obtener_config_dict())
+
+
+def __getattr__(nombre: str):
+    """
+    Compatibilidad: `config_dict` ya no se carga al importar el módulo, sino
+    al primer acceso.
+    """
+    if nombre == "config_dict":
+        return obtener_config_dict()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
\ No newline at end of file
@@ -0,0 +1,314 @@
+# Importaciones de librerías estándar y externas.
+# Este módulo solo importa librerías livianas al inicio: pandas, openpyxl y
+# pdfplumber se importan dentro de cada subcomando que los necesita, para que
+# `--help` y `cache` respondan sin pagar su costo de importación.
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+from itertools import islice
+import config_path_routes
+
+# Importaciones de módulos específicos del proyecto.
+from Utils.config_logger import logger_basic_config, configurar_logs
+
+CACHES = ("maestras", "manifiesto", "trabajos", "extracciones", "salidas", "paginas")
+
+
+def agregar_argumentos_run(parser: argparse.ArgumentParser):
+    """
+    Agrega al parser los argumentos del procesamiento de facturas. Los comparten
+    `main.py` y el subcomando `run`.
+    """
+    parser.add_argument(
+        "--modo",
+        choices=["secuencial", "async"],
+        default="secuencial",
+        help="secuencial (por defecto) o pipeline asyncio con colas acotadas.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Procesa solo los PDF nuevos o modificados según el manifiesto.",
+    )
+    parser.add_argument(
+        "--vigilar",
+        action="store_true",
+        help="Modo incremental continuo: revisa la carpeta de facturas periódicamente.",
+    )
+    parser.add_argument(
+        "--reanudable",
+        action="store_true",
+        help="Registra checkpoints por factura y reanuda un lote interrumpido.",
+    )
+    parser.add_argument(
+        "--aislado",
+        action="store_true",
+        help="Extrae cada PDF en un proceso aislado con límite de tiempo y memoria.",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="Procesa solo el shard i de N (base 0) y escribe reportes parciales.",
+    )
+    parser.add_argument(
+        "--fusionar-shards",
+        metavar="N",
+        type=int,
+        help="Combina las salidas parciales de N shards en los reportes finales.",
+    )
+
+
+def aplicar_config_logs():
+    """
+    Aplica la sección `config_logs` (nivel, formato, escritura en segundo
+    plano) en los comandos que procesan facturas.
+    """
+    from Config.config_loader import obtener_config
+
+    configurar_logs(obtener_config().config_logs)
+
+
+def comando_run(args) -> int:
+    """
+    Ejecuta el procesamiento completo (equivalente a `python Scripts/main.py`).
+    """
+    from Scripts.main import ejecutar
+
+    aplicar_config_logs()
+    ejecutar(args)
+    return 0
+
+
+def comando_validate(args) -> int:
+    """
+    Valida el lote sin generar plantillas. Primero verifica que la
+    configuración compile, que las rutas de entrada existan y que las carpetas
+    de salida admitan escritura; luego (salvo `--solo-rutas`) extrae y cruza
+    todas las facturas con `RunValidacion`.
+
+    Returns:
+        int: 0 si todo está en orden, 1 si hay problemas.
+    """
+    from loguru import logger
+    from Config.config_loader import obtener_config
+
+    try:
+        config = obtener_config()
+        aplicar_config_logs()
+    except (OSError, ValueError) as e:
+        logger.error(f"Configuración inválida: {e}")
+        return 1
+
+    paths = config.config_paths
+    problemas = []
+
+    from Utils.archivos_comprimidos import es_archivo_comprimido
+
+    es_archivo = es_archivo_comprimido(paths.path_facturas) and os.path.isfile(paths.path_facturas)
+    if not (os.path.isdir(paths.path_facturas) or es_archivo):
+        problemas.append(f"No existe la carpeta (o .zip/.tar) de facturas: {paths.path_facturas}")
+    for insumo in (config.Insumos.maestra_precios, config.Insumos.maestra_megatiendas):
+        ruta = paths.path_insumos_adic + insumo.nom_base
+        if not os.path.isfile(ruta):
+            problemas.append(f"No existe la maestra: {ruta}")
+    if not os.path.isfile(paths.path_plant_encabezado):
+        problemas.append(f"No existe la plantilla: {paths.path_plant_encabezado}")
+
+    rutas_salida = (
+        config.paths_resultados.cods_faltantes,
+        config.paths_resultados.mat_duplicados,
+        config.paths_resultados.errores,
+        config.paths_resultados.validacion,
+    )
+    for carpeta in sorted({os.path.dirname(ruta) or "." for ruta in rutas_salida}):
+        if not os.access(carpeta, os.W_OK):
+            problemas.append(f"Sin permiso de escritura (o inexistente): {carpeta}")
+
+    if os.path.isdir(paths.path_facturas) or es_archivo:
+        # Mismo descubrimiento que `Run.iterar_pdfs`: patrones, exclusiones,
+        # subcarpetas, .zip/.tar y archivos vacíos.
+        import Utils.general_functions as gf
+
+        descubrimiento = config.config_descubrimiento
+        n_pdfs = sum(1 for _ in gf.descubrir_archivos(
+            paths.path_facturas,
+            patrones=descubrimiento.patrones,
+            excluir=descubrimiento.excluir,
+            recursivo=descubrimiento.recursivo,
+        ))
+        logger.info(f"{n_pdfs} PDF en {paths.path_facturas}")
+
+    for problema in problemas:
+        logger.error(problema)
+    if problemas:
+        return 1
+    logger.success("Configuración, insumos y carpetas sin problemas.")
+    if args.solo_rutas:
+        return 0
+
+    from Scripts.modo_validacion import RunValidacion
+
+    reporte = RunValidacion().main()
+    return 1 if RunValidacion.tiene_bloqueantes(reporte) else 0
+
+
+def comando_bench(args) -> int:
+    """
+    Mide el costo de cada etapa sin escribir salidas: importaciones,
+    construcción de índices de maestras y extracción (ambas sin caché) y cruce
+    por PDF.
+    """
+    from loguru import logger
+
+    inicio = time.perf_counter()
+    from Scripts.main import Run
+    import Scripts.registro_parsers as rp
+    t_imports = time.perf_counter() - inicio
+
+    aplicar_config_logs()
+    proceso = Run()
+    metricas = proceso.metricas
+    metricas.registrar_valor("imports_s", round(t_imports, 3))
+
+    with metricas.medir("construccion_indices"):
+        maestras = proceso.construir_indices_maestras()
+
+    list_path_pdfs = list(islice(proceso.iterar_pdfs(), args.limite))
+    for cada_pdf in list_path_pdfs:
+        # Extracción directa (sin la caché de extracción) para medir pdfplumber.
+        with metricas.medir("extraccion"):
+            tupla_factura = rp.extraer_factura(cada_pdf, proceso.dict_claves)
+        with metricas.medir("cruce"):
+            proceso.cruzar_factura(tupla_factura, maestras)
+        metricas.incrementar("facturas")
+
+    if list_path_pdfs:
+        for etapa in ("extraccion", "cruce"):
+            metricas.registrar_valor(
+                f"{etapa}_ms_por_pdf",
+                round(1000 * metricas.tiempos[etapa] / len(list_path_pdfs), 1),
+            )
+    else:
+        logger.warning("No hay PDF para medir extracción y cruce.")
+
+    metricas.log_resumen()
+    return 0
+
+
+def comando_servir(args) -> int:
+    """
+    Inicia el servicio HTTP local que mantiene maestras y plantilla en memoria.
+    """
+    from Scripts.servicio import RunServicio
+
+    aplicar_config_logs()
+    RunServicio().servir(host=args.host, puerto=args.puerto)
+    return 0
+
+
+def comando_cache(args) -> int:
+    """
+    Muestra o limpia las cachés en disco (`paths_cache`).
+    """
+    from loguru import logger
+    from Config.config_loader import obtener_config
+
+    paths_cache = obtener_config().paths_cache
+    rutas = {
+        "maestras": paths_cache.maestras,
+        "manifiesto": paths_cache.manifiesto_procesados,
+        "trabajos": paths_cache.trabajos,
+        "extracciones": paths_cache.extracciones,
+        "salidas": paths_cache.manifiesto_salidas or "",
+        "paginas": paths_cache.paginas or "",
+    }
+
+    if args.accion == "info":
+        for nombre, ruta in rutas.items():
+            if os.path.isdir(ruta):
+                archivos = [entrada.stat().st_size for entrada in os.scandir(ruta) if entrada.is_file()]
+                logger.info(f"{nombre}: {ruta} ({len(archivos)} archivos, {sum(archivos) / 1024:.1f} KB)")
+            elif os.path.exists(ruta):
+                logger.info(f"{nombre}: {ruta} ({os.path.getsize(ruta) / 1024:.1f} KB)")
+            else:
+                logger.info(f"{nombre}: {ruta} (no existe)")
+        return 0
+
+    elegidas = CACHES if args.cual == "todo" else (args.cual,)
+    for nombre in elegidas:
+        ruta = rutas[nombre]
+        # Estado propio de cada shard (ver `ruta_parcial`), junto al general.
+        base, extension = os.path.splitext(ruta)
+        for ruta_shard in glob.glob(f"{glob.escape(base)}.shard-*-de-*{extension}"):
+            os.remove(ruta_shard)
+            logger.success(f"Caché '{nombre}' eliminada: {ruta_shard}")
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta)
+        elif os.path.exists(ruta):
+            os.remove(ruta)
+        else:
+            continue
+        logger.success(f"Caché '{nombre}' eliminada: {ruta}")
+    return 0
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """
+    Define los subcomandos run, validate, bench, servir y cache.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Procesamiento de facturas PDF."
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_run = subparsers.add_parser("run", help="Procesa las facturas y genera las salidas.")
+    agregar_argumentos_run(parser_run)
+    parser_run.set_defaults(funcion=comando_run)
+
+    parser_validate = subparsers.add_parser(
+        "validate", help="Extrae y cruza las facturas sin escribir plantillas."
+    )
+    parser_validate.add_argument(
+        "--solo-rutas",
+        action="store_true",
+        help="Solo verifica configuración, insumos y carpetas (sin leer los PDF).",
+    )
+    parser_validate.set_defaults(funcion=comando_validate)
+
+    parser_bench = subparsers.add_parser(
+        "bench", help="Mide el tiempo de cada etapa sin escribir salidas."
+    )
+    parser_bench.add_argument(
+        "--limite", type=int, default=None, help="Número máximo de PDF a medir."
+    )
+    parser_bench.set_defaults(funcion=comando_bench)
+
+    parser_servir = subparsers.add_parser(
+        "servir", help="Servicio HTTP local que procesa facturas bajo demanda."
+    )
+    parser_servir.add_argument("--host", help="Por defecto config_servicio.host.")
+    parser_servir.add_argument("--puerto", type=int, help="Por defecto config_servicio.puerto.")
+    parser_servir.set_defaults(funcion=comando_servir)
+
+    parser_cache = subparsers.add_parser("cache", help="Consulta o limpia las cachés en disco.")
+    parser_cache.add_argument("accion", choices=["info", "limpiar"])
+    parser_cache.add_argument(
+        "cual", nargs="?", choices=CACHES + ("todo",), default="todo",
+        help="Caché a limpiar (por defecto todas).",
+    )
+    parser_cache.set_defaults(funcion=comando_cache)
+
+    return parser
+
+
+def main(argv: list | None = None) -> int:
+    args = crear_parser().parse_args(argv)
+    logger_basic_config()
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
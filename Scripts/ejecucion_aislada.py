@@ -0,0 +1,364 @@
+# Importaciones de librerías estándar y externas.
+import os
+import json
+import time
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+import Utils.general_functions as gf
+import Scripts.registro_parsers as rp
+from Scripts.main import Run
+from Scripts.shards import ruta_parcial
+from Utils.config_logger import configurar_logs
+
+try:
+    import resource  # Solo disponible en sistemas tipo Unix.
+except ImportError:
+    resource = None
+
+# Tipos de error del reporte estructurado.
+ERROR_TIMEOUT = "timeout"
+ERROR_MEMORIA = "memoria"
+ERROR_EXTRACCION = "extraccion"
+ERROR_PROCESO = "proceso_terminado"
+ERROR_ESCRITURA = "escritura"
+
+
+def _aplicar_limite_memoria(limite_memoria_mb: int | None):
+    """
+    Limita el espacio de direcciones del proceso actual. En Windows no existe
+    `resource`, por lo que solo se aplica el timeout.
+    """
+    if not limite_memoria_mb or resource is None:
+        return
+    limite = limite_memoria_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _bucle_trabajador(conexion, dict_claves, limite_memoria_mb: int | None,
+                      dir_cache_paginas: str | None = None, config_logs=None):
+    """
+    Bucle de un proceso trabajador: recibe rutas por `conexion`, extrae la
+    factura y responde con ("ok", (proveedor, tupla)) o ("error", tipo,
+    mensaje). Termina al recibir None.
+
+    El proceso se crea con "spawn" y no hereda los sinks del logger: se
+    vuelven a configurar con `config_logs` (nivel, formato y archivo).
+    """
+    if config_logs is not None:
+        configurar_logs(config_logs)
+    _aplicar_limite_memoria(limite_memoria_mb)
+    conexion.send("listo")
+    while True:
+        ruta = conexion.recv()
+        if ruta is None:
+            return
+        try:
+            conexion.send(("ok", rp.extraer_con_proveedor(ruta, dict_claves, dir_cache_paginas)))
+        except MemoryError:
+            conexion.send(("error", ERROR_MEMORIA, "Límite de memoria excedido"))
+        except Exception as e:
+            conexion.send(
+                ("error", ERROR_EXTRACCION, f"{type(e).__name__}: {e}",
+                 traceback.format_exc(limit=3))
+            )
+
+
+class _Trabajador:
+    """Proceso trabajador con su canal y la tarea en curso."""
+
+    def __init__(self, contexto, dict_claves, limite_memoria_mb, dir_cache_paginas=None,
+                 config_logs=None):
+        self.conexion, conexion_hijo = contexto.Pipe()
+        self.proceso = contexto.Process(
+            target=_bucle_trabajador,
+            args=(conexion_hijo, dict_claves, limite_memoria_mb, dir_cache_paginas, config_logs),
+            daemon=True,
+        )
+        self.proceso.start()
+        conexion_hijo.close()
+        self.listo = False
+        self.tarea = None
+        self.inicio = None
+
+    def confirmar_arranque(self):
+        try:
+            self.listo = self.conexion.recv() == "listo"
+        except (EOFError, OSError):
+            self.listo = False
+        if not self.listo:
+            raise RuntimeError(
+                f"El proceso trabajador no pudo iniciar (código {self.proceso.exitcode}); "
+                "revise config_aislamiento.limite_memoria_mb"
+            )
+
+    def asignar(self, tarea: tuple):
+        self.tarea = tarea
+        self.inicio = time.monotonic()
+        self.conexion.send(tarea[1])
+
+    def liberar(self):
+        tarea, self.tarea = self.tarea, None
+        return tarea, time.monotonic() - self.inicio
+
+    def matar(self):
+        self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+    def cerrar(self):
+        try:
+            self.conexion.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+        self.conexion.close()
+
+
+class ExtractorAislado:
+    """
+    Pool de procesos para extraer facturas con aislamiento de fallos.
+
+    Cada PDF se procesa en un proceso trabajador persistente con un límite de
+    tiempo de reloj (`timeout_s`) y, en sistemas Unix, un límite de memoria
+    (`limite_memoria_mb`, RLIMIT_AS). Si un PDF excede el tiempo o tumba al
+    proceso, solo ese trabajador se reemplaza y el resto del lote sigue
+    corriendo; los trabajadores sanos se reutilizan para no pagar el costo de
+    arranque por cada PDF.
+    """
+
+    def __init__(self, dict_claves, workers: int, timeout_s: float,
+                 limite_memoria_mb: int | None = None, dir_cache_paginas: str | None = None,
+                 config_logs=None):
+        """
+        Args:
+            dict_claves (Any): Configuración `config_claves_pdf`.
+            workers (int): Número de procesos trabajadores.
+            timeout_s (float): Tiempo máximo por PDF en segundos.
+            limite_memoria_mb (int, opcional): Memoria máxima por trabajador.
+            dir_cache_paginas (str, opcional): Carpeta de la caché por página.
+            config_logs (ConfigLogs, opcional): Configuración del logger de
+                los trabajadores.
+        """
+        self.dict_claves = dict_claves
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self.limite_memoria_mb = limite_memoria_mb
+        self.dir_cache_paginas = dir_cache_paginas
+        self.config_logs = config_logs
+        self.contexto = mp.get_context("spawn")
+
+        if limite_memoria_mb and resource is None:
+            logger.warning("Límite de memoria no soportado en este sistema; solo se aplica el timeout.")
+
+    def _nuevo_trabajador(self) -> _Trabajador:
+        return _Trabajador(
+            self.contexto, self.dict_claves, self.limite_memoria_mb, self.dir_cache_paginas,
+            self.config_logs)
+
+    def extraer(self, rutas: list):
+        """
+        Extrae las facturas y produce los resultados a medida que terminan.
+
+        Args:
+            rutas (list): Rutas de los PDF.
+
+        Yields:
+            tuple: (indice, ruta, (proveedor, tupla_factura) | None, error | None),
+                donde error es un dict {"tipo", "mensaje", "duracion_s"}.
+        """
+        pendientes = list(enumerate(rutas))[::-1]
+        trabajadores = [self._nuevo_trabajador() for _ in range(min(self.workers, len(rutas)))]
+
+        try:
+            while pendientes or any(t.tarea for t in trabajadores):
+                for trabajador in trabajadores:
+                    if trabajador.listo and trabajador.tarea is None and pendientes:
+                        trabajador.asignar(pendientes.pop())
+
+                ocupados = [t for t in trabajadores if t.tarea]
+                arrancando = [t for t in trabajadores if not t.listo]
+                ahora = time.monotonic()
+                espera = (
+                    max(0.0, min(t.inicio + self.timeout_s - ahora for t in ocupados))
+                    if ocupados
+                    else None
+                )
+                listos = wait([t.conexion for t in ocupados + arrancando], timeout=espera)
+
+                for i, trabajador in enumerate(trabajadores):
+                    # El tiempo de arranque (imports) no cuenta para el timeout.
+                    if not trabajador.listo:
+                        if trabajador.conexion in listos:
+                            trabajador.confirmar_arranque()
+                        continue
+
+                    if trabajador.tarea is None:
+                        continue
+
+                    if trabajador.conexion in listos:
+                        try:
+                            respuesta = trabajador.conexion.recv()
+                        except (EOFError, OSError):
+                            respuesta = None
+                        (indice, ruta), duracion = trabajador.liberar()
+
+                        if respuesta is None:
+                            trabajador.matar()
+                            codigo = trabajador.proceso.exitcode
+                            trabajadores[i] = self._nuevo_trabajador()
+                            yield indice, ruta, None, {
+                                "tipo": ERROR_PROCESO,
+                                "mensaje": f"El proceso trabajador terminó (código {codigo})",
+                                "duracion_s": round(duracion, 3),
+                            }
+                        elif respuesta[0] == "ok":
+                            yield indice, ruta, respuesta[1], None
+                        else:
+                            yield indice, ruta, None, {
+                                "tipo": respuesta[1],
+                                "mensaje": respuesta[2],
+                                "duracion_s": round(duracion, 3),
+                                **({"traza": respuesta[3]} if len(respuesta) > 3 else {}),
+                            }
+
+                    elif time.monotonic() - trabajador.inicio >= self.timeout_s:
+                        (indice, ruta), duracion = trabajador.liberar()
+                        trabajador.matar()
+                        trabajadores[i] = self._nuevo_trabajador()
+                        yield indice, ruta, None, {
+                            "tipo": ERROR_TIMEOUT,
+                            "mensaje": f"Tiempo máximo de {self.timeout_s} s excedido",
+                            "duracion_s": round(duracion, 3),
+                        }
+        finally:
+            for trabajador in trabajadores:
+                trabajador.cerrar()
+
+
+class RunAislado(Run):
+    """
+    Variante de `Run` que extrae cada PDF en un `ExtractorAislado`. Los PDF que
+    fallan, exceden el tiempo o la memoria se registran en un reporte de
+    errores estructurado (`paths_resultados.errores`) y el lote continúa.
+
+    Como en los demás modos, un PDF ya extraído (mismo hash) sale de la caché
+    de extracción sin pasar por un trabajador, y lo que extraen los
+    trabajadores se guarda en ella.
+    """
+
+    def extraer_con_cache_aislado(self, extractor: ExtractorAislado, rutas: list):
+        """
+        Produce (indice, ruta, tupla_factura | None, error | None) de cada PDF:
+        primero los que están en la caché de extracción y luego, a medida que
+        terminan, los que se envían a `extractor`.
+
+        Args:
+            extractor (ExtractorAislado): Pool de trabajadores.
+            rutas (list): Rutas de los PDF.
+        """
+        por_extraer = []
+        for indice, ruta in enumerate(rutas):
+            try:
+                hash_pdf = gf.hash_archivo(ruta)
+            except (OSError, KeyError):
+                # El trabajador reporta el error de lectura de forma estructurada.
+                hash_pdf = None
+            tupla_factura = self.extraccion_cacheada(hash_pdf) if hash_pdf else None
+            if tupla_factura is None:
+                por_extraer.append((indice, ruta, hash_pdf))
+            else:
+                yield indice, ruta, tupla_factura, None
+
+        resultados = extractor.extraer([ruta for _, ruta, _ in por_extraer])
+        for posicion, ruta, resultado, error in resultados:
+            indice, _, hash_pdf = por_extraer[posicion]
+            if error is not None:
+                yield indice, ruta, None, error
+                continue
+            proveedor, tupla_factura = resultado
+            if hash_pdf:
+                self.guardar_extraccion(hash_pdf, proveedor, tupla_factura)
+            yield indice, ruta, tupla_factura, None
+
+    def main(self):
+        """
+        Ejecuta el proceso con extracción aislada.
+        """
+        config = self.config.config_aislamiento
+        extractor = ExtractorAislado(
+            dict_claves=self.dict_claves,
+            workers=config.workers,
+            timeout_s=config.timeout_s,
+            limite_memoria_mb=config.limite_memoria_mb,
+            dir_cache_paginas=self.paths_cache.paginas,
+            config_logs=self.config.config_logs,
+        )
+
+        # Las maestras se cargan en segundo plano mientras arrancan los trabajadores.
+        futuro_maestras = self.precargar_maestras()
+
+        list_path_pdfs = self.listar_pdfs()
+        list_ean_unicos_fac = []
+        faltantes_por_indice = {}
+        errores = []
+        maestras = None
+
+        with self.metricas.medir("proceso_facturas"):
+            for indice, ruta, tupla_factura, error in self.extraer_con_cache_aislado(
+                    extractor, list_path_pdfs):
+                with self.contexto_factura(ruta):
+                    if error is None:
+                        if maestras is None:
+                            with self.metricas.medir("espera_maestras"):
+                                maestras = futuro_maestras.result()
+                        try:
+                            cruce = self.cruzar_factura(tupla_factura, maestras)
+                            self.escribir_plantilla(cruce, maestras, ruta)
+                        except Exception as e:
+                            error = {"tipo": ERROR_ESCRITURA, "mensaje": f"{type(e).__name__}: {e}"}
+                        else:
+                            self.acumular_lineas(cruce)
+                            list_ean_unicos_fac += cruce["eans_factura"]
+                            faltantes_por_indice[indice] = (ruta, self.formatear_faltantes(cruce))
+                            self.metricas.incrementar("facturas_escritas")
+
+                    if error is not None:
+                        logger.error(f"Factura fallida ({error['tipo']}): {ruta} - {error['mensaje']}")
+                        errores.append({"ruta": ruta, **error})
+                        self.metricas.incrementar(f"errores_{error['tipo']}")
+
+        if maestras is None:
+            maestras = futuro_maestras.result()
+
+        with self.metricas.medir("reportes"):
+            self.escribir_duplicados(maestras, list_ean_unicos_fac)
+            self.escribir_faltantes([faltantes_por_indice[i] for i in sorted(faltantes_por_indice)])
+            self.escribir_errores(errores)
+            self.escribir_lineas()
+            self.escribir_consolidado(maestras)
+            self.guardar_manifiesto_salidas(list_path_pdfs)
+
+        self.metricas.log_resumen()
+
+    def escribir_errores(self, errores: list):
+        """
+        Escribe el reporte de errores en JSON (lista vacía si no hubo errores);
+        en modo shard, la salida parcial del shard.
+
+        Args:
+            errores (list): Dicts con "ruta", "tipo", "mensaje" y "duracion_s".
+        """
+        ruta_reporte = self.paths_resultados.errores
+        if self.shard:
+            ruta_reporte = ruta_parcial(ruta_reporte, self.shard)
+        os.makedirs(os.path.dirname(ruta_reporte) or ".", exist_ok=True)
+        with open(ruta_reporte, "w", encoding="utf-8") as f:
+            json.dump(errores, f, indent=2, ensure_ascii=False)
+        if errores:
+            logger.warning(f"{len(errores)} facturas con error. Ver {ruta_reporte}")
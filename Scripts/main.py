@@ -1,6 +1,12 @@
 # Importaciones de librerías estándar y externas.
+import os
+import argparse
+import multiprocessing as mp
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+from loguru import logger
 import config_path_routes
-import Scripts.nutresa_pdf_parser as npp
+import Scripts.registro_parsers as rp
 from pandas import DataFrame, concat
 from typing import Dict
 from collections import defaultdict
@@ -8,185 +14,983 @@ from collections import defaultdict
 # Importaciones de módulos específicos del proyecto.
 import Utils.general_functions as gf
 import Utils.transformation_functions as tf
-from Config.config_loader import ConfigWrapper, config_dict
+import Utils.agrupaciones as ag
+from Utils.metricas import MetricasEjecucion
+from Utils.config_logger import configurar_logs, detalle_activo
+from Utils.cache_disco import CachePickle
+from Utils.archivos_comprimidos import es_ruta_miembro, cargar_miembro
+from Utils.dataset_lineas import (
+    COL_FUENTE, construir_lineas, ruta_archivo_lineas, escribir_lineas_factura,
+)
+from Utils.reporte_faltantes import escribir_reporte_faltantes
+from Utils.manifiesto_salidas import ManifiestoSalidas, huella_dataframe, huella_contenido
+from Utils.salida_consolidada import SalidaConsolidada, fusionar_consolidados
+from Utils.diff_maestras import diferencias_maestra, registrar_changelog
+from Scripts.shards import parsear_shard, ruta_parcial, escribir_faltantes_parcial, fusionar_shards
+from Scripts.cli import agregar_argumentos_run
+from Config.config_loader import obtener_config
+
+COD_MATERIAL = "COD_MATERIAL"
+CONCATENADA = "concatenado"
+EAN_UN = "EAN_UN"
+EAN_PQ = "EAN_PQ"
+PDV = "PDV"
+DESCRIPCION = "descripcion"
 
 
 class Run:
-    def __init__(self):
+    # Se incrementa cuando cambia la forma de construir los índices de maestras,
+    # para invalidar las cachés generadas con la versión anterior.
+    VERSION_INDICES = 2
+    # Igual que VERSION_INDICES, para la caché de extracción por PDF (cada
+    # parser tiene además su propia VERSION).
+    VERSION_EXTRACCION = 3
+    # Se incrementa cuando cambia la forma de escribir las salidas (plantillas y
+    # duplicados), para regenerarlas aunque su contenido no haya cambiado.
+    VERSION_SALIDAS = 1
+
+    def __init__(self, shard: tuple | None = None):
         """
         Inicializa la clase configurando el wrapper y cargando las claves necesarias.
 
         Args:
-            ruta_pdf (str): Ruta al archivo PDF que se desea procesar.
+            shard (tuple, opcional): (índice, total). Si se indica, solo se
+                procesan los PDF de ese shard y los reportes agregados se
+                escriben como salidas parciales.
         """
-        self.config_wrapper = ConfigWrapper(config_dict=config_dict)
-        self.paths = self.config_wrapper.config_paths
+        self.config = obtener_config()
+        self.paths = self.config.config_paths
         self.path_pdfs = self.paths.path_facturas
         self.inusmos_adic = self.paths.path_insumos_adic
         self.path_plant_ecazdo = self.paths.path_plant_encabezado
-        self.dict_claves = self.config_wrapper.config_claves_pdf
-        self.paths_resultados = self.config_wrapper.paths_resultados
-        self.insumos = self.config_wrapper.Insumos
+        self.dict_claves = self.config.config_claves_pdf
+        self.paths_resultados = self.config.paths_resultados
+        self.insumos = self.config.Insumos
+        self.config_pipeline = self.config.config_pipeline
+        self.paths_cache = self.config.paths_cache
+        self.metricas = MetricasEjecucion()
+        self.shard = shard
+        # Líneas cruzadas pendientes de anexar al dataset Parquet.
+        self.lineas_dataset = []
+        # Huellas de las salidas ya escritas; cada shard lleva su propio manifiesto.
+        ruta_manifiesto = self.paths_cache.manifiesto_salidas
+        if ruta_manifiesto and shard:
+            ruta_manifiesto = ruta_parcial(ruta_manifiesto, shard)
+        self.manifiesto_salidas = ManifiestoSalidas(ruta_manifiesto) if ruta_manifiesto else None
+        # Devoluciones pendientes del archivo único (None: un libro por factura).
+        reportes = self.config.config_reportes
+        self.consolidado = None
+        if reportes.salida_devoluciones != "plantillas":
+            if not self.paths_resultados.consolidado:
+                raise ValueError(
+                    "config_reportes.salida_devoluciones requiere paths_resultados.consolidado")
+            self.consolidado = SalidaConsolidada(
+                reportes.salida_devoluciones, reportes.disposicion_libro, self.dict_claves.cols_finales)
+
+    def iterar_pdfs(self, con_firma: bool = False):
+        """
+        Produce de forma perezosa las rutas de las facturas a procesar (ver
+        `config_descubrimiento`), para que el descubrimiento se solape con el
+        proceso en carpetas grandes.
 
-    def main(self) -> Dict[str, DataFrame]:
+        Args:
+            con_firma (bool): Producir (ruta, {"tam", "mtime"}).
         """
-        Ejecuta el proceso principal del programa
+        descubrimiento = self.config.config_descubrimiento
+        return gf.descubrir_archivos(
+            self.path_pdfs,
+            patrones=descubrimiento.patrones,
+            excluir=descubrimiento.excluir,
+            recursivo=descubrimiento.recursivo,
+            shard=self.shard,
+            con_firma=con_firma,
+        )
+
+    def listar_pdfs(self) -> list:
+        """
+        Retorna las rutas de las facturas a procesar.
         """
-        COD_MATERIAL = "COD_MATERIAL"
-        CONCATENADA = "concatenado"
-        EAN_UN = "EAN_UN"
-        EAN_PQ = "EAN_PQ"
-        PDV = "PDV"
+        return list(self.iterar_pdfs())
 
-        list_path_pdfs = gf.listar_elementos_rutas_completas(self.path_pdfs)
+    @staticmethod
+    def contexto_factura(ruta_pdf: str):
+        """
+        Contexto de logs de una factura: los registros emitidos dentro llevan
+        `factura` (nombre del PDF) en `extra`, que los logs JSON incluyen.
+        """
+        return logger.contextualize(factura=os.path.basename(str(ruta_pdf)))
 
-        list_pdfs_cabecera = []
-        for cada_pdf in list_path_pdfs:
-            procesor_pdf = npp.ProcesadorPDFNutresa(
-                pdf_path=cada_pdf, dict_claves=self.dict_claves
-            )
-            dict_pdf_obser_prod = procesor_pdf.procesar()
+    @staticmethod
+    def origen_pdf(ruta_pdf: str) -> tuple:
+        """
+        Retorna (origen, hash SHA-256) de un PDF. Un miembro de .zip/.tar se
+        lee una sola vez en memoria para calcular su hash y extraerlo.
 
-            num_cabecera = dict_pdf_obser_prod["info_pdf"]["cabecera"]["Número"][0:3]
+        Args:
+            ruta_pdf (str): Ruta del PDF (o ruta virtual de un miembro).
+        """
+        if es_ruta_miembro(ruta_pdf):
+            return cargar_miembro(ruta_pdf)
+        return ruta_pdf, gf.hash_archivo(ruta_pdf)
 
-            observación = dict_pdf_obser_prod["info_pdf"]["observaciones"]
+    def extraer_factura(self, ruta_pdf: str) -> tuple:
+        """
+        Extrae de un PDF la tupla (num_oficina, observación, df_productos).
+
+        El resultado se guarda en la caché de extracción con el hash SHA-256
+        del PDF como clave, de modo que un PDF ya extraído (por ejemplo, en
+        una validación previa) no se vuelve a leer con pdfplumber.
 
-            tuple_informacion = (num_cabecera, observación,
-                                 dict_pdf_obser_prod["df_productos"])
+        Args:
+            ruta_pdf (str): Ruta del PDF a procesar (o ruta virtual de un miembro).
+        """
+        return self.extraer_con_cache(*self.origen_pdf(ruta_pdf))
 
-            list_pdfs_cabecera.append(tuple_informacion)
+    def extraer_con_cache(self, origen, hash_pdf: str) -> tuple:
+        """
+        Extrae la factura de `origen` (ruta u objeto tipo archivo) usando la
+        caché de extracción con clave `hash_pdf`.
+
+        Args:
+            origen (str | IO[bytes]): Lo que recibe `rp.extraer_con_proveedor`.
+            hash_pdf (str): SHA-256 del contenido del PDF.
+        """
+        tupla_factura = self.extraccion_cacheada(hash_pdf)
+        if tupla_factura is not None:
+            return tupla_factura
+        proveedor, tupla_factura = rp.extraer_con_proveedor(
+            origen, self.dict_claves, self.paths_cache.paginas)
+        self.guardar_extraccion(hash_pdf, proveedor, tupla_factura)
+        return tupla_factura
+
+    def cache_extraccion(self, hash_pdf: str) -> CachePickle:
+        return CachePickle(os.path.join(self.paths_cache.extracciones, hash_pdf + ".pkl"))
+
+    def extraccion_cacheada(self, hash_pdf: str) -> tuple | None:
+        """
+        Retorna la extracción guardada para `hash_pdf`, o None si no existe o
+        la firma de su proveedor cambió.
+
+        Cada extracción se guarda con la firma del proveedor que la produjo,
+        así que al cambiar un parser (o su configuración) solo se invalidan
+        las facturas de ese proveedor.
+        """
+        guardado = self.cache_extraccion(hash_pdf).leer()
+        if guardado is None:
+            return None
+        firma_guardada, tupla_factura = guardado
+        proveedor = firma_guardada.get("proveedor") if isinstance(firma_guardada, dict) else None
+        if proveedor is None or firma_guardada != self.firma_extraccion(proveedor):
+            return None
+        self.metricas.incrementar("cache_extraccion_aciertos")
+        return tupla_factura
+
+    def guardar_extraccion(self, hash_pdf: str, proveedor: str, tupla_factura: tuple):
+        """
+        Guarda una extracción con la firma de su proveedor.
+        """
+        self.cache_extraccion(hash_pdf).guardar(self.firma_extraccion(proveedor), tupla_factura)
 
-        # Procesar maestra de precios
+    def firma_extraccion(self, proveedor: str) -> dict | None:
+        """
+        Firma de la extracción de un proveedor (ver `rp.firma_proveedor`). Si
+        cambia, las extracciones cacheadas de ese proveedor dejan de ser válidas.
+        """
+        firma = rp.firma_proveedor(proveedor, self.dict_claves)
+        if firma is None:
+            return None
+        return {**firma, "version": self.VERSION_EXTRACCION}
+
+    def rutas_maestras(self) -> tuple:
+        """
+        Rutas de la maestra de precios y de la maestra de tiendas.
+        """
+        return (
+            self.inusmos_adic + self.insumos.maestra_precios.nom_base,
+            self.inusmos_adic + self.insumos.maestra_megatiendas.nom_base,
+        )
+
+    def firma_maestras(self) -> dict:
+        """
+        Firma (tamaño, mtime) de las maestras junto con la configuración que
+        determina sus índices. Si cambia, los índices deben reconstruirse.
+        """
+        return {
+            "archivos": {ruta: gf.firma_archivo(ruta) for ruta in self.rutas_maestras()},
+            "insumos": asdict(self.insumos),
+            "dtype": self.config_pipeline.dtype_maestras,
+            "lectura": self.config_pipeline.lectura_maestras,
+            "version": self.VERSION_INDICES,
+        }
+
+    def firma_insumos(self) -> dict:
+        """
+        Firma de las maestras y de la plantilla. Si cambia, todas las salidas
+        generadas quedan obsoletas.
+        """
+        return {
+            **self.firma_maestras(),
+            "plantilla": gf.firma_archivo(self.path_plant_ecazdo),
+        }
+
+    def precargar_maestras(self) -> Future:
+        """
+        Inicia en segundo plano la carga de las maestras y la plantilla, para
+        que se solapen con la extracción de los PDF. El resultado se obtiene
+        con `.result()` justo antes del cruce (punto de unión).
+
+        Returns:
+            Future: Futuro con el mismo dict que `cargar_maestras`.
+        """
+        # Con un solo CPU disponible, los procesos solo agregan su costo de
+        # arranque: los índices se construyen en el mismo hilo de precarga.
+        en_paralelo = self.config_pipeline.precarga_en_procesos and _cpus_disponibles() > 1
+
+        hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precarga")
+        futuro = hilo.submit(self.cargar_maestras, en_paralelo)
+        hilo.shutdown(wait=False)
+        return futuro
+
+    def cargar_maestras(self, en_paralelo: bool = False) -> dict:
+        """
+        Retorna los índices de las maestras más la plantilla base.
+
+        Args:
+            en_paralelo (bool): Si no hay caché, construye los índices de
+                precios y de oficinas en procesos separados (ver
+                `construir_indices_en_paralelo`).
+
+        Returns:
+            dict: Con las claves "df_precios", "df_duplicados_ean",
+                "dict_oficina_nombre" y "plantilla_base".
+        """
+        indices = self.cargar_indices_maestras(en_paralelo)
+
+        # Cargar la plantilla base una sola vez
+        plantilla_base = tf.ExcelPlantilla.cargar_desde_archivo(
+            self.path_plant_ecazdo)
+
+        return {**indices, "plantilla_base": plantilla_base}
+
+    def cargar_indices_maestras(self, en_paralelo: bool = False) -> dict:
+        """
+        Retorna los índices de las maestras. Se reutilizan desde la caché en
+        disco mientras los archivos fuente y su configuración no cambien.
+
+        Args:
+            en_paralelo (bool): Construir los índices en procesos separados.
+
+        Returns:
+            dict: Con las claves "df_precios", "df_duplicados_ean" y
+                "dict_oficina_nombre".
+        """
+        firma = self.firma_maestras()
+        cache = CachePickle(self.paths_cache.maestras)
+        guardado = cache.leer()
+        if guardado is not None and guardado[0] == firma:
+            logger.info("Índices de maestras reutilizados desde caché.")
+            self.metricas.incrementar("cache_maestras_aciertos")
+            return guardado[1]
+
+        indices = self.actualizar_indices_maestras(guardado, firma)
+        if indices is None:
+            if en_paralelo:
+                indices = self.construir_indices_en_paralelo()
+            else:
+                indices = self.construir_indices_maestras()
+        cache.guardar(firma, indices)
+        return indices
+
+    def leer_maestra_precios(self):
+        """
+        Lee la maestra de precios con solo las columnas configuradas, en el
+        dtype de `config_pipeline.dtype_maestras`.
+
+        Con `config_pipeline.lectura_maestras: streaming` la hoja se recorre
+        en modo read_only, proyectando las columnas y convirtiendo por bloques,
+        sin cargar el libro completo; con "pandas" se lee con `pd.read_excel`
+        y se convierte después.
+
+        Returns:
+            DataFrame: Columnas `Insumos.maestra_precios.cols`.
+        """
+        insumo = self.insumos.maestra_precios
+        dtype_texto = self.config_pipeline.dtype_maestras
+        if dtype_texto not in tf.DTYPES_TEXTO:
+            raise ValueError(
+                f"config_pipeline.dtype_maestras inválido '{dtype_texto}'. Opciones: {tf.DTYPES_TEXTO}"
+            )
         lector_insumos_excel = gf.ExcelReader(path=self.inusmos_adic)
+
+        if self.config_pipeline.lectura_maestras == "streaming":
+            df_prec_select = lector_insumos_excel.Lectura_insumos_excel_streaming(
+                nom_insumo=insumo.nom_base,
+                nom_hoja=insumo.nom_hoja,
+                cols=list(insumo.cols),
+                filas_por_bloque=self.config_pipeline.filas_por_bloque,
+                dtype=dtype_texto,
+            )
+            memoria = tf.memoria_bytes(df_prec_select)
+            self.metricas.registrar_valor(f"memoria_maestra_{dtype_texto}_bytes", memoria)
+            logger.info(f"Maestra de precios en memoria ({dtype_texto}): {memoria / 1e6:.1f} MB")
+            return df_prec_select
+
         df_precios = lector_insumos_excel.Lectura_insumos_excel(
-            nom_insumo=self.insumos.maestra_precios.nom_base,
-            nom_hoja=self.insumos.maestra_precios.nom_hoja,
+            nom_insumo=insumo.nom_base,
+            nom_hoja=insumo.nom_hoja,
+        )
+        df_prec_select = tf.seleccionar_columnas_pd(
+            df=df_precios,
+            cols_elegidas=list(insumo.cols),
+        )
+        del df_precios
+
+        # Opcionalmente, strings de pyarrow o categorías en lugar de objetos Python.
+        if dtype_texto != "object":
+            memoria_objetos = tf.memoria_bytes(df_prec_select)
+            df_prec_select = tf.convertir_columnas_texto(df_prec_select, dtype_texto)
+            memoria_convertida = tf.memoria_bytes(df_prec_select)
+            self.metricas.registrar_valor("memoria_maestra_object_bytes", memoria_objetos)
+            self.metricas.registrar_valor(f"memoria_maestra_{dtype_texto}_bytes", memoria_convertida)
+            self.metricas.registrar_valor("memoria_maestra_ahorro_bytes", memoria_objetos - memoria_convertida)
+        return df_prec_select
+
+    def actualizar_indices_maestras(self, guardado: tuple | None, firma: dict) -> dict | None:
+        """
+        Actualiza los índices de una caché obsoleta en lugar de reconstruirlos,
+        cuando lo único que cambió son los archivos de las maestras (no su
+        configuración ni la versión de los índices). Solo se recalcula el
+        índice de la maestra que cambió.
+
+        Args:
+            guardado (tuple | None): (firma, índices) de `CachePickle.leer`.
+            firma (dict): Firma actual (`firma_maestras`).
+
+        Returns:
+            dict | None: Índices actualizados, o None si se requiere una
+                construcción completa.
+        """
+        if guardado is None:
+            return None
+        firma_previa, indices_previos = guardado
+        sin_archivos = lambda f: {clave: valor for clave, valor in f.items() if clave != "archivos"}
+        if not isinstance(firma_previa, dict) or sin_archivos(firma_previa) != sin_archivos(firma):
+            return None
+
+        ruta_precios, ruta_tiendas = self.rutas_maestras()
+        archivos_previos = firma_previa.get("archivos", {})
+        indices = dict(indices_previos)
+        if archivos_previos.get(ruta_precios) != firma["archivos"][ruta_precios]:
+            indices.update(self.actualizar_indice_precios(indices_previos))
+        if archivos_previos.get(ruta_tiendas) != firma["archivos"][ruta_tiendas]:
+            indices.update(self.construir_indice_oficinas())
+        logger.info("Índices de maestras actualizados a partir de la caché anterior.")
+        return indices
+
+    def actualizar_indice_precios(self, indice_previo: dict) -> dict:
+        """
+        Aplica a los índices de precios las diferencias entre la maestra
+        nueva y la versión cacheada (inserciones, actualizaciones y
+        eliminaciones por COD_MATERIAL). La detección de duplicados solo se
+        recalcula para los EAN que aparecen en filas agregadas o retiradas; los
+        grupos duplicados de los demás EAN se conservan. Los cambios se agregan
+        al changelog `paths_resultados.changelog_maestras`.
+
+        Args:
+            indice_previo (dict): Con las claves "df_precios" y "df_duplicados_ean".
+
+        Returns:
+            dict: Con las claves "df_precios" y "df_duplicados_ean".
+        """
+        df_precios = self.leer_maestra_precios().drop_duplicates(inplace=False)
+        diferencias = diferencias_maestra(
+            indice_previo["df_precios"], df_precios, col_clave=COD_MATERIAL)
+
+        eans_tocados = concat(
+            [diferencias["retiradas"][EAN_UN], diferencias["agregadas"][EAN_UN]]
+        ).unique()
+
+        df_dup_previos = indice_previo["df_duplicados_ean"]
+        df_dup_conservados = df_dup_previos[~df_dup_previos[EAN_UN].isin(eans_tocados)]
+
+        df_candidatos = df_precios[
+            df_precios[EAN_UN].isin(eans_tocados) & ~df_precios[EAN_UN].isin(["-"])
+        ]
+        df_dup_nuevos = df_candidatos[df_candidatos.duplicated(subset=EAN_UN, keep=False)]
+
+        df_duplicados_ean = concat([df_dup_conservados, df_dup_nuevos]).sort_values(
+            by=EAN_UN, inplace=False, kind="mergesort")
+        # concat de categorías distintas produce object: se restituye el dtype
+        # (y las categorías) de df_precios, como en la construcción completa.
+        df_duplicados_ean = df_duplicados_ean.astype(df_precios.dtypes.to_dict())
+
+        cambios = diferencias["cambios"]
+        for cambio in cambios:
+            self.metricas.incrementar(f"maestra_precios_{cambio['tipo']}")
+        if cambios:
+            registrar_changelog(
+                self.paths_resultados.changelog_maestras,
+                archivo=self.insumos.maestra_precios.nom_base,
+                cambios=cambios,
+            )
+        logger.info(
+            f"Maestra de precios: {len(cambios)} materiales con cambios, "
+            f"{len(eans_tocados)} EAN revisados para duplicados."
+        )
+
+        return {"df_precios": df_precios, "df_duplicados_ean": df_duplicados_ean}
+
+    def construir_indices_maestras(self) -> dict:
+        """
+        Lee las maestras de precios y de tiendas y construye los índices usados
+        en el cruce: precios sin duplicados, EAN duplicados y diccionario
+        oficina -> nombre.
+
+        Returns:
+            dict: Con las claves "df_precios", "df_duplicados_ean" y
+                "dict_oficina_nombre".
+        """
+        return {**self.construir_indice_precios(), **self.construir_indice_oficinas()}
+
+    def construir_indices_en_paralelo(self) -> dict:
+        """
+        Igual que `construir_indices_maestras`, pero cada maestra se lee e
+        indexa en su propio proceso (las dos son independientes). Los valores
+        de métricas registrados en los procesos se agregan a `self.metricas`.
+        """
+        with ProcessPoolExecutor(max_workers=2, mp_context=mp.get_context("spawn")) as pool:
+            futuros = [
+                pool.submit(_construir_en_proceso, metodo)
+                for metodo in ("construir_indice_precios", "construir_indice_oficinas")
+            ]
+            indices = {}
+            for futuro in futuros:
+                resultado, valores_metricas = futuro.result()
+                indices.update(resultado)
+                self.metricas.valores.update(valores_metricas)
+        return indices
+
+    def construir_indice_precios(self) -> dict:
+        """
+        Lee la maestra de precios y construye el índice de precios sin
+        duplicados y el de EAN duplicados.
+
+        Returns:
+            dict: Con las claves "df_precios" y "df_duplicados_ean".
+        """
+        df_prec_select = self.leer_maestra_precios()
+
+        df_prec_select_sin_dup = df_prec_select.drop_duplicates(inplace=False)
+        del df_prec_select
+
+        # Mantemos únicamente los EAN válidos (distintos de "-") duplicados. La
+        # máscara se calcula sobre el índice sin duplicados, de modo que solo
+        # se copian (y ordenan) las filas duplicadas.
+        mascara_duplicados = (
+            ~df_prec_select_sin_dup[EAN_UN].isin(["-"])
+            & df_prec_select_sin_dup.duplicated(subset=EAN_UN, keep=False)
         )
+
+        # Ordenamos en base al codigo EAN (orden estable: la fusión de shards
+        # reproduce exactamente este orden)
+        df_duplicados_ean = df_prec_select_sin_dup[mascara_duplicados].sort_values(
+            by=EAN_UN, inplace=False, kind="mergesort")
+
+        return {
+            "df_precios": df_prec_select_sin_dup,
+            "df_duplicados_ean": df_duplicados_ean,
+        }
+
+    def construir_indice_oficinas(self) -> dict:
+        """
+        Lee la maestra de tiendas y construye el diccionario oficina -> nombre.
+
+        Returns:
+            dict: Con la clave "dict_oficina_nombre".
+        """
+        lector_insumos_excel = gf.ExcelReader(path=self.inusmos_adic)
         df_data_megatiendas = lector_insumos_excel.Lectura_insumos_excel(
             nom_insumo=self.insumos.maestra_megatiendas.nom_base,
             nom_hoja=self.insumos.maestra_megatiendas.nom_hoja,
         )
 
-        df_prec_select = tf.seleccionar_columnas_pd(
-            df=df_precios,
-            cols_elegidas=self.insumos.maestra_precios.cols,
+        cols_concatenar = list(self.insumos.maestra_megatiendas.cols[0:-1])
+
+        df_data_megatiendas[CONCATENADA] = ag.concatenar_columnas(
+            df_data_megatiendas, cols_concatenar, separador="_"
         )
-        df_prec_select.drop_duplicates()
-        df_prec_select_sin_dup = df_prec_select.drop_duplicates(
-            subset=EAN_UN, inplace=False
+
+        dict_oficina_nombre = ag.mapear_columnas(
+            df=df_data_megatiendas, col_clave=PDV, col_valor=CONCATENADA
         )
-        df_prec_select_sin_dup = df_prec_select.drop_duplicates(inplace=False)
 
-        # Vamos a tomar los códigos duplicados
-        df_prec_sin_redundantes = tf.filtrar_por_valores(
-            df=df_prec_select_sin_dup, columna=EAN_UN, valores=["-"], incluir=False)
+        return {"dict_oficina_nombre": dict_oficina_nombre}
 
-        # Ordenamos en base al codigo EAN
-        df_prec_sin_red_sort = df_prec_sin_redundantes.sort_values(
-            by=EAN_UN, inplace=False)
+    def cruzar_factura(self, tupla_factura: tuple, maestras: dict) -> dict:
+        """
+        Cruza los productos de una factura contra la maestra de precios.
 
-        # Mantemos únicamente los valores duplicados.
-        df_duplicados_ean = df_prec_sin_red_sort[df_prec_sin_red_sort.duplicated(
-            subset=EAN_UN, keep=False)]
+        Args:
+            tupla_factura (tuple): (num_oficina, observación, df_productos, cabecera).
+            maestras (dict): Resultado de `cargar_maestras`.
+
+        Returns:
+            dict: Con las claves "num_oficina", "numero" (número de la
+                factura), "obs_fact", "df_final",
+                "faltantes" (EAN sin material), "desc_faltantes" (su
+                descripción en la factura), "eans_factura" (EAN únicos) y
+                "df_lineas" (filas para el dataset de líneas).
+        """
+        num_oficina, obs_fact, df_info_fact, cabecera = tupla_factura
+
+        # Obtener los EAN duplicados únicamente presentes en facturas
+        eans_factura = df_info_fact[EAN_UN].drop_duplicates().tolist()
+
+        df_precios_merge = tf.merge_con_fallback(
+            df_left=df_info_fact,
+            df_right=maestras["df_precios"],
+            primera_clave=EAN_UN,
+            segunda_clave=EAN_PQ,
+            columna_objetivo=COD_MATERIAL,
+            columna_fuente=COL_FUENTE,
+        )
 
-        # Cargar la plantilla base una sola vez
-        plantilla_base = tf.ExcelPlantilla.cargar_desde_archivo(
-            self.path_plant_ecazdo)
+        df_faltantes = df_precios_merge[df_precios_merge[COD_MATERIAL].isnull()]
+        list_faltantes_df_precios = df_faltantes[EAN_UN].tolist()
+        if detalle_activo():
+            logger.debug(
+                f"Cruce oficina {num_oficina}: {len(df_precios_merge)} líneas, "
+                f"{len(list_faltantes_df_precios)} EAN faltantes"
+            )
+
+        # Con maestras en string[pyarrow]/category las columnas cruzadas traen
+        # pd.NA, que openpyxl no escribe.
+        df_plantilla_cols_finales = tf.columnas_a_objeto(tf.seleccionar_columnas_pd(
+            df=df_precios_merge,
+            cols_elegidas=list(self.dict_claves.cols_finales),
+        ))
+
+        return {
+            "num_oficina": num_oficina,
+            "numero": cabecera.get("Número", ""),
+            "obs_fact": obs_fact,
+            "df_final": df_plantilla_cols_finales,
+            "faltantes": list_faltantes_df_precios,
+            "desc_faltantes": df_faltantes[DESCRIPCION].fillna("").tolist(),
+            "eans_factura": eans_factura,
+            "df_lineas": construir_lineas(
+                cabecera, num_oficina, df_precios_merge, self.columnas_dataset()),
+        }
+
+    def columnas_dataset(self) -> list:
+        """
+        Columnas del dataset de líneas: campos de la cabecera, columnas de
+        producto, código de material y clave con la que cruzó cada línea.
+        """
+        return list(dict.fromkeys([
+            "tipo_documento", "Número", "fecha",
+            *(clave for clave, _ in self.dict_claves.patrones_cabecera),
+            EAN_UN, DESCRIPCION, *self.dict_claves.productos,
+            COD_MATERIAL, COL_FUENTE,
+        ]))
+
+    def acumular_lineas(self, cruce: dict):
+        """
+        Guarda las líneas de una factura ya escrita para escribirlas en el
+        dataset al final de la ejecución (ver `escribir_lineas`).
+        """
+        if self.paths_resultados.dataset_lineas:
+            self.lineas_dataset.append(cruce["df_lineas"])
+
+    def escribir_lineas(self):
+        """
+        Escribe las líneas acumuladas en el dataset Parquet particionado por
+        mes (`paths_resultados.dataset_lineas`), un archivo por factura. Las
+        facturas que ya están en el dataset con las mismas líneas se omiten
+        (manifiesto de salidas); si cambiaron, su archivo se reemplaza.
+        """
+        if not self.paths_resultados.dataset_lineas:
+            return
+        columnas = self.columnas_dataset()
+        for df_lineas in self.lineas_dataset:
+            if df_lineas.empty:
+                continue
+            ruta_salida = ruta_archivo_lineas(self.paths_resultados.dataset_lineas, df_lineas)
+            huella = huella_contenido(self.VERSION_SALIDAS, huella_dataframe(df_lineas))
+            if self.salida_vigente(ruta_salida, huella):
+                continue
+            n_lineas = escribir_lineas_factura(ruta_salida, df_lineas, columnas)
+            self.registrar_salida(ruta_salida, huella)
+            self.metricas.incrementar("lineas_dataset", n_lineas)
+        self.lineas_dataset = []
+
+    def salida_vigente(self, ruta_salida: str, huella: str, origen: str | None = None) -> bool:
+        """
+        Indica si `ruta_salida` ya está escrita con el contenido de `huella`
+        (ver `ManifiestoSalidas`), en cuyo caso no se vuelve a escribir.
+        """
+        if self.manifiesto_salidas is None or not self.manifiesto_salidas.vigente(
+                ruta_salida, huella, origen):
+            return False
+        self.metricas.incrementar("salidas_sin_cambios")
+        return True
+
+    def registrar_salida(self, ruta_salida: str, huella: str, origen: str | None = None):
+        """
+        Registra en el manifiesto una salida recién escrita.
+        """
+        if self.manifiesto_salidas is not None:
+            self.manifiesto_salidas.registrar(ruta_salida, huella, origen)
 
-        cols_concatenar = self.insumos.maestra_megatiendas.cols[0:-1]
+    def guardar_manifiesto_salidas(self, rutas_pdf: list | None = None):
+        """
+        Persiste el manifiesto de salidas (al terminar los reportes).
 
-        df_data_megatiendas[CONCATENADA] = (
-            df_data_megatiendas[cols_concatenar].astype(
-                str).agg("_".join, axis=1)
+        Args:
+            rutas_pdf (list, opcional): PDF descubiertos en la ejecución. Si se
+                indica, antes se retiran las plantillas de los PDF que ya no
+                están (ver `ManifiestoSalidas.descartar_huerfanas`).
+        """
+        if self.manifiesto_salidas is None:
+            return
+        if rutas_pdf is not None:
+            retiradas = self.manifiesto_salidas.descartar_huerfanas(rutas_pdf)
+            if retiradas:
+                self.metricas.incrementar("salidas_retiradas", len(retiradas))
+        self.manifiesto_salidas.guardar()
+
+    def escribir_plantilla(self, cruce: dict, maestras: dict, ruta_pdf: str | None = None) -> str:
+        """
+        Genera el archivo de devolución de una factura a partir de la plantilla base.
+
+        Si el archivo ya existe con el mismo contenido lógico (columnas
+        finales, lista de motivos y versión de la plantilla) no se llena ni se
+        guarda de nuevo. Con salida consolidada solo se acumula la factura
+        (ver `escribir_consolidado`).
+
+        Args:
+            cruce (dict): Resultado de `cruzar_factura`.
+            maestras (dict): Resultado de `cargar_maestras`.
+            ruta_pdf (str, opcional): PDF de la factura; queda como origen de
+                la salida en el manifiesto.
+
+        Returns:
+            str: Ruta del archivo generado.
+        """
+        if self.consolidado is not None:
+            tienda = maestras["dict_oficina_nombre"][cruce["num_oficina"]]
+            self.consolidado.agregar(cruce, tienda)
+            return self.ruta_consolidado()
+
+        ruta_salida = self.ruta_plantilla(cruce, maestras)
+        huella = huella_contenido(
+            self.VERSION_SALIDAS,
+            maestras["plantilla_base"].huella(),
+            self.dict_claves.motivos_devolucion,
+            huella_dataframe(cruce["df_final"]),
         )
+        if self.salida_vigente(ruta_salida, huella, ruta_pdf):
+            return ruta_salida
 
-        dict_oficina_nombre = tf.Crear_diccionario_desde_dataframe(
-            df=df_data_megatiendas, col_clave=PDV, col_valor=CONCATENADA
+        self.preparar_plantilla(cruce, maestras).guardar()
+        self.registrar_salida(ruta_salida, huella, ruta_pdf)
+        return ruta_salida
+
+    def ruta_consolidado(self) -> str:
+        """
+        Ruta del archivo único (con la extensión del modo; parcial en shards).
+        """
+        ruta = self.consolidado.ruta_salida(self.paths_resultados.consolidado)
+        if self.shard:
+            ruta = ruta_parcial(ruta, self.shard)
+        return ruta
+
+    def escribir_consolidado(self, maestras: dict):
+        """
+        Escribe en un solo archivo las devoluciones acumuladas por
+        `escribir_plantilla` (si `config_reportes.salida_devoluciones` no es
+        "plantillas"). Se omite si el archivo ya tiene ese contenido.
+        """
+        if self.consolidado is None or not self.consolidado.facturas:
+            return
+        ruta_salida = self.ruta_consolidado()
+        plantilla_base = maestras["plantilla_base"]
+        huella = huella_contenido(
+            self.VERSION_SALIDAS,
+            plantilla_base.huella(),
+            self.dict_claves.motivos_devolucion,
+            self.consolidado.huella(),
         )
+        if not self.salida_vigente(ruta_salida, huella):
+            self.consolidado.escribir(
+                ruta_salida, plantilla_base, self.dict_claves.motivos_devolucion,
+                tf.ExcelPlantilla.COL_MOTIVOS)
+            self.registrar_salida(ruta_salida, huella)
+        logger.info(f"{len(self.consolidado.facturas)} devoluciones en {ruta_salida}")
+        self.consolidado.vaciar()
+
+    def ruta_plantilla(self, cruce: dict, maestras: dict) -> str:
+        """
+        Ruta del archivo de devolución de una factura (`paths_resultados.plantillas`).
 
-        # Procesar por cada key
-        # Claves faltantes insumo.
-        list_ean_unicos_fac = []
-        list_faltantes_df_precios_total = []
-        df_duplicados_ean_cp = df_duplicados_ean.copy()
+        Raises:
+            KeyError: Si la oficina no está en la maestra de tiendas.
+        """
+        num_oficina = cruce["num_oficina"]
+        return self.paths_resultados.plantillas.format(
+            num_oficina=num_oficina,
+            nomb=maestras["dict_oficina_nombre"][num_oficina],
+            obs_fact=cruce["obs_fact"]
+        )
 
-        # Notemos los elementos de cada tupla.
-        # cada_tupla_triple[0] -> número de la oficina (clss str)
-        # cada_tupla_triple[1] -> Observacion de la factura (class: str)
-        # cada_tupla_triple[2] -> df_con info de factura: (class: DataFrame)
-        for cada_tupla_triple in list_pdfs_cabecera:
+    def preparar_plantilla(self, cruce: dict, maestras: dict) -> tf.ExcelPlantilla:
+        """
+        Llena en memoria la plantilla de devolución de una factura, sin guardarla.
 
-            num_oficina = cada_tupla_triple[0]
-            obs_fact = cada_tupla_triple[1]
-            df_info_fact = cada_tupla_triple[2]
-            # Obtener los EAN duplicados únicamente presentes en facturas
+        Raises:
+            KeyError: Si la oficina no está en la maestra de tiendas.
+        """
+        plantilla = maestras["plantilla_base"].clonar_con_salida(
+            ruta_salida=self.ruta_plantilla(cruce, maestras))
 
-            list_ean_unicos_fac += df_info_fact[EAN_UN].drop_duplicates().tolist()
+        plantilla.insertar_dataframe(cruce["df_final"])
 
-            df_precios_merge = tf.merge_con_fallback(
-                df_left=df_info_fact,
-                df_right=df_prec_select_sin_dup,
-                primera_clave=EAN_UN,
-                segunda_clave=EAN_PQ,
-                columna_objetivo=COD_MATERIAL
-            )
+        plantilla.aplicar_lista_desplegable(
+            columna=tf.ExcelPlantilla.COL_MOTIVOS,
+            opciones=self.dict_claves.motivos_devolucion,
+        )
+        return plantilla
 
-            list_faltantes_df_precios = df_precios_merge[
-                df_precios_merge[COD_MATERIAL].isnull()
-            ][EAN_UN].tolist()
+    def escribir_duplicados(self, maestras: dict, list_ean_unicos_fac: list):
+        """
+        Exporta los materiales con EAN duplicado presentes en las facturas.
 
-            # Modifcar elementos flatantes
-            if len(list_faltantes_df_precios) > 0:
-                list_faltantes_df_precios = [
-                    num_oficina + " " + cada_ean
-                    for cada_ean in list_faltantes_df_precios
-                ]
+        Args:
+            maestras (dict): Resultado de `cargar_maestras`.
+            list_ean_unicos_fac (list): EAN encontrados en las facturas.
+        """
+        df_duplicados_ean_cp = tf.filtrar_por_valores(
+            df=maestras["df_duplicados_ean"], columna=EAN_UN,
+            valores=list_ean_unicos_fac)
 
-            list_faltantes_df_precios_total.extend(list_faltantes_df_precios)
+        ruta_salida = self.paths_resultados.mat_duplicados
+        if self.shard:
+            ruta_salida = ruta_parcial(ruta_salida, self.shard)
 
-            df_plantilla_cols_finales = tf.seleccionar_columnas_pd(
-                df=df_precios_merge,
-                cols_elegidas=self.config_wrapper.config_claves_pdf.cols_finales,
-            )
+        self.exportar_excel(df_duplicados_ean_cp, ruta_salida)
+
+    def exportar_excel(self, df: DataFrame, ruta_salida: str):
+        """
+        Escribe `df` con `to_excel`, salvo que el archivo ya tenga ese contenido.
+        """
+        huella = huella_contenido(self.VERSION_SALIDAS, huella_dataframe(df))
+        if self.salida_vigente(ruta_salida, huella):
+            return
+        df.to_excel(ruta_salida, index=False)
+        self.registrar_salida(ruta_salida, huella)
 
-            nomb = dict_oficina_nombre[num_oficina]
+    def escribir_faltantes(self, faltantes_por_factura: list):
+        """
+        Escribe el reporte de códigos EAN faltantes agregado por (oficina, EAN)
+        en el formato `config_reportes.formato_faltantes` (ver
+        `escribir_reporte_faltantes`). En modo shard escribe la salida parcial
+        con la ruta de cada PDF.
 
-            salida_plantilla = self.paths_resultados.plantillas.format(
-                num_oficina=num_oficina,
-                nomb=nomb,
-                obs_fact=obs_fact
+        Args:
+            faltantes_por_factura (list): Tuplas (ruta_pdf, registros de
+                `formatear_faltantes`), en orden de descubrimiento.
+        """
+        if self.shard:
+            escribir_faltantes_parcial(
+                ruta_parcial(self.paths_resultados.cods_faltantes, self.shard),
+                faltantes_por_factura,
             )
+            return
 
-            plantilla = plantilla_base.clonar_con_salida(
-                ruta_salida=salida_plantilla)
+        escribir_reporte_faltantes(
+            self.paths_resultados.cods_faltantes,
+            faltantes_por_factura,
+            self.config.config_reportes.formato_faltantes,
+        )
 
-            plantilla.insertar_dataframe(df_plantilla_cols_finales)
+    def fusionar_shards(self, total: int):
+        """
+        Combina las salidas parciales de `total` shards en los reportes finales.
 
-            plantilla.aplicar_lista_desplegable(
-                columna=tf.ExcelPlantilla.COL_MOTIVOS,
-                opciones=self.config_wrapper.config_claves_pdf.motivos_devolucion,
-            )
+        Args:
+            total (int): Número de shards.
+        """
+        faltantes_por_factura, df_duplicados = fusionar_shards(
+            ruta_faltantes=self.paths_resultados.cods_faltantes,
+            ruta_duplicados=self.paths_resultados.mat_duplicados,
+            total=total,
+            col_orden=EAN_UN,
+            # No siempre coincide con el orden por ruta (ej. .tar.gz).
+            posiciones={ruta: posicion for posicion, ruta in enumerate(self.iterar_pdfs())},
+        )
+        self.exportar_excel(df_duplicados, self.paths_resultados.mat_duplicados)
+        self.escribir_faltantes(faltantes_por_factura)
+        if self.consolidado is not None:
+            self.fusionar_consolidados(total)
+        self.guardar_manifiesto_salidas()
+        logger.success(f"Fusionadas las salidas de {total} shards.")
+
+    def fusionar_consolidados(self, total: int):
+        """
+        Combina los archivos únicos parciales de los shards (los shards sin
+        facturas no escriben el suyo).
+        """
+        ruta_salida = self.ruta_consolidado()
+        parciales = [ruta_parcial(ruta_salida, (indice, total)) for indice in range(total)]
+        parciales = [ruta for ruta in parciales if os.path.exists(ruta)]
+        if not parciales:
+            return
+        reportes = self.config.config_reportes
+        fusionar_consolidados(
+            parciales, ruta_salida, reportes.salida_devoluciones, reportes.disposicion_libro,
+            tf.ExcelPlantilla.cargar_desde_archivo(self.path_plant_ecazdo),
+            self.dict_claves.motivos_devolucion, tf.ExcelPlantilla.COL_MOTIVOS,
+        )
 
-            plantilla.guardar()
+    @staticmethod
+    def formatear_faltantes(cruce: dict) -> list:
+        """
+        Convierte los EAN faltantes de un cruce en registros
+        [num_oficina, ean, descripcion] (listas, para guardarse en JSON).
+        """
+        return [
+            [cruce["num_oficina"], cada_ean, descripcion]
+            for cada_ean, descripcion in zip(cruce["faltantes"], cruce["desc_faltantes"])
+        ]
 
-        df_duplicados_ean_cp = tf.filtrar_por_valores(
-            df=df_duplicados_ean_cp, columna=EAN_UN, valores=list_ean_unicos_fac)
+    def main(self) -> Dict[str, DataFrame]:
+        """
+        Ejecuta el proceso principal del programa
+        """
+        # Las maestras se cargan en segundo plano mientras se extraen los PDF.
+        futuro_maestras = self.precargar_maestras()
+
+        # Notemos los elementos de cada tupla.
+        # cada_tupla_triple[0] -> número de la oficina (clss str)
+        # cada_tupla_triple[1] -> Observacion de la factura (class: str)
+        # cada_tupla_triple[2] -> df_con info de factura: (class: DataFrame)
+        # cada_tupla_triple[3] -> cabecera limpia de la factura (class: dict)
+        list_path_pdfs = []
+        list_pdfs_cabecera = []
+        with self.metricas.medir("extraccion"):
+            for cada_pdf in self.iterar_pdfs():
+                list_path_pdfs.append(cada_pdf)
+                with self.contexto_factura(cada_pdf):
+                    list_pdfs_cabecera.append(self.extraer_factura(cada_pdf))
+
+        # Punto de unión: solo se mide la espera que no se solapó con la extracción.
+        with self.metricas.medir("espera_maestras"):
+            maestras = futuro_maestras.result()
+
+        # Claves faltantes insumo.
+        list_ean_unicos_fac = []
+        faltantes_por_factura = []
+
+        for cada_pdf, cada_tupla_triple in zip(list_path_pdfs, list_pdfs_cabecera):
+            with self.contexto_factura(cada_pdf):
+                with self.metricas.medir("cruce"):
+                    cruce = self.cruzar_factura(cada_tupla_triple, maestras)
+
+                list_ean_unicos_fac += cruce["eans_factura"]
+                faltantes_por_factura.append((cada_pdf, self.formatear_faltantes(cruce)))
+
+                with self.metricas.medir("escritura"):
+                    self.escribir_plantilla(cruce, maestras, cada_pdf)
+                self.acumular_lineas(cruce)
+                self.metricas.incrementar("facturas_escritas")
+
+        with self.metricas.medir("reportes"):
+            self.escribir_duplicados(maestras, list_ean_unicos_fac)
+            self.escribir_faltantes(faltantes_por_factura)
+            self.escribir_lineas()
+            self.escribir_consolidado(maestras)
+            self.guardar_manifiesto_salidas(list_path_pdfs)
+
+        self.metricas.log_resumen()
+
+
+def _cpus_disponibles() -> int:
+    """
+    CPUs que puede usar este proceso (respeta la afinidad en Linux).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _construir_en_proceso(nombre_metodo: str) -> tuple:
+    """
+    Ejecuta `Run().<nombre_metodo>()` en un proceso de
+    `construir_indices_en_paralelo`. Se crea una instancia nueva (que lee la
+    misma configuración) en lugar de enviar la del proceso principal, cuyas
+    métricas se siguen modificando durante la extracción.
+
+    Returns:
+        tuple: (resultado, valores de métricas registrados en el proceso)
+    """
+    gf.logger_basic_config()
+    configurar_logs(obtener_config().config_logs)
+    proceso = Run()
+    resultado = getattr(proceso, nombre_metodo)()
+    return resultado, dict(proceso.metricas.valores)
+
+
+def crear_parser_argumentos() -> argparse.ArgumentParser:
+    """
+    Define los argumentos de línea de comandos de `main.py`.
+    """
+    parser = argparse.ArgumentParser(description="Procesamiento de facturas PDF.")
+    agregar_argumentos_run(parser)
+    return parser
 
-        df_duplicados_ean_cp.to_excel(
-            self.paths_resultados.mat_duplicados, index=False)
 
-        with open(
-            self.paths_resultados.cods_faltantes, "w", encoding="utf-8"
-        ) as f:
-            for item in list_faltantes_df_precios_total:
-                f.write(f"{item}\n")
+def ejecutar(args: argparse.Namespace):
+    """
+    Ejecuta el modo de procesamiento indicado por los argumentos.
+
+    Args:
+        args (argparse.Namespace): Argumentos de `agregar_argumentos_run`.
+    """
+    shard = parsear_shard(args.shard) if args.shard else None
+
+    # Crear instancia de Run y ejecutar
+    if args.fusionar_shards:
+        Run().fusionar_shards(args.fusionar_shards)
+    elif args.incremental or args.vigilar:
+        from Scripts.modo_incremental import RunIncremental
+
+        Iniciar_proceso = RunIncremental(shard=shard)
+        if args.vigilar:
+            Iniciar_proceso.vigilar()
+        else:
+            Iniciar_proceso.main()
+    elif args.reanudable:
+        from Scripts.modo_reanudable import RunReanudable
+
+        RunReanudable(shard=shard).main()
+    elif args.aislado:
+        from Scripts.ejecucion_aislada import RunAislado
+
+        RunAislado(shard=shard).main()
+    elif args.modo == "async":
+        from Scripts.pipeline_async import RunAsync
+
+        RunAsync(shard=shard).main()
+    else:
+        Run(shard=shard).main()
 
 
 if __name__ == "__main__":
 
+    args = crear_parser_argumentos().parse_args()
+
     # Configuración básica del logger
     gf.logger_basic_config()
+    configurar_logs(obtener_config().config_logs)
 
-    # Crear instancia de Run y ejecutar
-    Iniciar_proceso = Run()
-    Iniciar_proceso.main()
+    ejecutar(args)
@@ -0,0 +1,139 @@
+# Importaciones de librerías estándar y externas.
+import os
+import time
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+from Scripts.main import Run
+from Scripts.shards import ruta_parcial
+from Utils.manifiesto import ManifiestoProcesados
+
+
+class RunIncremental(Run):
+    """
+    Variante de `Run` que solo procesa los PDF nuevos o modificados.
+
+    El estado se guarda en un `ManifiestoProcesados`. Los PDF sin cambios no se
+    vuelven a extraer ni se reescribe su plantilla; los reportes agregados se
+    reconstruyen desde el manifiesto y solo cuando hubo algún cambio.
+    """
+
+    def __init__(self, shard: tuple | None = None):
+        super().__init__(shard=shard)
+        self.config_incremental = self.config.config_incremental
+        self._maestras = None
+        self._firma_maestras = None
+
+    def _obtener_maestras(self, firma: dict) -> dict:
+        """
+        Reutiliza las maestras cargadas en un ciclo anterior del vigilante
+        mientras su firma no cambie.
+        """
+        if self._maestras is None or self._firma_maestras != firma:
+            with self.metricas.medir("carga_maestras"):
+                self._maestras = self.cargar_maestras()
+            self._firma_maestras = firma
+        return self._maestras
+
+    def main(self) -> bool:
+        """
+        Ejecuta un ciclo incremental.
+
+        Returns:
+            bool: True si se procesó o descartó algún archivo.
+        """
+        # Cada shard lleva su propio manifiesto: `descartar_ausentes` solo ve
+        # los PDF del shard y borraría las entradas de los demás.
+        ruta_manifiesto = self.paths_cache.manifiesto_procesados
+        if self.shard:
+            ruta_manifiesto = ruta_parcial(ruta_manifiesto, self.shard)
+        manifiesto = ManifiestoProcesados(ruta_manifiesto)
+        firma = self.firma_insumos()
+        manifiesto.validar_insumos(firma)
+
+        # Tamaño y fecha vienen del descubrimiento (caché de DirEntry.stat).
+        firmas = dict(self.iterar_pdfs(con_firma=True))
+        list_path_pdfs = list(firmas)
+        pendientes = [
+            ruta for ruta in list_path_pdfs if manifiesto.requiere_proceso(ruta, firmas[ruta])
+        ]
+        ausentes = manifiesto.descartar_ausentes(list_path_pdfs)
+
+        if not pendientes and not ausentes:
+            logger.info("Sin facturas nuevas o modificadas.")
+            manifiesto.guardar()
+            return False
+
+        logger.info(
+            f"Incremental: {len(pendientes)} por procesar, "
+            f"{len(list_path_pdfs) - len(pendientes)} sin cambios, {len(ausentes)} retiradas"
+        )
+        maestras = self._obtener_maestras(firma)
+
+        for cada_pdf in pendientes:
+            with self.contexto_factura(cada_pdf):
+                with self.metricas.medir("extraccion"):
+                    # El hash de la caché de extracción es también el del manifiesto.
+                    origen, hash_pdf = self.origen_pdf(cada_pdf)
+                    tupla_factura = self.extraer_con_cache(origen, hash_pdf)
+                with self.metricas.medir("cruce"):
+                    cruce = self.cruzar_factura(tupla_factura, maestras)
+                with self.metricas.medir("escritura"):
+                    salida = self.escribir_plantilla(cruce, maestras, cada_pdf)
+                self.acumular_lineas(cruce)
+                self.metricas.incrementar("facturas_escritas")
+
+            # Si la factura cambió de nombre de salida, se retira la anterior.
+            salida_previa = manifiesto.salida_previa(cada_pdf)
+            if salida_previa and salida_previa != salida and os.path.exists(salida_previa):
+                os.remove(salida_previa)
+
+            manifiesto.registrar(
+                ruta=cada_pdf,
+                salida=salida,
+                faltantes=self.formatear_faltantes(cruce),
+                eans_factura=cruce["eans_factura"],
+                hash_pdf=hash_pdf,
+            )
+
+        # Reportes agregados reconstruidos desde el manifiesto, en orden de carpeta.
+        entradas = [manifiesto.entradas[ruta] for ruta in list_path_pdfs]
+        with self.metricas.medir("reportes"):
+            self.escribir_duplicados(
+                maestras, [ean for e in entradas for ean in e["eans_factura"]]
+            )
+            self.escribir_faltantes(
+                [(ruta, e["faltantes"]) for ruta, e in zip(list_path_pdfs, entradas)]
+            )
+            self.escribir_lineas()
+            self.escribir_consolidado(maestras)
+            self.guardar_manifiesto_salidas(list_path_pdfs)
+
+        manifiesto.guardar()
+        self.metricas.log_resumen()
+        return True
+
+    def vigilar(self, intervalo_s: float | None = None):
+        """
+        Revisa la carpeta de facturas cada `intervalo_s` segundos y ejecuta un
+        ciclo incremental. Se detiene con Ctrl+C.
+
+        Se usa sondeo (polling) en lugar de inotify para funcionar igual en
+        Windows y en carpetas de red.
+
+        Args:
+            intervalo_s (float, opcional): Segundos entre revisiones. Por defecto
+                `config_incremental.intervalo_vigilancia_s`.
+        """
+        intervalo_s = intervalo_s or self.config_incremental.intervalo_vigilancia_s
+        logger.info(f"Vigilando {self.path_pdfs} cada {intervalo_s} s (Ctrl+C para salir)")
+        try:
+            while True:
+                try:
+                    self.main()
+                except Exception as e:
+                    # Un ciclo fallido no detiene al vigilante (ej. archivo a medio copiar).
+                    logger.error(f"Ciclo incremental fallido: {e}")
+                time.sleep(intervalo_s)
+        except KeyboardInterrupt:
+            logger.info("Vigilancia detenida.")
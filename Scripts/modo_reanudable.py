@@ -0,0 +1,98 @@
+# Importaciones de librerías estándar y externas.
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+from Scripts.main import Run
+from Scripts.shards import ruta_parcial
+from Utils.checkpoints import RegistroTrabajos, ENCOLADO, PARSEADO, CRUZADO, ESCRITO
+
+
+class RunReanudable(Run):
+    """
+    Variante de `Run` con checkpoints por factura en una tabla SQLite
+    (`RegistroTrabajos`): queued -> parsed -> matched -> written, o failed.
+
+    Si una ejecución se interrumpe (PDF corrupto, archivo de salida bloqueado
+    en la carpeta compartida), la siguiente continúa desde la última etapa
+    completada de cada factura. Un fallo en una factura no detiene el lote: se
+    marca como `failed` y se reintenta en la siguiente ejecución. Cuando todas
+    las facturas quedan `written`, la siguiente ejecución inicia un lote nuevo.
+    """
+
+    def main(self):
+        """
+        Ejecuta (o reanuda) el lote.
+        """
+        # Cada shard lleva su propio registro: `encolar` y `reiniciar` solo
+        # conocen los PDF del shard y borrarían las filas de los demás.
+        ruta_trabajos = self.paths_cache.trabajos
+        if self.shard:
+            ruta_trabajos = ruta_parcial(ruta_trabajos, self.shard)
+        registro = RegistroTrabajos(ruta_trabajos)
+        try:
+            self._procesar_lote(registro)
+        finally:
+            registro.cerrar()
+
+    def _procesar_lote(self, registro: RegistroTrabajos):
+        if registro.lote_terminado():
+            registro.reiniciar()
+        else:
+            logger.info(f"Reanudando lote: {registro.resumen()}")
+
+        list_path_pdfs = self.listar_pdfs()
+        registro.encolar(list_path_pdfs)
+
+        maestras = None
+        for cada_pdf in list_path_pdfs:
+            etapa, artefacto = registro.obtener(cada_pdf)
+            if etapa == ESCRITO:
+                self.metricas.incrementar("facturas_reanudadas_omitidas")
+                continue
+
+            with self.contexto_factura(cada_pdf):
+                try:
+                    if etapa == ENCOLADO:
+                        with self.metricas.medir("extraccion"):
+                            artefacto = self.extraer_factura(cada_pdf)
+                        registro.marcar_parseado(cada_pdf, artefacto)
+                        etapa = PARSEADO
+
+                    # Las maestras solo se cargan si alguna factura las necesita.
+                    if maestras is None:
+                        with self.metricas.medir("carga_maestras"):
+                            maestras = self.cargar_maestras()
+
+                    if etapa == PARSEADO:
+                        with self.metricas.medir("cruce"):
+                            artefacto = self.cruzar_factura(artefacto, maestras)
+                        registro.marcar_cruzado(
+                            cada_pdf, artefacto, self.formatear_faltantes(artefacto)
+                        )
+                        etapa = CRUZADO
+
+                    with self.metricas.medir("escritura"):
+                        salida = self.escribir_plantilla(artefacto, maestras, cada_pdf)
+                    self.acumular_lineas(artefacto)
+                    registro.marcar_escrito(cada_pdf, salida)
+                    self.metricas.incrementar("facturas_escritas")
+
+                except Exception as e:
+                    logger.error(f"Factura fallida en etapa '{etapa}': {cada_pdf} - {e}")
+                    registro.marcar_fallido(cada_pdf, e)
+                    self.metricas.incrementar("facturas_fallidas")
+
+        if maestras is not None:
+            datos = registro.datos_reportes(list_path_pdfs)
+            with self.metricas.medir("reportes"):
+                self.escribir_duplicados(
+                    maestras, [ean for _, _, eans in datos for ean in eans]
+                )
+                self.escribir_faltantes([(ruta, faltantes) for ruta, faltantes, _ in datos])
+                self.escribir_lineas()
+                self.escribir_consolidado(maestras)
+                self.guardar_manifiesto_salidas(list_path_pdfs)
+
+        resumen = registro.resumen()
+        logger.info(f"Estado del lote: {resumen}")
+        self.metricas.log_resumen()
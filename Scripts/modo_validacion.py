@@ -0,0 +1,112 @@
+# Importaciones de librerías estándar y externas.
+import os
+import json
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+from Scripts.main import Run, EAN_UN
+
+
+class RunValidacion(Run):
+    """
+    Variante de `Run` que valida un lote sin generar plantillas: extrae cada
+    PDF (usando la caché de extracción), resuelve la oficina contra la maestra
+    de tiendas y cruza los EAN contra la maestra de precios. No carga ni
+    escribe `ExcelPlantilla`, por lo que toma una fracción del tiempo de una
+    ejecución completa.
+
+    El resultado es un reporte JSON compacto (`paths_resultados.validacion`)
+    con los EAN faltantes, los materiales duplicados y las oficinas sin
+    resolver, que en una ejecución normal solo aparecen después de escribir
+    las plantillas (el `KeyError` sobre `dict_oficina_nombre`).
+    """
+
+    def main(self) -> dict:
+        """
+        Valida todas las facturas y escribe el reporte.
+
+        Returns:
+            dict: Reporte de validación (ver `escribir_reporte`).
+        """
+        with self.metricas.medir("carga_maestras"):
+            maestras = self.cargar_indices_maestras()
+        dict_oficina_nombre = maestras["dict_oficina_nombre"]
+
+        eans_faltantes = []
+        oficinas_sin_resolver = []
+        errores_extraccion = []
+        list_ean_unicos_fac = []
+
+        n_facturas = 0
+        for cada_pdf in self.iterar_pdfs():
+            n_facturas += 1
+            nombre_pdf = os.path.basename(cada_pdf)
+            with self.contexto_factura(cada_pdf):
+                try:
+                    with self.metricas.medir("extraccion"):
+                        tupla_factura = self.extraer_factura(cada_pdf)
+                except Exception as e:
+                    errores_extraccion.append({"pdf": nombre_pdf, "mensaje": f"{type(e).__name__}: {e}"})
+                    continue
+
+                with self.metricas.medir("cruce"):
+                    cruce = self.cruzar_factura(tupla_factura, maestras)
+
+                num_oficina = cruce["num_oficina"]
+                if num_oficina not in dict_oficina_nombre:
+                    oficinas_sin_resolver.append({"pdf": nombre_pdf, "oficina": num_oficina})
+                eans_faltantes += [
+                    {"pdf": nombre_pdf, "oficina": num_oficina, "ean": ean}
+                    for ean in cruce["faltantes"]
+                ]
+                list_ean_unicos_fac += cruce["eans_factura"]
+
+        df_duplicados = maestras["df_duplicados_ean"]
+        df_duplicados = df_duplicados[df_duplicados[EAN_UN].isin(list_ean_unicos_fac)]
+
+        reporte = {
+            "resumen": {
+                "facturas": n_facturas,
+                "errores_extraccion": len(errores_extraccion),
+                "oficinas_sin_resolver": len(oficinas_sin_resolver),
+                "eans_faltantes": len(eans_faltantes),
+                "materiales_duplicados": len(df_duplicados),
+            },
+            "errores_extraccion": errores_extraccion,
+            "oficinas_sin_resolver": oficinas_sin_resolver,
+            "eans_faltantes": eans_faltantes,
+            "materiales_duplicados": df_duplicados.astype(object)
+            .where(df_duplicados.notna(), None)
+            .to_dict(orient="records"),
+        }
+        self.escribir_reporte(reporte)
+        self.metricas.log_resumen()
+        return reporte
+
+    def escribir_reporte(self, reporte: dict):
+        """
+        Escribe el reporte de validación en JSON y registra el resumen.
+
+        Args:
+            reporte (dict): Con las claves "resumen", "errores_extraccion",
+                "oficinas_sin_resolver", "eans_faltantes" y
+                "materiales_duplicados".
+        """
+        ruta_reporte = self.paths_resultados.validacion
+        os.makedirs(os.path.dirname(ruta_reporte) or ".", exist_ok=True)
+        with open(ruta_reporte, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+        if self.tiene_bloqueantes(reporte):
+            logger.warning(f"Validación con problemas: {reporte['resumen']}. Ver {ruta_reporte}")
+        else:
+            logger.success(f"Validación: {reporte['resumen']}. Ver {ruta_reporte}")
+
+    @staticmethod
+    def tiene_bloqueantes(reporte: dict) -> bool:
+        """
+        Indica si el lote fallaría en una ejecución completa (PDF ilegibles u
+        oficinas sin nombre). Los EAN faltantes y duplicados solo se reportan.
+        """
+        resumen = reporte["resumen"]
+        return bool(resumen["errores_extraccion"] or resumen["oficinas_sin_resolver"])
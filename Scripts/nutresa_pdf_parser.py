@@ -1,31 +1,221 @@
 import re
 import pdfplumber
+from bisect import bisect
+from operator import itemgetter
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
+from pdfminer.pdfparser import PDFSyntaxError
+from pdfplumber.utils import cluster_objects
+from typing import IO, Dict, Any, Optional, Sequence
+from dataclasses import dataclass, field, asdict
 
 from itertools import chain, repeat
 
+from Config.config_loader import ConfigClavesPDF
+from Utils.archivos_comprimidos import abrir_entrada
+from Scripts.registro_parsers import ErrorExtraccionPDF, registrar_parser, extraer_texto_pagina
+
+# Patrones fijos del formato Nutresa, compilados una sola vez por proceso.
+REGEX_DICT = {
+    "fecha": re.compile(r"Fecha:\s*(\d{1,2}/\d{1,2}/\d{4})"),
+    "EAN_UN": re.compile(r"\d{13}"),
+    "precio": re.compile(r"\$\d{1,3}(?:\.\d{3})*,\d{2}"),
+    "observación": re.compile(r"^Observación:.*"),
+    "Número": re.compile(r"Número:\s+(\d{3}-[A-Z]{3}-\d{8})"),
+}
+PATRON_BODEGA = re.compile(r"^\d{5}$")
+# Distancia vertical máxima entre palabras de una misma fila (la misma que usa
+# `extract_text`, así el texto armado desde las palabras es idéntico).
+TOLERANCIA_FILA = 3
+# Atributos de cada palabra de `extract_words` que usa el modo "palabras" (lo
+# que se guarda en la caché de páginas).
+CLAVES_PALABRA = ("text", "x0", "x1", "top")
+
 
 def concatenar_lista_itertools(lista: list, n: int) -> list:
     """Versión optimizada para grandes listas o n."""
     return list(chain.from_iterable(repeat(lista, n)))
 
 
+@dataclass(slots=True)
+class CabeceraFactura:
+    """
+    Cabecera de una factura mientras se procesa. Los campos fijos del formato
+    van en slots; los valores de las etiquetas configuradas en
+    `mapeo_cabecera` van en `extendida` (clave configurada -> valor).
+    """
+    tipo_documento: str = ""
+    numero: str = ""
+    fecha: str = ""
+    extendida: dict = field(default_factory=dict)
+
+
+class BufferProductos:
+    """
+    Productos de una factura en columnas paralelas (una lista por campo), en
+    lugar de un dict por fila: cada línea agrega solo sus valores y el
+    DataFrame se arma por columnas, sin recorrer las filas.
+    """
+
+    __slots__ = ("columnas", "valores")
+
+    def __init__(self, columnas: Sequence[str]):
+        self.columnas = tuple(columnas)
+        self.valores = tuple([] for _ in self.columnas)
+
+    def __len__(self) -> int:
+        return len(self.valores[0])
+
+    def agregar(self, fila: Sequence[str]):
+        """
+        Agrega una fila en el orden de `columnas`. Si trae menos campos, los
+        restantes quedan en None.
+        """
+        for i, lista in enumerate(self.valores):
+            lista.append(fila[i] if i < len(fila) else None)
+
+    def a_dataframe(self) -> pd.DataFrame:
+        # Arreglos object ya armados: pandas no infiere ni copia cada columna.
+        return pd.DataFrame(
+            {
+                columna: np.array(lista, dtype=object)
+                for columna, lista in zip(self.columnas, self.valores)
+            },
+            copy=False,
+        )
+
+
+class BandasColumnas:
+    """
+    Columnas de la tabla de productos aprendidas de la fila de encabezado
+    ("Item  Bodega  UM  Ubic.  Cantidad  Precio unit. ...").
+
+    La primera columna es el EAN; la descripción (sin título) son las palabras
+    que terminan antes de que empiece la segunda columna. Las demás se separan
+    por los puntos medios entre los centros de sus títulos, así cada palabra se
+    asigna con una búsqueda binaria sobre su centro, sin expresiones regulares
+    (los valores numéricos están alineados a la derecha y no siempre caben
+    bajo su título).
+    """
+
+    __slots__ = ("x_descripcion", "limites", "indices", "n_campos")
+
+    def __init__(self, x_descripcion: float, limites: list, indices: list, n_campos: int):
+        self.x_descripcion = x_descripcion
+        self.limites = limites
+        self.indices = indices
+        self.n_campos = n_campos
+
+    @classmethod
+    def desde_encabezado(
+        cls, fila: list, columnas_tabla: tuple, campos: tuple
+    ) -> "BandasColumnas | None":
+        """
+        Retorna las bandas si `fila` es el encabezado de la tabla, o None.
+
+        Args:
+            fila (list): Palabras de la fila (de `extract_words`), ordenadas por x.
+            columnas_tabla (tuple): Pares (título, clave o None) configurados.
+            campos (tuple): Campos de producto (`productos`), en orden de salida.
+        """
+        if not fila or fila[0]["text"] != columnas_tabla[0][0]:
+            return None
+        titulos = dict(columnas_tabla)
+        # Un título de varias palabras ("Precio unit.") extiende el tramo anterior.
+        tramos = []
+        for palabra in fila:
+            if palabra["text"] in titulos:
+                tramos.append([palabra["x0"], palabra["x1"], titulos[palabra["text"]]])
+            elif tramos:
+                tramos[-1][1] = palabra["x1"]
+        if len(tramos) != len(columnas_tabla):
+            return None
+
+        columnas = tramos[1:]
+        centros = [(x0 + x1) / 2 for x0, x1, _ in columnas]
+        return cls(
+            x_descripcion=columnas[0][0],
+            limites=[(a + b) / 2 for a, b in zip(centros, centros[1:])],
+            indices=[campos.index(clave) if clave in campos else None for _, _, clave in columnas],
+            n_campos=len(campos),
+        )
+
+    def fila_producto(self, fila: list) -> list | None:
+        """
+        Retorna [EAN, descripción, *campos] de una fila de producto, o None si
+        la fila no empieza por un código numérico o no tiene valores en las
+        columnas de la tabla.
+        """
+        codigo = fila[0]["text"]
+        if not codigo.isdigit() or fila[0]["x1"] > self.x_descripcion:
+            return None
+
+        descripcion = []
+        celdas = [[] for _ in range(self.n_campos)]
+        for palabra in fila[1:]:
+            if palabra["x1"] <= self.x_descripcion:
+                descripcion.append(palabra["text"])
+                continue
+            indice = self.indices[bisect(self.limites, (palabra["x0"] + palabra["x1"]) / 2)]
+            if indice is not None:
+                celdas[indice].append(palabra["text"])
+
+        if not any(celdas):
+            return None
+        return [codigo, " ".join(descripcion), *(" ".join(c) if c else None for c in celdas)]
+
+
+@registrar_parser
 class ProcesadorPDFNutresa:
-    def __init__(self, pdf_path: str, dict_claves: Any):
+    PROVEEDOR = "nutresa"
+    NITS_PROVEEDOR = ("900341086-0",)
+    VERSION = 1
+
+    def __init__(self, pdf_path: str, dict_claves: Any, pdf=None,
+                 texto_primera: str | None = None, cache_paginas=None):
+        """
+        Args:
+            pdf_path (str): Ruta del PDF (o ruta virtual / objeto tipo archivo).
+            dict_claves (Any): Configuración `config_claves_pdf`.
+            pdf (pdfplumber.PDF, opcional): PDF ya abierto por el despachador
+                de `registro_parsers`; si no se da, se abre `pdf_path`.
+            texto_primera (str, opcional): Texto ya extraído de la página 1.
+            cache_paginas (CachePaginas, opcional): Caché de extracción por
+                página; sin ella cada página pasa por pdfplumber.
+        """
         self.pdf_path = pdf_path
+        self.pdf = pdf
+        self.texto_primera = texto_primera
+        self.cache_paginas = cache_paginas
+        # Se acepta también un ConfigWrapper de `config_claves_pdf` (compatibilidad).
+        if not isinstance(dict_claves, ConfigClavesPDF):
+            dict_claves = ConfigClavesPDF.desde_dict(dict_claves.as_dict)
         self.dict_claves = dict_claves
         self.regex_dict = self._compilar_regex()
+        self.por_palabras = dict_claves.extraccion_productos == "palabras"
+        self._inicializar_estado()
         self.texto = self._extraer_texto_pdf()
-        self.lineas = self.texto.split("\n")
-        self.cabecera = {}
-        self.cabecera_extendida = {}
-        self.productos = []
-        self.observaciones = ""
+        self.lineas = self.texto.split("\n") if self.texto else []
+
+    def _inicializar_estado(self):
+        """
+        Crea los contenedores del resultado: cabecera, productos (columnares)
+        y las partes de las observaciones, que se unen con un solo join.
+        """
+        self.cabecera = CabeceraFactura()
+        self.productos = BufferProductos(("EAN_UN", "descripcion", *self.dict_claves.productos))
+        self.partes_observaciones = []
+        # Bandas de la tabla (modo "palabras"); se vuelven a aprender en cada
+        # página que repite el encabezado.
+        self.bandas = None
 
     def _parsear_producto_desde_linea(
-        self, linea: str, list_claves_prod: list
-    ) -> dict | None:
+        self, linea: str, list_claves_prod: tuple
+    ) -> list | None:
+        """
+        Retorna la fila [EAN, descripción, *campos de `list_claves_prod`] de
+        una línea de producto, o None si la línea no tiene ese formato.
+        """
         tokens = linea.strip().split()
 
         if len(tokens) < 10:
@@ -34,27 +224,17 @@ class ProcesadorPDFNutresa:
         try:
             codigo_barras = tokens[0]
             idx_bodega = next(
-                i for i, t in enumerate(tokens[1:], 1) if re.match(r"^\d{5}$", t)
+                i for i, t in enumerate(tokens[1:], 1) if PATRON_BODEGA.match(t)
             )
             descripcion = " ".join(tokens[1:idx_bodega])
-            campos = tokens[idx_bodega : idx_bodega + 7]
-
-            return {
-                "EAN_UN": codigo_barras,
-                "descripcion": descripcion,
-                **dict(zip(list_claves_prod, campos)),
-            }
-        except (StopIteration, IndexError):
+            campos = tokens[idx_bodega : idx_bodega + len(list_claves_prod)]
+
+            return [codigo_barras, descripcion, *campos]
+        except StopIteration:
             return None
 
     def _compilar_regex(self) -> Dict[str, re.Pattern]:
-        return {
-            "fecha": re.compile(r"\d{2}/\d{2}/\d{4}"),
-            "EAN_UN": re.compile(r"\d{13}"),
-            "precio": re.compile(r"\$\d{1,3}(?:\.\d{3})*,\d{2}"),
-            "observación": re.compile(r"^Observación:.*"),
-            "Número":re.compile(r"Número:\s+(\d{3}-[A-Z]{3}-\d{8})")
-        }
+        return REGEX_DICT
 
     def _extraer_texto_pdf(self) -> Optional[str]:
         """
@@ -62,34 +242,83 @@ class ProcesadorPDFNutresa:
 
         Returns:
             str: Texto concatenado de todas las páginas
-            None: Si ocurre un error o el PDF está vacío
+            None: Si el PDF no tiene texto extraíble
 
         Raises:
-            FileNotFoundError: Si el archivo PDF no existe
-            PDFSyntaxError: Si el PDF está corrupto o encriptado
+            ErrorExtraccionPDF: Si el archivo no existe, está corrupto o no se
+                puede leer.
         """
-        texto_completo = []
+        if self.pdf is not None:
+            return self._leer_paginas(self.pdf)
 
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                # Iterar sobre todas las páginas del documento
-                for pagina in pdf.pages:
-                    # Extraer texto y manejar páginas vacías
-                    texto_pagina = pagina.extract_text()
-                    if texto_pagina:
-                        texto_completo.append(texto_pagina.strip())
-
-                return "\n".join(texto_completo) if texto_completo else None
-
-        except FileNotFoundError:
-            print(f"Error: Archivo no encontrado - {self.pdf_path}")
-            return None
-        except pdfplumber.pdf.PDFSyntaxError as e:
-            print(f"Error en formato PDF: {str(e)}")
-            return None
+            # Los miembros de .zip/.tar se leen en memoria, sin extraerlos a disco.
+            with pdfplumber.open(abrir_entrada(self.pdf_path)) as pdf:
+                return self._leer_paginas(pdf)
+
+        except FileNotFoundError as e:
+            raise ErrorExtraccionPDF(f"Archivo no encontrado - {self.pdf_path}") from e
+        except MemoryError:
+            # Se propaga para que el modo aislado lo reporte como límite de memoria.
+            raise
+        except PDFSyntaxError as e:
+            raise ErrorExtraccionPDF(f"Error en formato PDF: {str(e)}") from e
         except Exception as e:
-            print(f"Error inesperado: {str(e)}")
-            return None
+            raise ErrorExtraccionPDF(f"Error inesperado: {str(e)}") from e
+
+    def _leer_paginas(self, pdf) -> Optional[str]:
+        """
+        Concatena el texto de todas las páginas. La página 1 reutiliza
+        `texto_primera` si el despachador ya la extrajo.
+        """
+        texto_completo = []
+        # Iterar sobre todas las páginas del documento
+        for i, pagina in enumerate(pdf.pages):
+            # Extraer texto y manejar páginas vacías
+            if self.por_palabras:
+                texto_pagina = self._procesar_palabras_pagina(pagina)
+            elif i == 0 and self.texto_primera is not None:
+                texto_pagina = self.texto_primera
+            else:
+                texto_pagina = self._extraer_pagina(pagina, "texto", extraer_texto_pagina)
+            if texto_pagina:
+                texto_completo.append(texto_pagina.strip())
+
+        return "\n".join(texto_completo) if texto_completo else None
+
+    def _extraer_pagina(self, pagina, tipo: str, extraer):
+        """
+        `extraer(pagina)`, o su resultado guardado en la caché de páginas si
+        la página no cambió.
+        """
+        if self.cache_paginas is None:
+            return extraer(pagina)
+        return self.cache_paginas.obtener(pagina, tipo, extraer)
+
+    def _procesar_palabras_pagina(self, pagina) -> str:
+        """
+        Modo "palabras": llama `extract_words` una vez, agrupa las palabras en
+        filas y, en la misma pasada, agrega los productos con las bandas de
+        columnas. Retorna el texto de la página armado desde esas filas (igual
+        al de `extract_text`) para la cabecera y las observaciones.
+        """
+        palabras = self._extraer_pagina(pagina, "palabras", extraer_palabras_pagina)
+        filas = cluster_objects(palabras, itemgetter("top"), TOLERANCIA_FILA)
+        claves = self.dict_claves
+        lineas = []
+        for fila in filas:
+            fila.sort(key=itemgetter("x0"))
+            lineas.append(" ".join(palabra["text"] for palabra in fila))
+
+            bandas = BandasColumnas.desde_encabezado(fila, claves.columnas_tabla, claves.productos)
+            if bandas is not None:
+                self.bandas = bandas
+            elif self.bandas is not None:
+                producto = self.bandas.fila_producto(fila)
+                if producto:
+                    self.productos.agregar(producto)
+
+        return "\n".join(lineas)
 
     def _obtener_patrones_y_lineas_filtradas(self):
         """
@@ -130,8 +359,10 @@ class ProcesadorPDFNutresa:
 
         self._procesar_cabecera(lineas_posible_cabecera=lineas_posible_cabecera)
 
-        for linea in lineas_productos:
-            self._procesar_productos(linea)
+        # En el modo "palabras" los productos ya se agregaron al extraer.
+        if not self.por_palabras:
+            for linea in lineas_productos:
+                self._procesar_productos(linea)
 
         self._procesar_observaciones(list_observaciones=lineas_observaciones)
 
@@ -144,49 +375,55 @@ class ProcesadorPDFNutresa:
         """
         mapeo = self.dict_claves.mapeo_cabecera
         for i, linea in enumerate(lineas_posible_cabecera):
+            # La fecha comparte línea con el NIT: no corta la cadena de casos.
+            if "Fecha:" in linea and not self.cabecera.fecha:
+                match = self.regex_dict["fecha"].search(linea)
+                if match:
+                    self.cabecera.fecha = match.group(1)
+
             if "DEVOLUCIONES DE AVERIAS" in linea:
-                self.cabecera["tipo_documento"] = linea.strip()
+                self.cabecera.tipo_documento = linea.strip()
 
-            elif "Número" in linea and "Número" not in self.cabecera:
+            elif "Número" in linea and not self.cabecera.numero:
                 match = self.regex_dict["Número"].search(linea)
                 if match:
-                    self.cabecera["Número"] = match.group(1)
+                    self.cabecera.numero = match.group(1)
                     continue
                     
-            elif self._es_linea_de_etiqueta(linea, mapeo):
+            elif self._es_linea_de_etiqueta(linea):
                 self._extraer_valor_etiqueta(linea, i, mapeo)
 
-    def _es_linea_de_etiqueta(self, linea: str, mapeo) -> bool:
+    def _es_linea_de_etiqueta(self, linea: str) -> bool:
         """
         Determina si una línea contiene alguna de las etiquetas definidas
-        en el mapeo de cabecera.
+        en el mapeo de cabecera, con una sola búsqueda sobre la alternación
+        precompilada de todas las etiquetas.
 
         Args:
             linea (str): Línea del PDF a analizar.
-            mapeo: Objeto con el diccionario de etiquetas y claves de cabecera.
 
         Returns:
             bool: True si la línea contiene al menos una etiqueta válida.
         """
-        return any(etiqueta in linea for etiqueta in mapeo.as_dict)
+        return self.dict_claves.regex_etiquetas.search(linea) is not None
 
     def _extraer_valor_etiqueta(self, linea: str, i: int, mapeo):
         """
         Extrae el valor asociado a una etiqueta de cabecera en la línea actual,
-        y lo guarda en el diccionario `cabecera_extendida`. El valor se obtiene
+        y lo guarda en `cabecera.extendida`. El valor se obtiene
         de la línea siguiente a la etiqueta encontrada.
 
         Args:
             linea (str): Línea actual que contiene una etiqueta.
             i (int): Índice de la línea actual.
-            mapeo: Objeto con el diccionario de etiquetas y claves configuradas.
+            mapeo (tuple): Pares (etiqueta, clave) configurados.
         """
-        for etiqueta, clave in mapeo.as_dict.items():
+        for etiqueta, clave in mapeo:
             if etiqueta in linea and i + 1 < len(self.lineas):
                 valor = self.lineas[i + 1].strip()
                 if clave == "telefono":
                     valor = valor.split()[0]
-                self.cabecera_extendida[clave] = valor
+                self.cabecera.extendida[clave] = valor
                 break
 
     def _procesar_productos(self, linea: str) -> str:
@@ -205,42 +442,43 @@ class ProcesadorPDFNutresa:
             linea=linea, list_claves_prod=self.dict_claves.productos
         )
         if producto:
-            self.productos.append(producto)
+            self.productos.agregar(producto)
 
     def _procesar_observaciones(self, list_observaciones: str):
         """
-        Procesa una línea dentro del estado 'observaciones', concatenándola al texto total
-        de observaciones con espacios para mantener la coherencia.
+        Guarda el texto de cada línea de observaciones (sin la etiqueta); se
+        unen en `_construir_dict_info_pdf`.
 
         Args:
-            linea (str): Línea de texto a agregar a las observaciones.
+            list_observaciones (list): Líneas de observaciones del PDF.
         """
-        for linea in list_observaciones:
-            self.observaciones += linea.split(":", 1)[1].strip()
+        self.partes_observaciones.extend(
+            linea.split(":", 1)[1].strip() for linea in list_observaciones
+        )
 
     def _limpiar_cabecera(self) -> Dict[str, str]:
+        extendida = self.cabecera.extendida
         texto_comb = " ".join(
             [
-                self.cabecera_extendida.get("NIT", ""),
-                self.cabecera_extendida.get("proveedor", ""),
-                self.cabecera_extendida.get("contacto", ""),
-                self.cabecera_extendida.get("direccion", ""),
-                self.cabecera_extendida.get("ciudad", ""),
-                self.cabecera_extendida.get("telefono", ""),
-                
+                extendida.get("NIT", ""),
+                extendida.get("proveedor", ""),
+                extendida.get("contacto", ""),
+                extendida.get("direccion", ""),
+                extendida.get("ciudad", ""),
+                extendida.get("telefono", ""),
             ]
         )
 
         patron_campos = self.dict_claves.patrones_cabecera
 
         cabecera_limpia = {
-            "tipo_documento": self.cabecera.get("tipo_documento", ""),
-            "Número": self.cabecera.get("Número", ""),
-           
+            "tipo_documento": self.cabecera.tipo_documento,
+            "Número": self.cabecera.numero,
+            "fecha": self.cabecera.fecha,
         }
 
-        for clave, patron in patron_campos.as_dict.items():
-            match = re.search(patron, texto_comb)
+        for clave, patron in patron_campos:
+            match = patron.search(texto_comb)
             if match:
                 cabecera_limpia[clave] = (
                     match.group(1).strip() if match.group(1) else ""
@@ -252,7 +490,7 @@ class ProcesadorPDFNutresa:
         return {
             "cabecera": cabecera_limpia,
             "productos": self.productos,
-            "observaciones": self.observaciones.strip(),
+            "observaciones": "".join(self.partes_observaciones).strip(),
         }
 
     @staticmethod
@@ -263,10 +501,9 @@ class ProcesadorPDFNutresa:
             dict_info_pdf (dict): diccionario de donde se hace la extracción.
 
         Returns:
-            pd.Dataframe: DataFrame de productos convertido.
+            pd.Dataframe: DataFrame de productos convertido (por columnas).
         """
-        df_productos = pd.DataFrame(dict_info_pdf["productos"])
-        return df_productos
+        return dict_info_pdf["productos"].a_dataframe()
 
     def procesar(self) -> Dict[str, pd.DataFrame]:
         """
@@ -282,10 +519,77 @@ class ProcesadorPDFNutresa:
             Dict[str, pd.DataFrame]: Un diccionario con dos claves:
                 - "info_pdf": contiene la información estructurada del PDF.
                 - "df_productos": DataFrame con los productos extraídos.
+
+        Raises:
+            ErrorExtraccionPDF: Si no se pudo extraer texto del PDF.
         """
+        if self.texto is None:
+            raise ErrorExtraccionPDF(f"PDF sin texto extraíble: {self.pdf_path}")
+
         self._procesar_lineas()
         cabecera_limpia = self._limpiar_cabecera()
         dict_info_pdf = self._construir_dict_info_pdf(cabecera_limpia)
         df_productos = self._crear_df_productos(dict_info_pdf)
 
         return {"info_pdf": dict_info_pdf, "df_productos": df_productos}
+
+    @classmethod
+    def extraer(cls, pdf_path, dict_claves: Any, pdf=None, texto_primera: str | None = None,
+                cache_paginas=None) -> tuple:
+        """
+        Punto de entrada del registro de parsers (ver `extraer_factura`).
+        """
+        return extraer_factura(pdf_path, dict_claves, pdf=pdf, texto_primera=texto_primera,
+                               cache_paginas=cache_paginas)
+
+    @staticmethod
+    def firma_config(dict_claves: Any) -> dict:
+        """
+        Configuración que determina el resultado de este parser.
+        """
+        if not isinstance(dict_claves, ConfigClavesPDF):
+            dict_claves = ConfigClavesPDF.desde_dict(dict_claves.as_dict)
+        return asdict(dict_claves)
+
+
+def extraer_palabras_pagina(pagina) -> list:
+    """Palabras de la página (`extract_words`) con solo `CLAVES_PALABRA`."""
+    return [
+        {clave: palabra[clave] for clave in CLAVES_PALABRA}
+        for palabra in pagina.extract_words()
+    ]
+
+
+def extraer_factura(pdf_path: str | IO[bytes], dict_claves: Any, pdf=None,
+                    texto_primera: str | None = None, cache_paginas=None) -> tuple:
+    """
+    Procesa un PDF y retorna únicamente la información que necesita el cruce.
+
+    Es una función de módulo (no un método) para poder enviarse a un
+    `ProcessPoolExecutor`.
+
+    Args:
+        pdf_path (str | IO[bytes]): Ruta al PDF de la factura (en disco o
+            ruta virtual "<archivo.zip>::<miembro>") u objeto tipo archivo.
+        dict_claves (Any): Configuración `config_claves_pdf`.
+        pdf (pdfplumber.PDF, opcional): PDF ya abierto.
+        texto_primera (str, opcional): Texto ya extraído de la página 1.
+        cache_paginas (CachePaginas, opcional): Caché de extracción por página.
+
+    Returns:
+        tuple: (num_oficina, observación, df_productos, cabecera limpia)
+    """
+    dict_pdf_obser_prod = ProcesadorPDFNutresa(
+        pdf_path=pdf_path, dict_claves=dict_claves, pdf=pdf, texto_primera=texto_primera,
+        cache_paginas=cache_paginas,
+    ).procesar()
+
+    info_pdf = dict_pdf_obser_prod["info_pdf"]
+    num_oficina = info_pdf["cabecera"]["Número"][0:3]
+
+    return (
+        num_oficina,
+        info_pdf["observaciones"],
+        dict_pdf_obser_prod["df_productos"],
+        info_pdf["cabecera"],
+    )
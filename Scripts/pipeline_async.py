@@ -0,0 +1,199 @@
+# Importaciones de librerías estándar y externas.
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+import Scripts.registro_parsers as rp
+from Scripts.main import Run
+
+# Marca de fin de flujo entre etapas.
+FIN = None
+
+
+def _extraer_midiendo(origen, dict_claves, dir_cache_paginas: str | None) -> tuple:
+    """
+    Extrae la factura en el proceso trabajador y mide cuánto tardó.
+
+    Returns:
+        tuple: (segundos, proveedor, tupla_factura)
+    """
+    inicio = time.perf_counter()
+    proveedor, tupla_factura = rp.extraer_con_proveedor(origen, dict_claves, dir_cache_paginas)
+    return time.perf_counter() - inicio, proveedor, tupla_factura
+
+
+class RunAsync(Run):
+    """
+    Variante de `Run` que modela el proceso como etapas conectadas por colas
+    `asyncio.Queue` acotadas:
+
+        descubrimiento -> extracción -> cruce -> escritura -> reportes
+
+    - El descubrimiento de archivos y el reporte de EAN faltantes corren en el
+      event loop.
+    - La extracción con pdfplumber corre en un `ProcessPoolExecutor` y el
+      guardado con openpyxl en un `ThreadPoolExecutor` de un solo hilo.
+    - Las colas son acotadas (`config_pipeline.tam_cola`): si la escritura es
+      lenta, las etapas anteriores se bloquean en `put` y no se acumulan
+      facturas parseadas en memoria.
+
+    La profundidad de cada cola se registra en `self.metricas`.
+    """
+
+    def main(self):
+        """
+        Ejecuta el pipeline asíncrono completo.
+        """
+        asyncio.run(self.main_async())
+
+    async def main_async(self):
+        """
+        Crea las colas, lanza las etapas y espera a que terminen.
+        """
+        tam_cola = self.config_pipeline.tam_cola
+        n_extractores = self.config_pipeline.workers_extraccion
+
+        q_rutas = asyncio.Queue(maxsize=tam_cola)
+        q_parseadas = asyncio.Queue(maxsize=tam_cola)
+        q_escritura = asyncio.Queue(maxsize=tam_cola)
+
+        loop = asyncio.get_running_loop()
+
+        with ProcessPoolExecutor(max_workers=n_extractores) as pool_extraccion, \
+                ThreadPoolExecutor(max_workers=1) as pool_escritura:
+
+            # Las maestras se cargan en segundo plano mientras arranca la extracción.
+            futuro_maestras = asyncio.wrap_future(self.precargar_maestras())
+
+            extractores = [
+                self._etapa_extraccion(loop, pool_extraccion, q_rutas, q_parseadas)
+                for _ in range(n_extractores)
+            ]
+            resultados = await asyncio.gather(
+                self._etapa_descubrimiento(q_rutas, n_extractores),
+                self._esperar_extractores(extractores, q_parseadas),
+                self._etapa_cruce(futuro_maestras, q_parseadas, q_escritura),
+                self._etapa_escritura(loop, pool_escritura, futuro_maestras, q_escritura),
+            )
+
+            list_path_pdfs = resultados[0]
+            list_ean_unicos_fac, faltantes_por_factura = resultados[-1]
+            maestras = await futuro_maestras
+
+            with self.metricas.medir("reportes"):
+                await loop.run_in_executor(
+                    pool_escritura, self.escribir_duplicados, maestras, list_ean_unicos_fac
+                )
+                # Escritura pequeña de texto: se hace directamente en el event loop.
+                self.escribir_faltantes(faltantes_por_factura)
+                await loop.run_in_executor(pool_escritura, self.escribir_lineas)
+                await loop.run_in_executor(pool_escritura, self.escribir_consolidado, maestras)
+                self.guardar_manifiesto_salidas(list_path_pdfs)
+
+        self.metricas.log_resumen()
+
+    async def _poner(self, cola: asyncio.Queue, nombre: str, elemento):
+        """
+        Inserta en la cola (bloquea si está llena) y muestrea su profundidad.
+        """
+        await cola.put(elemento)
+        self.metricas.registrar_profundidad(nombre, cola.qsize())
+
+    async def _etapa_descubrimiento(self, q_rutas: asyncio.Queue, n_extractores: int) -> list:
+        """
+        Publica las rutas de los PDF y una marca de fin por extractor.
+
+        Returns:
+            list: Rutas publicadas, en orden de descubrimiento.
+        """
+        rutas = []
+        for indice, ruta in enumerate(self.iterar_pdfs()):
+            rutas.append(ruta)
+            await self._poner(q_rutas, "rutas", (indice, ruta))
+        for _ in range(n_extractores):
+            await q_rutas.put(FIN)
+        return rutas
+
+    async def _etapa_extraccion(self, loop, pool, q_rutas, q_parseadas):
+        """
+        Extrae cada PDF en el pool de procesos y publica la tupla resultante.
+        Usa la misma caché de extracción por hash que el modo secuencial: la
+        consulta y el guardado se hacen aquí y solo los PDF nuevos van al pool.
+
+        El tiempo de "extraccion" se mide dentro del trabajador y se suma,
+        como en el modo secuencial: no incluye la espera en el pool, y con
+        varios trabajadores puede superar el tiempo de reloj.
+        """
+        while True:
+            elemento = await q_rutas.get()
+            if elemento is FIN:
+                return
+            indice, ruta = elemento
+            origen, hash_pdf = await loop.run_in_executor(None, self.origen_pdf, ruta)
+            tupla_factura = self.extraccion_cacheada(hash_pdf)
+            if tupla_factura is None:
+                segundos, proveedor, tupla_factura = await loop.run_in_executor(
+                    pool, _extraer_midiendo, origen, self.dict_claves, self.paths_cache.paginas
+                )
+                self.metricas.sumar_tiempo("extraccion", segundos)
+                self.guardar_extraccion(hash_pdf, proveedor, tupla_factura)
+            await self._poner(q_parseadas, "parseadas", (indice, ruta, tupla_factura))
+
+    async def _esperar_extractores(self, extractores: list, q_parseadas):
+        """
+        Espera a todos los extractores y cierra la cola de parseadas.
+        """
+        await asyncio.gather(*extractores)
+        await q_parseadas.put(FIN)
+
+    async def _etapa_cruce(self, futuro_maestras, q_parseadas, q_escritura):
+        """
+        Cruza cada factura contra las maestras (espera a que terminen de cargar).
+        """
+        maestras = await futuro_maestras
+        while True:
+            elemento = await q_parseadas.get()
+            if elemento is FIN:
+                await q_escritura.put(FIN)
+                return
+            indice, ruta, tupla_factura = elemento
+            with self.contexto_factura(ruta), self.metricas.medir("cruce"):
+                cruce = self.cruzar_factura(tupla_factura, maestras)
+            await self._poner(q_escritura, "escritura", (indice, ruta, cruce))
+
+    async def _etapa_escritura(self, loop, pool, futuro_maestras, q_escritura) -> tuple:
+        """
+        Guarda cada plantilla en el hilo de escritura y acumula los datos de
+        los reportes. Los faltantes se ordenan por el orden de descubrimiento
+        para que el reporte no dependa del orden de terminación.
+
+        Returns:
+            tuple: (list_ean_unicos_fac, faltantes_por_factura)
+        """
+        maestras = await futuro_maestras
+        list_ean_unicos_fac = []
+        faltantes_por_indice = {}
+
+        while True:
+            elemento = await q_escritura.get()
+            if elemento is FIN:
+                break
+            indice, ruta, cruce = elemento
+            list_ean_unicos_fac += cruce["eans_factura"]
+            faltantes_por_indice[indice] = (ruta, self.formatear_faltantes(cruce))
+
+            # run_in_executor no copia el contexto: se pasa explícitamente para
+            # que los logs del hilo de escritura lleven la factura.
+            with self.contexto_factura(ruta), self.metricas.medir("escritura"):
+                contexto = contextvars.copy_context()
+                await loop.run_in_executor(
+                    pool, contexto.run, self.escribir_plantilla, cruce, maestras, ruta)
+            self.acumular_lineas(cruce)
+            self.metricas.incrementar("facturas_escritas")
+
+        faltantes_por_factura = [faltantes_por_indice[i] for i in sorted(faltantes_por_indice)]
+        logger.info(f"Pipeline async: {self.metricas.contadores['facturas_escritas']} facturas escritas")
+        return list_ean_unicos_fac, faltantes_por_factura
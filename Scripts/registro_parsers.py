@@ -0,0 +1,173 @@
+# Importaciones de librerías estándar y externas.
+import re
+import importlib
+import pdfplumber
+from typing import IO, Any
+from loguru import logger
+from pdfminer.pdfparser import PDFSyntaxError
+
+# Importaciones de módulos específicos del proyecto.
+from Utils.archivos_comprimidos import abrir_entrada
+from Utils.cache_paginas import CachePaginas
+from Utils.config_logger import detalle_activo
+
+# Módulos que registran parsers al importarse (con `@registrar_parser`). Se
+# importan en el primer despacho para evitar importaciones circulares.
+MODULOS_PARSERS = ("Scripts.nutresa_pdf_parser",)
+
+# Todos los documentos de devolución comparten el formato del comprador; el
+# proveedor se distingue por su NIT en la línea "Proveedor:" de la página 1.
+PATRON_NIT_PROVEEDOR = re.compile(r"Proveedor:\s*(\d{9,10}-\d)")
+
+PARSERS = {}  # proveedor -> clase del parser
+_NITS = {}  # NIT -> proveedor
+
+
+class ErrorExtraccionPDF(Exception):
+    """El PDF no se pudo leer o no contiene texto extraíble."""
+
+
+class ProveedorNoReconocido(ErrorExtraccionPDF):
+    """La página 1 no trae el NIT de ningún proveedor registrado."""
+
+
+def registrar_parser(clase):
+    """
+    Decorador que registra un parser de proveedor. La clase debe declarar:
+
+    - `PROVEEDOR` (str): Nombre corto, se guarda con cada extracción cacheada.
+    - `NITS_PROVEEDOR` (tuple): NIT(s) del proveedor ("900341086-0").
+    - `VERSION` (int): Se incrementa al cambiar la salida del parser; invalida
+      solo las extracciones cacheadas de ese proveedor.
+    - `extraer(pdf_path, dict_claves, pdf, texto_primera, cache_paginas) -> tuple`
+      y `firma_config(dict_claves) -> dict` (classmethods).
+
+    Raises:
+        ValueError: Si un NIT ya está registrado por otro proveedor.
+    """
+    for nit in clase.NITS_PROVEEDOR:
+        anterior = _NITS.get(nit)
+        if anterior is not None and anterior != clase.PROVEEDOR:
+            raise ValueError(f"NIT {nit} ya registrado para el proveedor '{anterior}'")
+        _NITS[nit] = clase.PROVEEDOR
+    PARSERS[clase.PROVEEDOR] = clase
+    return clase
+
+
+def cargar_parsers() -> dict:
+    """
+    Importa los módulos de `MODULOS_PARSERS` (una vez) y retorna el registro.
+    """
+    if not PARSERS:
+        for modulo in MODULOS_PARSERS:
+            importlib.import_module(modulo)
+    return PARSERS
+
+
+def identificar_proveedor(texto_primera: str) -> str:
+    """
+    Retorna el proveedor a partir del texto de la página 1: una búsqueda del
+    NIT y una consulta al diccionario, sin probar cada parser.
+
+    Raises:
+        ProveedorNoReconocido: Si no hay NIT o no corresponde a un parser.
+    """
+    cargar_parsers()
+    match = PATRON_NIT_PROVEEDOR.search(texto_primera)
+    if match is None:
+        raise ProveedorNoReconocido("No se encontró el NIT del proveedor en la página 1")
+    proveedor = _NITS.get(match.group(1))
+    if proveedor is None:
+        raise ProveedorNoReconocido(f"Proveedor sin parser registrado (NIT {match.group(1)})")
+    return proveedor
+
+
+def firma_proveedor(proveedor: str, dict_claves: Any) -> dict | None:
+    """
+    Firma de la extracción de un proveedor: si cambia, sus extracciones
+    cacheadas dejan de ser válidas (las de otros proveedores no). Retorna None
+    si el proveedor ya no está registrado.
+    """
+    clase = cargar_parsers().get(proveedor)
+    if clase is None:
+        return None
+    return {
+        "proveedor": proveedor,
+        "version_parser": clase.VERSION,
+        "config": clase.firma_config(dict_claves),
+    }
+
+
+def extraer_texto_pagina(pagina) -> str:
+    """Texto de una página con `extract_text`."""
+    return pagina.extract_text()
+
+
+def extraer_con_proveedor(pdf_path: str | IO[bytes], dict_claves: Any,
+                          dir_cache_paginas: str | None = None) -> tuple:
+    """
+    Abre el PDF una sola vez, extrae el texto de la página 1, elige el parser
+    por el NIT del proveedor y le entrega el PDF abierto y ese texto para que
+    no lo vuelva a extraer.
+
+    Args:
+        pdf_path (str | IO[bytes]): Ruta al PDF (en disco o ruta virtual
+            "<archivo.zip>::<miembro>") u objeto tipo archivo.
+        dict_claves (Any): Configuración `config_claves_pdf`.
+        dir_cache_paginas (str, opcional): Carpeta de la caché por página
+            (`paths_cache.paginas`); las páginas ya extraídas con el mismo
+            contenido no se vuelven a leer con pdfplumber.
+
+    Returns:
+        tuple: (proveedor, (num_oficina, observación, df_productos, cabecera))
+
+    Raises:
+        ErrorExtraccionPDF: Si el PDF no se puede abrir, no tiene texto o el
+            proveedor no está registrado.
+    """
+    try:
+        pdf = pdfplumber.open(abrir_entrada(pdf_path))
+    except FileNotFoundError:
+        raise ErrorExtraccionPDF(f"Archivo no encontrado - {pdf_path}")
+    except MemoryError:
+        # Se propaga para que el modo aislado lo reporte como límite de memoria.
+        raise
+    except PDFSyntaxError as e:
+        raise ErrorExtraccionPDF(f"Error en formato PDF: {str(e)}")
+    except Exception as e:
+        raise ErrorExtraccionPDF(f"Error inesperado: {str(e)}")
+
+    cache_paginas = CachePaginas(dir_cache_paginas) if dir_cache_paginas else None
+    with pdf:
+        texto_primera = None
+        if pdf.pages:
+            texto_primera = (
+                cache_paginas.obtener(pdf.pages[0], "texto", extraer_texto_pagina)
+                if cache_paginas is not None else extraer_texto_pagina(pdf.pages[0])
+            )
+        if not texto_primera:
+            raise ErrorExtraccionPDF(f"PDF sin texto extraíble: {pdf_path}")
+        proveedor = identificar_proveedor(texto_primera)
+        tupla_factura = PARSERS[proveedor].extraer(
+            pdf_path, dict_claves, pdf=pdf, texto_primera=texto_primera,
+            cache_paginas=cache_paginas,
+        )
+    if cache_paginas is not None and detalle_activo():
+        logger.debug(
+            f"Caché de páginas: {cache_paginas.aciertos} reutilizadas, "
+            f"{cache_paginas.extraidas} extraídas"
+        )
+    return proveedor, tupla_factura
+
+
+def extraer_factura(pdf_path: str | IO[bytes], dict_claves: Any,
+                    dir_cache_paginas: str | None = None) -> tuple:
+    """
+    Igual que `extraer_con_proveedor`, pero retorna solo la tupla de la
+    factura. Es una función de módulo para poder enviarse a un
+    `ProcessPoolExecutor`.
+
+    Returns:
+        tuple: (num_oficina, observación, df_productos, cabecera limpia)
+    """
+    return extraer_con_proveedor(pdf_path, dict_claves, dir_cache_paginas)[1]
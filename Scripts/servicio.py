@@ -0,0 +1,216 @@
+# Importaciones de librerías estándar y externas.
+import os
+import json
+import time
+import signal
+import hashlib
+import threading
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loguru import logger
+
+# Importaciones de módulos específicos del proyecto.
+from Scripts.main import Run
+from Scripts.registro_parsers import ErrorExtraccionPDF
+from Utils.config_logger import detalle_activo
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class RunServicio(Run):
+    """
+    Variante de `Run` residente: carga una sola vez la configuración, los
+    índices de las maestras y la plantilla base, y procesa facturas bajo
+    demanda sin pagar de nuevo el arranque (imports, YAML, lectura de Excel).
+
+    Antes de cada factura compara la firma de los insumos (tamaño y fecha de
+    las maestras y la plantilla): si alguno cambió, recarga las maestras
+    (desde la caché o con la actualización incremental del índice).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.maestras = None
+        self.firma = None
+        # Las peticiones llegan en hilos; el procesamiento es de a una factura
+        # porque la plantilla base y el estado de las maestras son compartidos.
+        self.candado = threading.Lock()
+
+    def maestras_vigentes(self, forzar: bool = False) -> dict:
+        """
+        Retorna las maestras en memoria, recargándolas si cambiaron sus archivos.
+
+        Args:
+            forzar (bool): Recargar aunque la firma no haya cambiado.
+        """
+        firma = self.firma_insumos()
+        if forzar or firma != self.firma:
+            accion = "Cargando" if self.maestras is None else "Recargando"
+            logger.info(f"{accion} maestras y plantilla base")
+            with self.metricas.medir("carga_maestras"):
+                self.maestras = self.cargar_maestras()
+            self.firma = firma
+            self.metricas.incrementar("recargas_maestras")
+        return self.maestras
+
+    def procesar_pdf(self, datos: bytes, escribir: bool = True) -> tuple:
+        """
+        Extrae, cruza y genera la plantilla de devolución de un PDF recibido
+        en memoria.
+
+        Args:
+            datos (bytes): Contenido del PDF.
+            escribir (bool): Guardar el libro en `paths_resultados.plantillas`
+                (True) o solo retornarlo en bytes (False).
+
+        Returns:
+            tuple: (resumen, bytes del libro o None si se escribió en disco)
+        """
+        inicio = time.perf_counter()
+        hash_pdf = hashlib.sha256(datos).hexdigest()
+        with self.candado, logger.contextualize(factura=f"sha256:{hash_pdf[:12]}"):
+            maestras = self.maestras_vigentes()
+            with self.metricas.medir("extraccion"):
+                tupla_factura = self.extraer_con_cache(BytesIO(datos), hash_pdf)
+            with self.metricas.medir("cruce"):
+                cruce = self.cruzar_factura(tupla_factura, maestras)
+            with self.metricas.medir("escritura"):
+                if escribir:
+                    ruta_salida = self.escribir_plantilla(cruce, maestras)
+                    contenido = None
+                else:
+                    plantilla = self.preparar_plantilla(cruce, maestras)
+                    ruta_salida = plantilla.ruta_salida
+                    contenido = plantilla.a_bytes()
+            if escribir:
+                self.acumular_lineas(cruce)
+            self.metricas.incrementar("facturas_escritas")
+
+        resumen = {
+            "salida": ruta_salida,
+            "escrita": escribir,
+            "num_oficina": cruce["num_oficina"],
+            "faltantes": self.formatear_faltantes(cruce),
+            "duracion_ms": round(1000 * (time.perf_counter() - inicio), 1),
+        }
+        return resumen, contenido
+
+    def estado(self) -> dict:
+        """
+        Resumen del servicio para `GET /estado`.
+        """
+        return {
+            "maestras_cargadas": self.maestras is not None,
+            "contadores": dict(self.metricas.contadores),
+            "tiempos_s": {k: round(v, 3) for k, v in self.metricas.tiempos.items()},
+        }
+
+    def servir(self, host: str | None = None, puerto: int | None = None):
+        """
+        Carga las maestras y atiende peticiones HTTP hasta Ctrl+C (o SIGTERM). Al terminar
+        anexa al dataset las líneas de las facturas escritas.
+
+        Endpoints:
+            POST /facturas   Cuerpo: el PDF. `?formato=xlsx` retorna el libro
+                             en lugar de escribirlo en disco.
+            POST /recargar   Fuerza la recarga de maestras y plantilla.
+            GET  /estado     Contadores y tiempos acumulados.
+        """
+        config = self.config.config_servicio
+        host = host or config.host
+        puerto = puerto or config.puerto
+
+        self.maestras_vigentes()
+        servidor = ThreadingHTTPServer((host, puerto), _crear_manejador(self))
+        signal.signal(signal.SIGTERM, _detener)
+        logger.success(f"Servicio de facturas en http://{host}:{puerto}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Servicio detenido.")
+        finally:
+            servidor.server_close()
+            self.escribir_lineas()
+            if self.maestras is not None:
+                self.escribir_consolidado(self.maestras)
+            self.guardar_manifiesto_salidas()
+            self.metricas.log_resumen()
+
+
+def _detener(signum, frame):
+    """Trata SIGTERM como Ctrl+C para cerrar el servicio de forma ordenada."""
+    raise KeyboardInterrupt
+
+
+def _crear_manejador(servicio: RunServicio):
+    """
+    Crea la clase manejadora de peticiones ligada a `servicio`.
+    """
+
+    class ManejadorFacturas(BaseHTTPRequestHandler):
+
+        def _responder(self, codigo: int, cuerpo: bytes, tipo: str, extra: dict | None = None):
+            self.send_response(codigo)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            for clave, valor in (extra or {}).items():
+                self.send_header(clave, valor)
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _responder_json(self, codigo: int, datos: dict):
+            cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+            self._responder(codigo, cuerpo, "application/json; charset=utf-8")
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/estado":
+                self._responder_json(200, servicio.estado())
+            else:
+                self._responder_json(404, {"error": f"Ruta desconocida: {self.path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path == "/recargar":
+                with servicio.candado:
+                    servicio.maestras_vigentes(forzar=True)
+                self._responder_json(200, servicio.estado())
+                return
+            if url.path != "/facturas":
+                self._responder_json(404, {"error": f"Ruta desconocida: {self.path}"})
+                return
+
+            largo = int(self.headers.get("Content-Length", 0))
+            if not largo:
+                self._responder_json(400, {"error": "El cuerpo debe ser el PDF de la factura."})
+                return
+            datos = self.rfile.read(largo)
+            como_xlsx = parse_qs(url.query).get("formato", [""])[0] == "xlsx"
+
+            try:
+                resumen, contenido = servicio.procesar_pdf(datos, escribir=not como_xlsx)
+            except ErrorExtraccionPDF as e:
+                self._responder_json(422, {"error": f"PDF ilegible: {e}"})
+                return
+            except KeyError as e:
+                self._responder_json(422, {"error": f"Oficina sin nombre en la maestra de tiendas: {e}"})
+                return
+            except Exception as e:
+                logger.exception("Error procesando factura")
+                self._responder_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+
+            logger.info(f"Factura {resumen['num_oficina']} en {resumen['duracion_ms']} ms")
+            if como_xlsx:
+                nombre = os.path.basename(resumen["salida"])
+                self._responder(200, contenido, TIPO_XLSX, {
+                    "Content-Disposition": f"attachment; filename*=UTF-8''{quote(nombre)}",
+                })
+            else:
+                self._responder_json(200, resumen)
+
+        def log_message(self, formato, *args):
+            if detalle_activo():
+                logger.debug(f"{self.address_string()} {formato % args}")
+
+    return ManejadorFacturas
@@ -0,0 +1,124 @@
+# Importaciones de librerías estándar y externas.
+import os
+import pandas as pd
+
+SEPARADOR_PARCIAL = "\t"
+
+
+def parsear_shard(texto: str) -> tuple:
+    """
+    Convierte "i/N" en la tupla (i, N), con 0 <= i < N.
+
+    Args:
+        texto (str): Shard en formato "i/N" (índice base 0).
+
+    Returns:
+        tuple: (i, N)
+
+    Raises:
+        ValueError: Si el formato o los valores no son válidos.
+    """
+    try:
+        indice, total = (int(parte) for parte in texto.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{texto}': use el formato i/N, ej. 0/4")
+    if total < 1 or not 0 <= indice < total:
+        raise ValueError(f"Shard inválido '{texto}': se requiere 0 <= i < N")
+    return indice, total
+
+
+def ruta_parcial(ruta: str, shard: tuple) -> str:
+    """
+    Ruta de la salida parcial de un shard.
+
+    Ejemplo:
+        >>> ruta_parcial("Plantilla_Resultado/materiales_duplicados.xlsx", (1, 4))
+        'Plantilla_Resultado/materiales_duplicados.shard-1-de-4.xlsx'
+    """
+    base, extension = os.path.splitext(ruta)
+    return f"{base}.shard-{shard[0]}-de-{shard[1]}{extension}"
+
+
+def escribir_faltantes_parcial(ruta: str, faltantes_por_factura: list):
+    """
+    Escribe los faltantes de un shard como "ruta_pdf<TAB>oficina<TAB>ean<TAB>
+    descripcion", una línea por ocurrencia, para que la fusión pueda
+    restituir el orden y los conteos de una ejecución en un solo nodo.
+
+    Args:
+        ruta (str): Ruta del archivo parcial.
+        faltantes_por_factura (list): Tuplas (ruta_pdf, registros).
+    """
+    lineas = [
+        SEPARADOR_PARCIAL.join(
+            [ruta_pdf, oficina, ean, descripcion.replace(SEPARADOR_PARCIAL, " ")]) + "\n"
+        for ruta_pdf, registros in faltantes_por_factura
+        for oficina, ean, descripcion in registros
+    ]
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("".join(lineas))
+
+
+def fusionar_shards(ruta_faltantes: str, ruta_duplicados: str, total: int,
+                     col_orden: str = "EAN_UN", posiciones: dict | None = None) -> tuple:
+    """
+    Combina las salidas parciales de los `total` shards en los mismos datos
+    que produce una ejecución en un solo nodo:
+
+    - Faltantes: se ordenan de forma estable por la posición de cada PDF en
+      `posiciones` (el orden de `descubrir_archivos`) o, sin ella, por ruta
+      del PDF, y se retornan para que `Run` escriba el reporte
+      en el formato configurado.
+    - Duplicados: se concatenan, se eliminan filas repetidas entre shards y se
+      ordenan de forma estable por `col_orden`, igual que el índice de
+      duplicados; `Run` los escribe en `ruta_duplicados`.
+
+    Args:
+        ruta_faltantes (str): Ruta final del reporte de EAN faltantes.
+        ruta_duplicados (str): Ruta final de materiales duplicados.
+        total (int): Número de shards (N).
+        col_orden (str): Columna de orden de los duplicados.
+        posiciones (dict, opcional): {ruta_pdf: posición} del descubrimiento
+            sin shards. Las rutas que no aparecen van al final, por ruta.
+
+    Returns:
+        tuple: (faltantes: tuplas (ruta_pdf, registros) en orden, DataFrame de
+            duplicados)
+
+    Raises:
+        FileNotFoundError: Si falta la salida parcial de algún shard.
+    """
+    shards = [(indice, total) for indice in range(total)]
+    parciales_faltantes = [ruta_parcial(ruta_faltantes, shard) for shard in shards]
+    parciales_duplicados = [ruta_parcial(ruta_duplicados, shard) for shard in shards]
+
+    ausentes = [
+        ruta for ruta in parciales_faltantes + parciales_duplicados if not os.path.exists(ruta)
+    ]
+    if ausentes:
+        raise FileNotFoundError(f"Faltan salidas parciales de shards: {ausentes}")
+
+    registros = []
+    for ruta in parciales_faltantes:
+        with open(ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                ruta_pdf, *registro = linea.rstrip("\n").split(SEPARADOR_PARCIAL)
+                registros.append((ruta_pdf, registro))
+    # sorted es estable: dentro de un mismo PDF se conserva el orden original.
+    if posiciones is None:
+        registros.sort(key=lambda registro: registro[0])
+    else:
+        registros.sort(key=lambda registro: (posiciones.get(registro[0], len(posiciones)), registro[0]))
+    faltantes_por_factura = {}
+    for ruta_pdf, registro in registros:
+        faltantes_por_factura.setdefault(ruta_pdf, []).append(registro)
+
+    df_duplicados = pd.concat(
+        [pd.read_excel(ruta, dtype=str, engine="openpyxl") for ruta in parciales_duplicados],
+        ignore_index=True,
+    )
+    df_duplicados = df_duplicados.drop_duplicates().sort_values(by=col_orden, kind="mergesort")
+
+    return list(faltantes_por_factura.items()), df_duplicados
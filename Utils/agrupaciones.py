@@ -0,0 +1,99 @@
+## Diccionarios y agrupaciones a partir de columnas de un DataFrame (vectorizados)
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+def _validar_columnas(df: pd.DataFrame, *columnas: str):
+    """
+    Raises:
+        ValueError: Si alguna columna no existe en el DataFrame.
+    """
+    if any(col not in df.columns for col in columnas):
+        logger.critical("Error: Las columnas especificadas no existen en el DataFrame.")
+        raise ValueError("Las columnas especificadas no existen en el DataFrame.")
+
+
+def mapear_columnas(df: pd.DataFrame, col_clave: str, col_valor: str) -> dict:
+    """
+    Crea el diccionario {valor de `col_clave`: valor de `col_valor`}. Si una
+    clave se repite, queda el valor de su última fila.
+
+    Si `col_clave` y `col_valor` son la misma columna, las claves son el
+    índice del DataFrame.
+
+    Args:
+        df (pd.DataFrame): El DataFrame de entrada.
+        col_clave (str): Columna de las claves.
+        col_valor (str): Columna de los valores.
+
+    Returns:
+        dict: Diccionario clave -> valor.
+
+    Raises:
+        ValueError: Si alguna de las columnas no existe.
+    """
+    _validar_columnas(df, col_clave, col_valor)
+    if col_clave == col_valor:
+        return df[col_clave].to_dict()
+    # zip de dos listas nativas: sin construir un índice intermedio.
+    return dict(zip(df[col_clave].tolist(), df[col_valor].tolist()))
+
+
+def agrupar_valores_unicos(df: pd.DataFrame, col_clave: str, col_valores: str) -> dict:
+    """
+    Crea el diccionario {clave: [valores únicos de `col_valores`]} con las
+    claves y los valores en orden de primera aparición.
+
+    Se eliminan los pares (clave, valor) repetidos, se factorizan las claves
+    y los valores se reparten por grupo con un solo ordenamiento estable, en
+    lugar de filtrar el DataFrame completo por cada clave (O(n·k)).
+    Como el filtro por igualdad del helper anterior
+    (`crear_dict_col_llave_col_valores`), una clave nula queda con lista vacía.
+
+    Args:
+        df (pd.DataFrame): El DataFrame de entrada.
+        col_clave (str): Columna de las claves.
+        col_valores (str): Columna de los valores.
+
+    Returns:
+        dict: Diccionario clave -> lista de valores únicos.
+
+    Raises:
+        ValueError: Si alguna de las columnas no existe.
+    """
+    _validar_columnas(df, col_clave, col_valores)
+    pares = df[[col_clave, col_valores]].drop_duplicates()
+    codigos, claves = pd.factorize(pares[col_clave], use_na_sentinel=False)
+
+    orden = codigos.argsort(kind="stable")
+    valores = pares[col_valores].iloc[orden].tolist()
+    limites = np.bincount(codigos, minlength=len(claves)).cumsum().tolist()
+
+    resultado = {}
+    inicio = 0
+    for clave, fin in zip(claves.tolist(), limites):
+        resultado[clave] = [] if pd.isna(clave) else valores[inicio:fin]
+        inicio = fin
+    return resultado
+
+
+def concatenar_columnas(df: pd.DataFrame, columnas: list, separador: str = "_") -> pd.Series:
+    """
+    Une como texto los valores de `columnas` de cada fila, con `separador`.
+    Equivale a `df[columnas].astype(str).agg(separador.join, axis=1)` pero
+    opera por columnas en lugar de llamar una función por fila.
+
+    Args:
+        df (pd.DataFrame): El DataFrame de entrada.
+        columnas (list): Columnas a unir, en orden.
+        separador (str): Texto entre valores.
+
+    Returns:
+        pd.Series: Serie de texto con el mismo índice que `df`.
+    """
+    _validar_columnas(df, *columnas)
+    resultado = df[columnas[0]].astype(str)
+    for col in columnas[1:]:
+        resultado = resultado + separador + df[col].astype(str)
+    return resultado
@@ -0,0 +1,190 @@
+## Lectura de facturas dentro de archivos .zip / .tar sin extraerlas a disco
+import io
+import os
+import time
+import hashlib
+import tarfile
+import zipfile
+import threading
+
+# Una factura dentro de un archivo se identifica con la "ruta virtual"
+# "<ruta del archivo>::<nombre del miembro>", ej. "Insumos/lote_marzo.zip::marzo/123.pdf".
+SEPARADOR_MIEMBRO = "::"
+
+EXTENSIONES_ZIP = (".zip",)
+EXTENSIONES_TAR = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def es_archivo_comprimido(ruta: str) -> bool:
+    """
+    Indica si `ruta` tiene extensión de archivo .zip o .tar (comprimido o no).
+    """
+    ruta = ruta.lower()
+    return ruta.endswith(EXTENSIONES_ZIP + EXTENSIONES_TAR)
+
+
+def es_ruta_miembro(ruta) -> bool:
+    """
+    Indica si `ruta` es una ruta virtual a un miembro de un archivo.
+    """
+    return isinstance(ruta, str) and SEPARADOR_MIEMBRO in ruta
+
+
+def ruta_miembro(ruta_archivo: str, nombre_miembro: str) -> str:
+    """
+    Construye la ruta virtual de un miembro.
+    """
+    return f"{ruta_archivo}{SEPARADOR_MIEMBRO}{nombre_miembro}"
+
+
+def separar_ruta_miembro(ruta: str) -> tuple:
+    """
+    Retorna (ruta del archivo, nombre del miembro) de una ruta virtual.
+    """
+    ruta_archivo, nombre_miembro = ruta.split(SEPARADOR_MIEMBRO, 1)
+    return ruta_archivo, nombre_miembro
+
+
+# Contenedores abiertos por ruta, con la firma (tamaño, mtime) del archivo al
+# abrirlo y el índice de sus miembros. Si el archivo se reemplaza (modo
+# vigilancia), la firma cambia y se vuelve a abrir.
+MAX_CONTENEDORES_ABIERTOS = 4
+_contenedores = {}
+_candado_contenedores = threading.Lock()
+
+
+def _es_tar_comprimido(ruta_archivo: str) -> bool:
+    """
+    Indica si `ruta_archivo` es un .tar comprimido (gzip, bz2, xz): sus
+    miembros solo se leen sin costo extra en el orden del flujo.
+    """
+    ruta = ruta_archivo.lower()
+    return ruta.endswith(EXTENSIONES_TAR) and not ruta.endswith(".tar")
+
+
+def _contenedor(ruta_archivo: str) -> dict:
+    """
+    Retorna la entrada {"firma", "contenedor", "miembros"} del archivo .zip o
+    .tar, abriéndolo si aún no está abierto o si cambió desde que se abrió.
+    """
+    stat = os.stat(ruta_archivo)
+    firma = (stat.st_size, stat.st_mtime_ns)
+    with _candado_contenedores:
+        entrada = _contenedores.get(ruta_archivo)
+        if entrada is not None and entrada["firma"] == firma:
+            return entrada
+        if entrada is not None:
+            _contenedores.pop(ruta_archivo)["contenedor"].close()
+        while len(_contenedores) >= MAX_CONTENEDORES_ABIERTOS:
+            _contenedores.pop(next(iter(_contenedores)))["contenedor"].close()
+
+        if ruta_archivo.lower().endswith(EXTENSIONES_ZIP):
+            contenedor = zipfile.ZipFile(ruta_archivo)
+        else:
+            contenedor = tarfile.open(ruta_archivo, "r:*")
+        entrada = {"firma": firma, "contenedor": contenedor, "miembros": None}
+        _contenedores[ruta_archivo] = entrada
+        return entrada
+
+
+def _abrir_contenedor(ruta_archivo: str):
+    """
+    Retorna el .zip o .tar abierto. El índice de miembros se lee al abrir y
+    se reutiliza en cada lectura mientras el archivo no cambie.
+    """
+    return _contenedor(ruta_archivo)["contenedor"]
+
+
+# Un proceso hijo creado con fork hereda el descriptor (y su posición) del
+# padre: lecturas concurrentes en ambos procesos se mezclarían, así que el hijo
+# vuelve a abrir el contenedor.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_contenedores.clear)
+
+
+def miembros_contenedor(ruta_archivo: str) -> dict:
+    """
+    Retorna {nombre_miembro: (tamaño en bytes, mtime)} de los archivos (no
+    carpetas) del contenedor, construido en una sola pasada por cada versión
+    del archivo.
+
+    El orden es el de los nombres, salvo en los .tar comprimidos, donde es el
+    del flujo: leerlos por nombre obligaría a retroceder y descomprimir el
+    flujo de nuevo desde el inicio por cada miembro.
+
+    Args:
+        ruta_archivo (str): Ruta del .zip o .tar.
+    """
+    entrada = _contenedor(ruta_archivo)
+    if entrada["miembros"] is None:
+        contenedor = entrada["contenedor"]
+        if isinstance(contenedor, zipfile.ZipFile):
+            miembros = [
+                (info.filename, info.file_size, time.mktime(info.date_time + (0, 0, -1)))
+                for info in contenedor.infolist()
+                if not info.is_dir()
+            ]
+        else:
+            miembros = [
+                (info.name, info.size, float(info.mtime))
+                for info in contenedor.getmembers()
+                if info.isfile()
+            ]
+        if not _es_tar_comprimido(ruta_archivo):
+            miembros.sort()
+        entrada["miembros"] = {nombre: (tam, mtime) for nombre, tam, mtime in miembros}
+    return entrada["miembros"]
+
+
+def iterar_miembros(ruta_archivo: str):
+    """
+    Produce los archivos (no carpetas) del contenedor, en el orden de
+    `miembros_contenedor`.
+
+    Args:
+        ruta_archivo (str): Ruta del .zip o .tar.
+
+    Yields:
+        tuple: (nombre_miembro, tamaño en bytes, mtime)
+    """
+    for nombre, (tam, mtime) in miembros_contenedor(ruta_archivo).items():
+        yield nombre, tam, mtime
+
+
+def leer_miembro(ruta: str) -> bytes:
+    """
+    Lee en memoria el contenido de un miembro a partir de su ruta virtual.
+
+    Raises:
+        KeyError: Si el miembro no existe en el archivo.
+    """
+    ruta_archivo, nombre_miembro = separar_ruta_miembro(ruta)
+    contenedor = _abrir_contenedor(ruta_archivo)
+    if isinstance(contenedor, zipfile.ZipFile):
+        return contenedor.read(nombre_miembro)
+    archivo = contenedor.extractfile(nombre_miembro)
+    if archivo is None:
+        raise KeyError(f"{nombre_miembro} no es un archivo regular en {ruta_archivo}")
+    return archivo.read()
+
+
+def cargar_miembro(ruta: str) -> tuple:
+    """
+    Lee un miembro una sola vez y retorna el objeto en memoria y su hash.
+
+    Returns:
+        tuple: (io.BytesIO con el contenido, hash SHA-256 hexadecimal)
+    """
+    datos = leer_miembro(ruta)
+    return io.BytesIO(datos), hashlib.sha256(datos).hexdigest()
+
+
+def abrir_entrada(ruta):
+    """
+    Retorna lo que se le pasa a `pdfplumber.open`: un `io.BytesIO` si `ruta`
+    es un miembro de un archivo; en otro caso, `ruta` sin cambios (ruta en
+    disco u objeto tipo archivo).
+    """
+    if es_ruta_miembro(ruta):
+        return io.BytesIO(leer_miembro(ruta))
+    return ruta
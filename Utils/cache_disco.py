@@ -0,0 +1,84 @@
+## Caché en disco de objetos Python validada por firma
+import os
+import pickle
+import tempfile
+from loguru import logger
+
+
+class CachePickle:
+    """
+    Guarda un objeto en disco junto con la firma de las fuentes que lo
+    generaron. `obtener` solo retorna el objeto si la firma coincide; en
+    cualquier otro caso (archivo ausente, corrupto o firma distinta) retorna
+    None y el llamador debe reconstruirlo.
+
+    Solo debe usarse con archivos generados por el propio proyecto (pickle).
+    """
+
+    def __init__(self, ruta: str):
+        """
+        Args:
+            ruta (str): Ruta del archivo de caché.
+        """
+        self.ruta = ruta
+
+    def obtener(self, firma):
+        """
+        Retorna el objeto guardado si su firma coincide con `firma`.
+
+        Args:
+            firma (Any): Firma actual de las fuentes (debe ser comparable con ==).
+
+        Returns:
+            Any | None: Objeto cacheado o None.
+        """
+        guardado = self.leer()
+        if guardado is None:
+            return None
+        firma_guardada, valor = guardado
+        return valor if firma_guardada == firma else None
+
+    def leer(self) -> tuple | None:
+        """
+        Retorna lo guardado sin validar la firma, para que el llamador pueda
+        reutilizar parte de un objeto obsoleto (ej. actualización incremental).
+
+        Returns:
+            tuple | None: (firma_guardada, valor) o None si no existe o está
+                corrupto.
+        """
+        if not os.path.exists(self.ruta):
+            return None
+        try:
+            with open(self.ruta, "rb") as f:
+                firma_guardada, valor = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Caché ilegible en {self.ruta}, se reconstruye: {e}")
+            return None
+        return firma_guardada, valor
+
+    def guardar(self, firma, valor):
+        """
+        Guarda `valor` con su firma de forma atómica. El temporal tiene un
+        nombre único en la misma carpeta, así dos procesos que guardan la
+        misma entrada (shards, trabajadores del pool) no se pisan.
+
+        Args:
+            firma (Any): Firma de las fuentes.
+            valor (Any): Objeto serializable con pickle.
+        """
+        carpeta = os.path.dirname(self.ruta) or "."
+        os.makedirs(carpeta, exist_ok=True)
+        descriptor, ruta_tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                pickle.dump((firma, valor), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(ruta_tmp, self.ruta)
+        except BaseException:
+            os.remove(ruta_tmp)
+            raise
+
+    def invalidar(self):
+        """Elimina el archivo de caché si existe."""
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
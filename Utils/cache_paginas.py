@@ -0,0 +1,85 @@
+## Caché de extracción por página, con clave en el hash del contenido de cada página
+import os
+import hashlib
+import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from Utils.cache_disco import CachePickle
+
+# Entradas del diccionario de cada fuente que cambian el texto extraído.
+CLAVES_FUENTE = ("BaseFont", "Subtype", "Encoding", "FirstChar", "LastChar", "Widths",
+                 "DescendantFonts")
+
+
+def huella_pagina(pagina) -> str:
+    """
+    SHA-256 de lo que determina el texto de una página: sus flujos de
+    contenido (descomprimidos), las cajas y la rotación, las fuentes (con su
+    ToUnicode) y los XObject de formulario. No depende del resto del archivo,
+    así que una página igual en un PDF reemitido conserva su huella.
+
+    Args:
+        pagina (pdfplumber.page.Page): Página abierta.
+    """
+    page_obj = pagina.page_obj
+    h = hashlib.sha256(repr((page_obj.mediabox, page_obj.cropbox, page_obj.rotate)).encode())
+    for flujo in page_obj.contents:
+        h.update(resolve1(flujo).get_data())
+
+    recursos = resolve1(page_obj.resources) or {}
+    for nombre, ref in sorted((resolve1(recursos.get("Font")) or {}).items()):
+        fuente = resolve1(ref)
+        h.update(repr((nombre, [resolve1(fuente.get(clave)) for clave in CLAVES_FUENTE])).encode())
+        to_unicode = resolve1(fuente.get("ToUnicode"))
+        if isinstance(to_unicode, PDFStream):
+            h.update(to_unicode.get_data())
+    for nombre, ref in sorted((resolve1(recursos.get("XObject")) or {}).items()):
+        objeto = resolve1(ref)
+        # Las imágenes no aportan texto: solo se leen los formularios.
+        if isinstance(objeto, PDFStream) and getattr(objeto.get("Subtype"), "name", None) == "Form":
+            h.update(nombre.encode("utf-8"))
+            h.update(objeto.get_data())
+    return h.hexdigest()
+
+
+class CachePaginas:
+    """
+    Resultado de extracción (texto o palabras) de cada página, guardado en un
+    archivo por huella de página y tipo. Si un PDF se reemite con solo
+    algunas páginas cambiadas, las demás no vuelven a pasar por pdfplumber.
+
+    Cuenta aciertos y páginas extraídas para el log de detalle.
+    """
+
+    # Se incrementa si cambia lo que se guarda por página.
+    VERSION = 1
+
+    def __init__(self, directorio: str):
+        """
+        Args:
+            directorio (str): Carpeta de la caché (`paths_cache.paginas`).
+        """
+        self.directorio = directorio
+        self.firma = {"version": self.VERSION, "pdfplumber": pdfplumber.__version__}
+        self.aciertos = 0
+        self.extraidas = 0
+
+    def obtener(self, pagina, tipo: str, extraer):
+        """
+        Retorna el resultado de `extraer(pagina)` desde la caché si la página
+        ya se extrajo con el mismo contenido; si no, extrae y lo guarda.
+
+        Args:
+            pagina (pdfplumber.page.Page): Página abierta.
+            tipo (str): Qué se extrae ("texto", "palabras"); parte de la clave.
+            extraer (Callable): Función de extracción; su resultado se guarda con pickle.
+        """
+        cache = CachePickle(os.path.join(self.directorio, f"{huella_pagina(pagina)}.{tipo}.pkl"))
+        valor = cache.obtener(self.firma)
+        if valor is not None:
+            self.aciertos += 1
+            return valor
+        valor = extraer(pagina)
+        cache.guardar(self.firma, valor)
+        self.extraidas += 1
+        return valor
@@ -0,0 +1,190 @@
+## Registro SQLite de trabajos por factura (ejecución reanudable)
+import os
+import json
+import time
+import pickle
+import sqlite3
+
+from Utils.general_functions import firma_archivo
+
+# Estados de un trabajo, en orden de avance.
+ENCOLADO = "queued"
+PARSEADO = "parsed"
+CRUZADO = "matched"
+ESCRITO = "written"
+FALLIDO = "failed"
+
+
+class RegistroTrabajos:
+    """
+    Tabla de trabajos en SQLite con un checkpoint por factura.
+
+    Cada fila guarda el estado actual, la última etapa completada y el
+    artefacto de esa etapa (tupla parseada o resultado del cruce, serializado
+    con pickle), de modo que una ejecución reiniciada continúa desde la última
+    etapa completada de cada factura. Un trabajo fallido conserva su última
+    etapa completada y se reintenta desde ahí.
+    """
+
+    def __init__(self, ruta_db: str):
+        """
+        Args:
+            ruta_db (str): Ruta del archivo SQLite.
+        """
+        os.makedirs(os.path.dirname(ruta_db) or ".", exist_ok=True)
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trabajos (
+                ruta TEXT PRIMARY KEY,
+                tam INTEGER,
+                mtime REAL,
+                estado TEXT NOT NULL,
+                etapa TEXT NOT NULL,
+                artefacto BLOB,
+                faltantes TEXT,
+                eans_factura TEXT,
+                salida TEXT,
+                error TEXT,
+                actualizado REAL
+            )
+            """
+        )
+        self.conexion.commit()
+
+    def cerrar(self):
+        """Cierra la conexión."""
+        self.conexion.close()
+
+    def lote_terminado(self) -> bool:
+        """
+        Indica si no quedan trabajos pendientes ni fallidos (o si la tabla está
+        vacía). En ese caso la siguiente ejecución inicia un lote nuevo.
+        """
+        pendientes = self.conexion.execute(
+            "SELECT COUNT(*) FROM trabajos WHERE estado != ?", (ESCRITO,)
+        ).fetchone()[0]
+        return pendientes == 0
+
+    def reiniciar(self):
+        """Vacía la tabla para iniciar un lote nuevo."""
+        self.conexion.execute("DELETE FROM trabajos")
+        self.conexion.commit()
+
+    def encolar(self, rutas: list):
+        """
+        Registra las rutas del lote. Las que ya existen se conservan salvo que
+        el archivo haya cambiado (tamaño o mtime), en cuyo caso vuelven a
+        `queued`. Las filas de archivos que ya no están se eliminan.
+
+        Args:
+            rutas (list): Rutas de los PDF del lote.
+        """
+        existentes = {
+            ruta: (tam, mtime)
+            for ruta, tam, mtime in self.conexion.execute(
+                "SELECT ruta, tam, mtime FROM trabajos"
+            )
+        }
+        ahora = time.time()
+        for ruta in rutas:
+            firma = firma_archivo(ruta)
+            if existentes.get(ruta) == (firma["tam"], firma["mtime"]):
+                continue
+            self.conexion.execute(
+                """
+                INSERT OR REPLACE INTO trabajos (ruta, tam, mtime, estado, etapa, actualizado)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (ruta, firma["tam"], firma["mtime"], ENCOLADO, ENCOLADO, ahora),
+            )
+        ausentes = set(existentes) - set(rutas)
+        self.conexion.executemany(
+            "DELETE FROM trabajos WHERE ruta = ?", [(ruta,) for ruta in ausentes]
+        )
+        self.conexion.commit()
+
+    def obtener(self, ruta: str) -> tuple:
+        """
+        Retorna la última etapa completada y su artefacto deserializado.
+
+        Args:
+            ruta (str): Ruta del PDF.
+
+        Returns:
+            tuple: (etapa, artefacto | None)
+        """
+        etapa, artefacto = self.conexion.execute(
+            "SELECT etapa, artefacto FROM trabajos WHERE ruta = ?", (ruta,)
+        ).fetchone()
+        return etapa, pickle.loads(artefacto) if artefacto is not None else None
+
+    def _actualizar(self, ruta: str, estado: str, **campos):
+        campos["estado"] = estado
+        campos["actualizado"] = time.time()
+        asignaciones = ", ".join(f"{campo} = ?" for campo in campos)
+        self.conexion.execute(
+            f"UPDATE trabajos SET {asignaciones} WHERE ruta = ?",
+            (*campos.values(), ruta),
+        )
+        self.conexion.commit()
+
+    def marcar_parseado(self, ruta: str, tupla_factura: tuple):
+        """Checkpoint tras la extracción: guarda la tupla parseada."""
+        self._actualizar(
+            ruta, PARSEADO, etapa=PARSEADO, error=None,
+            artefacto=pickle.dumps(tupla_factura, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    def marcar_cruzado(self, ruta: str, cruce: dict, faltantes: list):
+        """
+        Checkpoint tras el cruce: guarda el resultado y los datos de reportes.
+
+        Args:
+            ruta (str): Ruta del PDF.
+            cruce (dict): Resultado de `Run.cruzar_factura`.
+            faltantes (list): Líneas del reporte de EAN faltantes de la factura.
+        """
+        self._actualizar(
+            ruta, CRUZADO, etapa=CRUZADO, error=None,
+            artefacto=pickle.dumps(cruce, protocol=pickle.HIGHEST_PROTOCOL),
+            faltantes=json.dumps(faltantes),
+            eans_factura=json.dumps(cruce["eans_factura"]),
+        )
+
+    def marcar_escrito(self, ruta: str, salida: str):
+        """Checkpoint final: el artefacto ya no se necesita y se libera."""
+        self._actualizar(
+            ruta, ESCRITO, etapa=ESCRITO, error=None, artefacto=None, salida=salida
+        )
+
+    def marcar_fallido(self, ruta: str, error: Exception):
+        """Marca el trabajo como fallido conservando su última etapa completada."""
+        self._actualizar(ruta, FALLIDO, error=f"{type(error).__name__}: {error}")
+
+    def datos_reportes(self, rutas: list) -> list:
+        """
+        Retorna (ruta, faltantes, eans_factura) de los trabajos que ya
+        pasaron el cruce, en el orden de `rutas`.
+
+        Args:
+            rutas (list): Rutas del lote en orden de descubrimiento.
+
+        Returns:
+            list: Tuplas (ruta, faltantes, eans_factura) deserializadas.
+        """
+        filas = {
+            ruta: (json.loads(faltantes), json.loads(eans))
+            for ruta, faltantes, eans in self.conexion.execute(
+                "SELECT ruta, faltantes, eans_factura FROM trabajos "
+                "WHERE etapa IN (?, ?)",
+                (CRUZADO, ESCRITO),
+            )
+        }
+        return [(ruta, *filas[ruta]) for ruta in rutas if ruta in filas]
+
+    def resumen(self) -> dict:
+        """Cuenta los trabajos por estado."""
+        return dict(
+            self.conexion.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado")
+        )
@@ -0,0 +1,124 @@
+## Configuración del logger del proyecto (módulo liviano: solo depende de loguru)
+import os
+import sys
+import json
+from loguru import logger
+
+FORMATOS_LOG = ("texto", "json")
+FORMATO_TEXTO = "<green>{time:HH:mm}</green> | <level>{level}</level> | {message}"
+NIVEL_DETALLE = logger.level("DEBUG").no
+
+# Nivel mínimo (numérico) de los sinks configurados. `detalle_activo` lo
+# consulta para que los logs de caminos calientes, si están deshabilitados,
+# no lleguen a armar su mensaje ni a llamar al logger.
+_nivel_minimo = NIVEL_DETALLE
+
+
+def logger_basic_config():
+    global _nivel_minimo
+    # Reconfigurar el logger para agregar una línea en blanco después de cada mensaje
+    # Configurar el logger con formato de hora y minuto
+    logger.remove()
+    logger.add(
+        sink=lambda msg: print(msg, end="\n"),
+        format=FORMATO_TEXTO,
+    )
+    _nivel_minimo = NIVEL_DETALLE
+
+
+def detalle_activo() -> bool:
+    """
+    Indica si los logs de detalle (DEBUG) llegan a algún sink. Los caminos
+    calientes (merges, cruce por factura) lo consultan antes de llamar a
+    `logger.debug`:
+
+        if detalle_activo():
+            logger.debug(f"...")
+    """
+    return _nivel_minimo <= NIVEL_DETALLE
+
+
+class SinkJSONL:
+    """
+    Sink de loguru que escribe cada registro como una línea JSON: hora, nivel,
+    mensaje, origen y el contexto de `logger.contextualize` (por ejemplo la
+    `factura` en curso).
+
+    Con `enqueue=True` se ejecuta en el hilo del logger, de modo que la
+    serialización y la escritura no bloquean el procesamiento de facturas.
+    """
+
+    def __init__(self, ruta: str | None = None):
+        """
+        Args:
+            ruta (str, opcional): Archivo .jsonl (se anexa). Si no se indica,
+                se escribe en la salida estándar.
+        """
+        self.ruta = ruta
+        self.archivo = None
+
+    def write(self, mensaje):
+        registro = mensaje.record
+        linea = {
+            "hora": registro["time"].isoformat(),
+            "nivel": registro["level"].name,
+            "mensaje": registro["message"],
+            "origen": f"{registro['name']}:{registro['function']}:{registro['line']}",
+            **registro["extra"],
+        }
+        if registro["exception"] is not None:
+            linea["excepcion"] = repr(registro["exception"].value)
+        self._destino().write(json.dumps(linea, ensure_ascii=False, default=str) + "\n")
+
+    def _destino(self):
+        if self.ruta is None:
+            return sys.stdout
+        if self.archivo is None:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            self.archivo = open(self.ruta, "a", encoding="utf-8")
+        return self.archivo
+
+    def flush(self):
+        self._destino().flush()
+
+    def stop(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+
+def configurar_logs(config_logs):
+    """
+    Reemplaza los sinks del logger según `config_logs`:
+
+    - formato "texto": el formato de `logger_basic_config`, en consola o en
+      `archivo`; "json": una línea JSON por registro (ver `SinkJSONL`).
+    - nivel: nivel mínimo; los logs de detalle de los caminos calientes solo
+      se emiten con "DEBUG" (ver `detalle_activo`).
+    - asincrono: `enqueue=True`, los registros se escriben en un hilo aparte
+      y el llamador solo los encola.
+
+    Args:
+        config_logs (ConfigLogs): Sección `config_logs` de la configuración.
+
+    Raises:
+        ValueError: Si el formato o el nivel no son válidos.
+    """
+    global _nivel_minimo
+    if config_logs.formato not in FORMATOS_LOG:
+        raise ValueError(f"config_logs.formato inválido '{config_logs.formato}': use {FORMATOS_LOG}")
+    try:
+        nivel = logger.level(str(config_logs.nivel).upper())
+    except ValueError:
+        raise ValueError(f"config_logs.nivel inválido '{config_logs.nivel}'")
+
+    if config_logs.formato == "json":
+        sink, formato = SinkJSONL(config_logs.archivo), "{message}"
+    elif config_logs.archivo:
+        sink, formato = config_logs.archivo, FORMATO_TEXTO
+    else:
+        sink, formato = (lambda msg: print(msg, end="\n")), FORMATO_TEXTO
+
+    logger.remove()
+    logger.add(sink, format=formato, level=nivel.name, enqueue=config_logs.asincrono)
+    _nivel_minimo = nivel.no
@@ -0,0 +1,126 @@
+## Dataset Parquet con las líneas cruzadas de todas las facturas (un archivo por factura)
+import os
+import re
+import tempfile
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from Utils.manifiesto_salidas import huella_dataframe
+
+COL_MES = "mes"
+COL_OFICINA = "oficina"
+COL_FUENTE = "fuente_cruce"
+COL_NUMERO = "Número"
+MES_DESCONOCIDO = "sin_fecha"
+# Única partición del dataset (carpetas `mes=...`). La oficina va como
+# columna de texto dentro de cada archivo: una partición `oficina=103` se
+# inferiría como entero al leer el dataset sin `leer_lineas`.
+PARTICIONADO = ds.partitioning(pa.schema([(COL_MES, pa.string())]), flavor="hive")
+_CARACTERES_NOMBRE = re.compile(r"[^\w.-]")
+
+
+def mes_desde_fecha(fecha: str) -> str:
+    """
+    Convierte la fecha de la cabecera ("5/03/2025") en la partición "2025-03".
+    Si no hay fecha o no es válida retorna `MES_DESCONOCIDO`.
+    """
+    try:
+        return datetime.strptime(fecha, "%d/%m/%Y").strftime("%Y-%m")
+    except (TypeError, ValueError):
+        return MES_DESCONOCIDO
+
+
+def construir_lineas(cabecera: dict, num_oficina: str, df_cruce: pd.DataFrame,
+                     columnas: list) -> pd.DataFrame:
+    """
+    Arma las filas del dataset de una factura: los campos de la cabecera se
+    repiten en cada línea de producto y se agregan las columnas de partición.
+
+    Args:
+        cabecera (dict): Cabecera limpia de la factura (`_limpiar_cabecera`).
+        num_oficina (str): Oficina de la factura.
+        df_cruce (pd.DataFrame): Productos ya cruzados con la maestra.
+        columnas (list): Columnas a conservar: campos de cabecera, columnas de
+            producto, código de material y fuente del cruce.
+
+    Returns:
+        pd.DataFrame: Todas las columnas como texto (nulo si no hay valor).
+    """
+    df_lineas = df_cruce.reindex(columns=columnas)
+    for clave in columnas:
+        if clave in cabecera:
+            df_lineas[clave] = cabecera[clave] or None
+    df_lineas = df_lineas.astype(object).where(df_lineas.notna(), None)
+    df_lineas[COL_MES] = mes_desde_fecha(cabecera.get("fecha"))
+    df_lineas[COL_OFICINA] = num_oficina
+    return df_lineas
+
+
+def ruta_archivo_lineas(ruta_dataset: str, df_lineas: pd.DataFrame) -> str:
+    """
+    Archivo de una factura en el dataset: `mes=2025-03/<número>.parquet`.
+    El nombre sale del número de la factura ("101-DVA-00021274"), así una
+    factura reprocesada reemplaza su archivo en lugar de duplicar sus líneas.
+    Sin número se usa el hash de las líneas.
+    """
+    numero = df_lineas[COL_NUMERO].iloc[0] if COL_NUMERO in df_lineas and len(df_lineas) else None
+    nombre = _CARACTERES_NOMBRE.sub("_", numero) if numero else huella_dataframe(df_lineas)[:16]
+    mes = df_lineas[COL_MES].iloc[0] if len(df_lineas) else MES_DESCONOCIDO
+    return os.path.join(ruta_dataset, f"{COL_MES}={mes}", f"{nombre}.parquet")
+
+
+def escribir_lineas_factura(ruta_archivo: str, df_lineas: pd.DataFrame, columnas: list) -> int:
+    """
+    Escribe (o reemplaza) el archivo de líneas de una factura. Se escribe en
+    un temporal oculto de la misma carpeta y se mueve con `os.replace`, para
+    que un lector del dataset nunca vea un archivo a medias.
+
+    El esquema es fijo (todo texto, incluida `oficina`) para que los archivos
+    se lean como un solo dataset aunque una columna venga vacía.
+
+    Args:
+        ruta_archivo (str): Ruta de `ruta_archivo_lineas`.
+        df_lineas (pd.DataFrame): Líneas de `construir_lineas`.
+        columnas (list): Columnas de datos (sin `oficina` ni `mes`).
+
+    Returns:
+        int: Número de líneas escritas.
+    """
+    columnas = columnas + [COL_OFICINA]
+    esquema = pa.schema([(col, pa.string()) for col in columnas])
+    tabla = pa.Table.from_pandas(df_lineas[columnas], schema=esquema, preserve_index=False)
+
+    carpeta = os.path.dirname(ruta_archivo)
+    os.makedirs(carpeta, exist_ok=True)
+    descriptor, ruta_tmp = tempfile.mkstemp(dir=carpeta, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            pq.write_table(tabla, f)
+        os.replace(ruta_tmp, ruta_archivo)
+    except BaseException:
+        os.remove(ruta_tmp)
+        raise
+    return len(df_lineas)
+
+
+def leer_lineas(ruta_dataset: str, columnas: list | None = None,
+                filtros: list | None = None) -> pd.DataFrame:
+    """
+    Lee el dataset (o parte de él) para reconstruir reportes sin volver a
+    abrir los PDF. Los filtros sobre `mes` solo leen esas carpetas; los de
+    `oficina` descartan archivos por sus estadísticas.
+
+    Args:
+        ruta_dataset (str): Carpeta raíz del dataset.
+        columnas (list, opcional): Columnas a leer.
+        filtros (list, opcional): Filtros de pyarrow, ej. [("mes", "=", "2025-03")].
+    """
+    return pq.read_table(
+        ruta_dataset,
+        columns=columnas,
+        filters=filtros,
+        partitioning=PARTICIONADO,
+    ).to_pandas()
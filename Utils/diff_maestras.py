@@ -0,0 +1,96 @@
+## Diferencias entre dos versiones de una maestra y su registro de cambios
+import os
+import json
+from datetime import datetime
+import pandas as pd
+
+INSERCION = "insercion"
+ACTUALIZACION = "actualizacion"
+ELIMINACION = "eliminacion"
+
+
+def diferencias_maestra(df_anterior: pd.DataFrame, df_nuevo: pd.DataFrame,
+                        col_clave: str) -> dict:
+    """
+    Compara dos versiones de una maestra (sin filas repetidas) fila a fila y
+    agrupa los cambios por `col_clave`:
+
+    - inserción: la clave solo tiene filas nuevas.
+    - eliminación: la clave solo tiene filas retiradas.
+    - actualización: la clave tiene filas retiradas y nuevas (ej. cambió la
+      descripción o uno de los EAN del material).
+
+    Args:
+        df_anterior (pd.DataFrame): Versión previa.
+        df_nuevo (pd.DataFrame): Versión actual, con las mismas columnas.
+        col_clave (str): Columna que identifica el registro (ej. COD_MATERIAL).
+
+    Returns:
+        dict: {"retiradas": DataFrame, "agregadas": DataFrame,
+            "cambios": [{"tipo", "clave", "antes", "despues"}, ...]}
+    """
+    cols = list(df_nuevo.columns)
+    comparacion = pd.merge(
+        df_anterior.astype(object), df_nuevo.astype(object),
+        how="outer", on=cols, indicator=True,
+    )
+    retiradas = comparacion.loc[comparacion["_merge"] == "left_only", cols]
+    agregadas = comparacion.loc[comparacion["_merge"] == "right_only", cols]
+
+    antes = _registros_por_clave(retiradas, col_clave)
+    despues = _registros_por_clave(agregadas, col_clave)
+
+    cambios = []
+    for clave in sorted(antes.keys() | despues.keys(), key=str):
+        if clave not in antes:
+            tipo = INSERCION
+        elif clave not in despues:
+            tipo = ELIMINACION
+        else:
+            tipo = ACTUALIZACION
+        cambios.append({
+            "tipo": tipo,
+            "clave": clave,
+            "antes": antes.get(clave, []),
+            "despues": despues.get(clave, []),
+        })
+
+    return {"retiradas": retiradas, "agregadas": agregadas, "cambios": cambios}
+
+
+def _registros_por_clave(df: pd.DataFrame, col_clave: str) -> dict:
+    """
+    Agrupa las filas de `df` como lista de dicts por valor de `col_clave`
+    (NaN se convierte en None para poder serializarlo en JSON).
+    """
+    registros = {}
+    for fila in df.where(df.notna(), None).to_dict(orient="records"):
+        registros.setdefault(fila[col_clave], []).append(fila)
+    return registros
+
+
+def registrar_changelog(ruta: str, archivo: str, cambios: list):
+    """
+    Agrega al changelog (JSON lines) una entrada con los cambios aplicados a
+    una maestra.
+
+    Args:
+        ruta (str): Ruta del changelog.
+        archivo (str): Maestra que cambió.
+        cambios (list): Lista "cambios" de `diferencias_maestra`.
+    """
+    resumen = {tipo: 0 for tipo in (INSERCION, ACTUALIZACION, ELIMINACION)}
+    for cambio in cambios:
+        resumen[cambio["tipo"]] += 1
+
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(
+            {
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "archivo": archivo,
+                "resumen": resumen,
+                "cambios": cambios,
+            },
+            ensure_ascii=False,
+        ) + "\n")
@@ -1,24 +1,25 @@
 ## Funciones básicas - Generales del proyecto_CxS Parte3
+import numpy as np
 import pandas as pd
 import time
 import os
 import inspect
 import json
 import time
-from typing import Dict
+import hashlib
+import zlib
+import fnmatch
+from typing import Dict, Iterator
 from loguru import logger
 from pathlib import Path
 import openpyxl
 
-
-def logger_basic_config():
-    # Reconfigurar el logger para agregar una línea en blanco después de cada mensaje
-    # Configurar el logger con formato de hora y minuto
-    logger.remove()
-    logger.add(
-        sink=lambda msg: print(msg, end="\n"),
-        format="<green>{time:HH:mm}</green> | <level>{level}</level> | {message}",
-    )
+# Se mantiene el nombre público gf.logger_basic_config.
+from Utils.config_logger import logger_basic_config
+from Utils.archivos_comprimidos import (
+    es_archivo_comprimido, es_ruta_miembro, iterar_miembros, leer_miembro, miembros_contenedor,
+    ruta_miembro, separar_ruta_miembro,
+)
 
 
 def Registro_tiempo(original_func):
@@ -38,12 +39,139 @@ def Registro_tiempo(original_func):
 
 
 
-def listar_elementos_rutas_completas(ruta: str) -> list:
+def pertenece_a_shard(nombre: str, shard: tuple | None) -> bool:
+    """
+    Indica si un archivo corresponde al shard `shard = (i, n)`.
+
+    La partición usa CRC32 del nombre del archivo (no de la ruta completa), que
+    es estable entre ejecuciones, procesos y máquinas (a diferencia de `hash`).
+
+    Args:
+        nombre (str): Nombre del archivo.
+        shard (tuple | None): (índice, total) con 0 <= índice < total, o None.
+
+    Returns:
+        bool: True si pertenece al shard (o si no hay shard).
+    """
+    if shard is None:
+        return True
+    indice, total = shard
+    return zlib.crc32(os.path.basename(nombre).encode("utf-8")) % total == indice
+
+
+def descubrir_archivos(
+    ruta: str,
+    patrones: tuple = ("*",),
+    excluir: tuple = (),
+    recursivo: bool = False,
+    shard: tuple | None = None,
+    con_firma: bool = False,
+) -> Iterator:
     """
-    Genera rutas completas de todos los elementos en un directorio especificado.
+    Recorre `ruta` con `os.scandir` y produce, de forma perezosa, las rutas de
+    los archivos cuyo nombre coincide con alguno de `patrones` y con ninguno de
+    `excluir` (comparación sin distinguir mayúsculas). Se omiten carpetas
+    (salvo para recorrerlas si `recursivo`), enlaces rotos y archivos vacíos
+    (estos últimos con un warning por archivo).
+
+    Las entradas de cada carpeta se ordenan de modo que la secuencia completa
+    queda en el mismo orden que `sorted()` de las rutas, igual en cualquier
+    máquina. Tamaño y fecha salen de la caché de `DirEntry.stat()` (en Windows
+    vienen con el listado del directorio, sin una llamada extra por archivo).
+
+    Si `ruta` es un .zip o .tar(.gz), se producen las rutas virtuales de sus
+    miembros ("<archivo>::<miembro>", ver `archivos_comprimidos`) con los
+    mismos filtros; `recursivo` decide si se incluyen miembros en subcarpetas.
+    Los miembros de un .tar comprimido salen en el orden del flujo (ver
+    `miembros_contenedor`), para leerlos sin retroceder.
+
+    Args:
+        ruta (str): Carpeta raíz, o archivo .zip/.tar.
+        patrones (tuple): Patrones glob de nombre a incluir (ej. ("*.pdf",)).
+        excluir (tuple): Patrones glob de nombre a omitir (ej. ("~$*", ".*")).
+            También se aplican a las subcarpetas.
+        recursivo (bool): Recorrer subcarpetas.
+        shard (tuple, opcional): (índice, total); ver `pertenece_a_shard`.
+        con_firma (bool): Producir (ruta, {"tam", "mtime"}) en lugar de la ruta.
+
+    Yields:
+        str | tuple: Ruta del archivo, o (ruta, firma) si `con_firma`.
+
+    Ejemplos:
+        >>> list(descubrir_archivos("Insumos/facturas_pdf/", patrones=("*.pdf",)))
+        ['Insumos/facturas_pdf/AVERIA NUTRESA MARZO.pdf', ...]
+    """
+    patrones = tuple(patron.lower() for patron in patrones)
+    excluir = tuple(patron.lower() for patron in excluir)
+
+    def _coincide(nombre: str, lista: tuple) -> bool:
+        nombre = nombre.lower()
+        return any(fnmatch.fnmatchcase(nombre, patron) for patron in lista)
+
+    # La raíz puede ser un .zip/.tar: se recorren sus miembros sin extraerlos.
+    if es_archivo_comprimido(ruta) and os.path.isfile(ruta):
+        for nombre_miembro, tam, mtime in iterar_miembros(ruta):
+            nombre = os.path.basename(nombre_miembro)
+            partes = nombre_miembro.split("/")
+            if excluir and any(_coincide(parte, excluir) for parte in partes):
+                continue
+            if not recursivo and len(partes) > 1:
+                continue
+            if not _coincide(nombre, patrones) or not pertenece_a_shard(nombre, shard):
+                continue
+            ruta_virtual = ruta_miembro(ruta, nombre_miembro)
+            if tam == 0:
+                logger.warning(f"Se omite {ruta_virtual}: archivo vacío")
+                continue
+            yield (ruta_virtual, {"tam": tam, "mtime": mtime}) if con_firma else ruta_virtual
+        return
+
+    try:
+        with os.scandir(ruta) as iterador:
+            entradas = list(iterador)
+    except OSError as e:
+        logger.error(f"Error al acceder al directorio {ruta}: {e}")
+        return
+
+    # Una carpeta "d" se ordena como "d/" porque sus archivos son "d/...".
+    entradas.sort(key=lambda e: e.name + os.sep if e.is_dir(follow_symlinks=False) else e.name)
+
+    for entrada in entradas:
+        if excluir and _coincide(entrada.name, excluir):
+            continue
+        try:
+            if entrada.is_dir():
+                if recursivo:
+                    yield from descubrir_archivos(
+                        entrada.path, patrones, excluir, recursivo, shard, con_firma
+                    )
+                continue
+            if not entrada.is_file() or not _coincide(entrada.name, patrones):
+                continue
+            stat = entrada.stat()
+        except OSError as e:
+            logger.warning(f"Se omite {entrada.path}: {e}")
+            continue
+        if not pertenece_a_shard(entrada.name, shard):
+            continue
+        if stat.st_size == 0:
+            logger.warning(f"Se omite {entrada.path}: archivo vacío")
+            continue
+        if con_firma:
+            yield entrada.path, {"tam": stat.st_size, "mtime": stat.st_mtime}
+        else:
+            yield entrada.path
+
+
+def listar_elementos_rutas_completas(ruta: str, shard: tuple | None = None) -> list:
+    """
+    Genera rutas completas de todos los elementos en un directorio especificado,
+    ordenadas por nombre para que el orden sea el mismo en cualquier máquina.
 
     Parámetros:
         ruta (str): Ruta absoluta o relativa del directorio a listar.
+        shard (tuple, opcional): (índice, total). Si se indica, solo se retornan
+            los elementos de ese shard (ver `pertenece_a_shard`).
 
     Retorna:
         list: Lista de strings con las rutas completas de los elementos encontrados.
@@ -69,7 +197,11 @@ def listar_elementos_rutas_completas(ruta: str) -> list:
             raise NotADirectoryError(f"La ruta no es un directorio: {ruta}")
 
         # Generar lista de rutas completas
-        return [os.path.join(ruta, elemento) for elemento in os.listdir(ruta)]
+        return [
+            os.path.join(ruta, elemento)
+            for elemento in sorted(os.listdir(ruta))
+            if pertenece_a_shard(elemento, shard)
+        ]
 
     except (FileNotFoundError, NotADirectoryError, PermissionError) as e:
         print(f"Error al acceder al directorio: {str(e)}")
@@ -83,6 +215,52 @@ def listar_elementos_rutas_completas(ruta: str) -> list:
         print(f"Error inesperado: {str(e)}")
         return []
 
+def hash_archivo(ruta: str, tam_bloque: int = 1 << 20) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyéndolo por bloques.
+    Acepta rutas virtuales de miembros de .zip/.tar (ver `archivos_comprimidos`).
+
+    Args:
+        ruta (str): Ruta del archivo.
+        tam_bloque (int): Tamaño de bloque de lectura en bytes. Por defecto 1 MiB.
+
+    Returns:
+        str: Hash hexadecimal del contenido.
+    """
+    if es_ruta_miembro(ruta):
+        return hashlib.sha256(leer_miembro(ruta)).hexdigest()
+
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def firma_archivo(ruta: str) -> dict:
+    """
+    Retorna la firma barata de un archivo (tamaño y fecha de modificación).
+    Para un miembro de .zip/.tar se usan el tamaño y la fecha del miembro,
+    del índice que `miembros_contenedor` arma una vez por contenedor.
+
+    Args:
+        ruta (str): Ruta del archivo.
+
+    Returns:
+        dict: {"tam": int, "mtime": float}
+    """
+    if es_ruta_miembro(ruta):
+        ruta_archivo, nombre_miembro = separar_ruta_miembro(ruta)
+        miembro = miembros_contenedor(ruta_archivo).get(nombre_miembro)
+        if miembro is None:
+            raise FileNotFoundError(f"No existe {nombre_miembro} en {ruta_archivo}")
+        tam, mtime = miembro
+        return {"tam": tam, "mtime": mtime}
+
+    stat = os.stat(ruta)
+    return {"tam": stat.st_size, "mtime": stat.st_mtime}
+
+
 class ErrorHandler:
     @staticmethod
     def log_error(e, message):
@@ -126,37 +304,6 @@ def exportar_a_excel(
         raise Exception
 
 
-def crear_diccionario_desde_dataframe(
-    df: pd.DataFrame, col_clave: str, col_valor: str
-) -> dict:
-    """
-    Crea un diccionario a partir de un DataFrame utilizando dos columnas especificadas.
-
-    Args:
-        df (pd.DataFrame): El DataFrame de entrada.
-        col_clave (str): El nombre de la columna que se utilizará como clave en el diccionario.
-        col_valor (str): El nombre de la columna que se utilizará como valor en el diccionario.
-
-    Returns:
-        dict: Un diccionario creado a partir de las columnas especificadas.
-    """
-    try:
-        # Verificar si las columnas existen en el DataFrame
-        if col_clave not in df.columns or col_valor not in df.columns:
-            raise ValueError("Las columnas especificadas no existen en el DataFrame.")
-
-        if col_clave == col_valor:
-            resultado_dict = df[col_clave].to_dict()
-        else:
-            resultado_dict = df.set_index(col_clave)[col_valor].to_dict()
-        return resultado_dict
-
-    except ValueError as ve:
-        # Registrar un mensaje crítico si hay un error
-        logger.critical(f"Error: {ve}")
-        raise ve
-
-
 class ExcelReader:
     def __init__(self, path: str):
         self.path = path
@@ -216,6 +363,96 @@ class ExcelReader:
             logger.error(f"Proceso de lectura fallido: {e}")
             raise Exception(f"Error al leer el archivo: {e}")
 
+    @Registro_tiempo
+    def Lectura_insumos_excel_streaming(
+        self,
+        nom_insumo: str,
+        nom_hoja: str,
+        cols: list,
+        filas_por_bloque: int = 50_000,
+        dtype: str = "object",
+    ) -> pd.DataFrame:
+        """
+        Lee una hoja de Excel fila a fila con openpyxl en modo `read_only`,
+        conservando solo las columnas `cols` (buscadas por nombre en el
+        encabezado). Las filas se acumulan en bloques de `filas_por_bloque` que
+        se convierten a DataFrame a medida que se llenan, por lo que la memoria
+        máxima no depende del tamaño del libro sino del bloque y de las
+        columnas proyectadas.
+
+        Los valores quedan como en `Lectura_insumos_excel` (dtype=str): números
+        enteros sin decimales, celdas vacías y marcadores de nulo ("#N/A",
+        "NULL", ...) como NaN, y filas vacías al final de la hoja omitidas.
+
+        Args:
+            nom_insumo (str): Nombre del archivo de Excel (incluye extensión).
+            nom_hoja (str): Nombre de la hoja.
+            cols (list): Nombres de las columnas a conservar, en ese orden.
+            filas_por_bloque (int): Filas por bloque. Por defecto 50 000.
+            dtype (str): "object", "string[pyarrow]" o "category". Con los dos
+                últimos cada bloque se convierte a string[pyarrow] al llenarse;
+                "category" se aplica una sola vez sobre el resultado completo,
+                con el mismo dtype que `tf.convertir_columnas_texto`.
+
+        Returns:
+            pd.DataFrame: DataFrame con las columnas `cols`.
+
+        Raises:
+            KeyError: Si alguna columna de `cols` no está en el encabezado.
+        """
+        # Los bloques de "category" se leen como string[pyarrow] y se
+        # categorizan tras la concatenación final (ver `_categorizar`).
+        dtype_bloque = "object" if dtype == "object" else "string[pyarrow]"
+
+        logger.info(f"Inicio lectura streaming {nom_insumo} Hoja: {nom_hoja}")
+        libro = openpyxl.load_workbook(self.path + nom_insumo, read_only=True, data_only=True)
+        try:
+            hoja = libro[nom_hoja]
+            hoja.reset_dimensions()
+            filas = hoja.iter_rows(values_only=True)
+
+            encabezado = [None if valor is None else str(valor) for valor in next(filas, ())]
+            ausentes = [col for col in cols if col not in encabezado]
+            if ausentes:
+                raise KeyError(f"Columnas no encontradas en {nom_insumo}: {ausentes}")
+            posiciones = [encabezado.index(col) for col in cols]
+
+            # Cada bloque se convierte a su dtype al llenarse y se concatena una
+            # sola vez al final (con string[pyarrow] la concatenación solo une
+            # chunks; con object copia punteros, no los strings).
+            # Como `pd.read_excel`, las filas vacías intermedias quedan como
+            # filas de NaN y solo se descartan las del final de la hoja.
+            fila_vacia = (np.nan,) * len(cols)
+            vacias_pendientes = 0
+            bloques = []
+            bloque = []
+            for fila in filas:
+                if all(valor is None or valor == "" for valor in fila):
+                    vacias_pendientes += 1
+                    continue
+                bloque.extend([fila_vacia] * vacias_pendientes)
+                vacias_pendientes = 0
+                bloque.append(tuple(
+                    _valor_texto_excel(fila[pos]) if pos < len(fila) else np.nan
+                    for pos in posiciones
+                ))
+                if len(bloque) >= filas_por_bloque:
+                    bloques.append(_bloque_a_dataframe(bloque, cols, dtype_bloque))
+                    bloque = []
+            if bloque or not bloques:
+                bloques.append(_bloque_a_dataframe(bloque, cols, dtype_bloque))
+        finally:
+            libro.close()
+
+        base_leida = pd.concat(bloques, ignore_index=True) if len(bloques) > 1 else bloques[0]
+        if dtype == "category":
+            base_leida = _categorizar(base_leida)
+        logger.success(
+            f"Lectura streaming de {nom_insumo} Hoja: {nom_hoja} realizada con éxito "
+            f"({len(base_leida)} filas, {len(bloques)} bloques)"
+        )
+        return base_leida
+
     @Registro_tiempo
     def Lectura_simple_excel(self, nom_insumo: str, nom_hoja: str) -> pd.DataFrame:
         """
@@ -235,6 +472,48 @@ class ExcelReader:
             raise Exception(f"Error al leer el archivo: {e}")
 
 
+# Marcadores que `pd.read_excel` convierte en NaN por defecto (`keep_default_na`).
+VALORES_NULOS_EXCEL = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+def _valor_texto_excel(valor):
+    """
+    Convierte el valor de una celda como lo hace `pd.read_excel(dtype=str)`.
+    """
+    if valor is None:
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor)
+    return np.nan if texto in VALORES_NULOS_EXCEL else texto
+
+
+def _bloque_a_dataframe(filas: list, cols: list, dtype: str) -> pd.DataFrame:
+    """
+    Construye el DataFrame de un bloque de filas del lector streaming.
+    """
+    df_bloque = pd.DataFrame.from_records(filas, columns=cols)
+    return df_bloque.astype(dtype)
+
+
+def _categorizar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte a category las columnas string[pyarrow] del lector streaming.
+    Las categorías (solo los valores únicos) se pasan a object para que el
+    dtype sea idéntico al de `pd.read_excel` + `tf.convertir_columnas_texto`;
+    con categorías string[pyarrow] las columnas no serían comparables entre
+    las dos lecturas.
+    """
+    columnas = {}
+    for col in df.columns:
+        categorica = df[col].astype("category")
+        columnas[col] = categorica.cat.rename_categories(categorica.cat.categories.astype(object))
+    return pd.DataFrame(columnas, index=df.index)
+
+
 def List_to_sql(values: list[str]):
     """
     Convierte una lista de valores en una cadena de valores SQL correctamenteformateada.
@@ -256,27 +535,6 @@ def List_to_sql(values: list[str]):
     return ", ".join(f"'{value}'" for value in values)
 
 
-def crear_dict_col_llave_col_valores(df, columna_clave, columna_valores):
-    """
-    Crea un diccionario donde cada clave es un elemento único de una columna,
-    y cada valor es una lista con los elementos correspondientes de otra columna.
-
-    Parámetros:
-    df (pd.DataFrame): El DataFrame del cual se extraerán los datos.
-    columna_clave (str): El nombre de la columna que se usará como claves del diccionario.
-    columna_valores (str): El nombre de la columna que se usará para los valores del diccionario.
-
-    Retorna:
-    dict: Un diccionario con las claves y valores especificados.
-    """
-    diccionario = {}
-    for clave in df[columna_clave].unique():
-        diccionario[clave] = (
-            df.loc[df[columna_clave] == clave, columna_valores].unique().tolist()
-        )
-    return diccionario
-
-
 def save_json_(dict_info_pdf, nombre_archivo="resultado_estructura.json"):
     """
     Guarda un diccionario en un archivo JSON y convierte la información en un DataFrame.
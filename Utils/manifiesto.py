@@ -0,0 +1,161 @@
+## Manifiesto de archivos procesados (modo incremental)
+import os
+import json
+import tempfile
+from loguru import logger
+
+from Utils.general_functions import hash_archivo, firma_archivo
+
+
+class ManifiestoProcesados:
+    """
+    Manifiesto JSON de los PDF ya procesados.
+
+    Por cada ruta guarda tamaño, mtime, hash SHA-256, archivo de salida generado
+    y los datos necesarios para reconstruir los reportes agregados (EAN
+    faltantes y EAN de la factura) sin volver a extraer el PDF.
+
+    La detección de cambios es en dos niveles: si tamaño y mtime coinciden el
+    archivo se da por no modificado; si no, se compara el hash (un `touch` o una
+    copia no fuerzan el reproceso).
+    """
+
+    VERSION = 1
+
+    def __init__(self, ruta_manifiesto: str):
+        """
+        Args:
+            ruta_manifiesto (str): Ruta del archivo JSON del manifiesto.
+        """
+        self.ruta_manifiesto = ruta_manifiesto
+        self.firma_insumos = None
+        self.entradas = {}
+        self._cargar()
+
+    def _cargar(self):
+        """Lee el manifiesto si existe; si está corrupto se empieza de cero."""
+        if not os.path.exists(self.ruta_manifiesto):
+            return
+        try:
+            with open(self.ruta_manifiesto, "r", encoding="utf-8") as f:
+                contenido = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Manifiesto ilegible, se reconstruye: {e}")
+            return
+        if contenido.get("version") != self.VERSION:
+            return
+        self.firma_insumos = contenido.get("firma_insumos")
+        self.entradas = contenido.get("entradas", {})
+
+    def guardar(self):
+        """Escribe el manifiesto de forma atómica (archivo temporal + replace)."""
+        carpeta = os.path.dirname(self.ruta_manifiesto) or "."
+        os.makedirs(carpeta, exist_ok=True)
+        descriptor, ruta_tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": self.VERSION,
+                        "firma_insumos": self.firma_insumos,
+                        "entradas": self.entradas,
+                    },
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            os.replace(ruta_tmp, self.ruta_manifiesto)
+        except BaseException:
+            os.remove(ruta_tmp)
+            raise
+
+    def validar_insumos(self, firma_insumos: dict) -> bool:
+        """
+        Invalida todas las entradas si cambiaron las maestras o la plantilla.
+
+        Args:
+            firma_insumos (dict): Firma actual de los insumos adicionales.
+
+        Returns:
+            bool: True si la firma coincide con la guardada.
+        """
+        # Se compara la forma serializada: las tuplas de la config vuelven del JSON como listas.
+        firma_insumos = json.loads(json.dumps(firma_insumos))
+        if self.firma_insumos == firma_insumos:
+            return True
+        if self.entradas:
+            logger.info("Cambiaron los insumos adicionales: se reprocesan todas las facturas.")
+        self.firma_insumos = firma_insumos
+        self.entradas = {}
+        return False
+
+    def requiere_proceso(self, ruta: str, firma: dict | None = None) -> bool:
+        """
+        Indica si el PDF es nuevo o cambió desde el último proceso.
+
+        Args:
+            ruta (str): Ruta del PDF.
+            firma (dict, opcional): {"tam", "mtime"} ya conocidos (ej. del
+                descubrimiento). Si no se indica, se consulta con os.stat.
+
+        Returns:
+            bool: True si debe procesarse.
+        """
+        entrada = self.entradas.get(ruta)
+        if entrada is None:
+            return True
+
+        firma = firma or firma_archivo(ruta)
+        if firma["tam"] == entrada["tam"] and firma["mtime"] == entrada["mtime"]:
+            return False
+        if firma["tam"] != entrada["tam"]:
+            return True
+
+        if hash_archivo(ruta) != entrada["hash"]:
+            return True
+
+        # Mismo contenido con otra fecha: se actualiza la firma y no se reprocesa.
+        entrada["mtime"] = firma["mtime"]
+        return False
+
+    def registrar(self, ruta: str, salida: str, faltantes: list, eans_factura: list,
+                  hash_pdf: str | None = None):
+        """
+        Registra (o reemplaza) la entrada de un PDF procesado.
+
+        Args:
+            ruta (str): Ruta del PDF.
+            salida (str): Ruta del archivo de devolución generado.
+            faltantes (list): Líneas de EAN faltantes de la factura.
+            eans_factura (list): EAN únicos presentes en la factura.
+            hash_pdf (str, opcional): SHA-256 ya calculado del PDF (ej. la
+                clave de la caché de extracción); si no se indica, se calcula.
+        """
+        self.entradas[ruta] = {
+            **firma_archivo(ruta),
+            "hash": hash_pdf or hash_archivo(ruta),
+            "salida": salida,
+            "faltantes": faltantes,
+            "eans_factura": eans_factura,
+        }
+
+    def salida_previa(self, ruta: str) -> str | None:
+        """Retorna la salida registrada para `ruta`, si existe."""
+        entrada = self.entradas.get(ruta)
+        return entrada["salida"] if entrada else None
+
+    def descartar_ausentes(self, rutas_actuales: list) -> list:
+        """
+        Elimina del manifiesto las rutas que ya no están en la carpeta.
+
+        Args:
+            rutas_actuales (list): Rutas presentes actualmente.
+
+        Returns:
+            list: Rutas descartadas.
+        """
+        actuales = set(rutas_actuales)
+        ausentes = [ruta for ruta in self.entradas if ruta not in actuales]
+        for ruta in ausentes:
+            del self.entradas[ruta]
+        return ausentes
@@ -0,0 +1,166 @@
+## Manifiesto de archivos de salida: evita reescribir libros cuyo contenido no cambió
+import os
+import json
+import tempfile
+import hashlib
+import pandas as pd
+from loguru import logger
+
+
+def huella_dataframe(df: pd.DataFrame) -> str:
+    """
+    Hash del contenido de un DataFrame: nombres de columna y valores (sin el
+    índice), calculado por columnas con `pd.util.hash_pandas_object`.
+    """
+    h = hashlib.sha256(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def huella_contenido(*partes) -> str:
+    """
+    Hash de las partes que determinan una salida (versión, huellas de
+    DataFrames, listas de la config...). Las partes deben ser serializables
+    en JSON.
+    """
+    return hashlib.sha256(
+        json.dumps(partes, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ManifiestoSalidas:
+    """
+    Manifiesto JSON de los archivos de salida escritos: por cada ruta guarda
+    la huella del contenido lógico con que se generó y el tamaño y mtime que
+    quedó en disco.
+
+    Una salida se considera vigente (y no se vuelve a escribir) si la huella
+    coincide y el archivo sigue existiendo con el mismo tamaño y mtime; si
+    alguien lo editó o borró, se regenera.
+
+    Las salidas por factura guardan además los PDF de origen que las
+    producen, para retirarlas cuando esos PDF ya no están (ver
+    `descartar_huerfanas`).
+    """
+
+    VERSION = 1
+
+    def __init__(self, ruta_manifiesto: str):
+        """
+        Args:
+            ruta_manifiesto (str): Ruta del archivo JSON del manifiesto.
+        """
+        self.ruta_manifiesto = ruta_manifiesto
+        self.entradas = {}
+        self.modificado = False
+        self._cargar()
+
+    def _cargar(self):
+        """Lee el manifiesto si existe; si está corrupto se empieza de cero."""
+        if not os.path.exists(self.ruta_manifiesto):
+            return
+        try:
+            with open(self.ruta_manifiesto, "r", encoding="utf-8") as f:
+                contenido = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Manifiesto de salidas ilegible, se reconstruye: {e}")
+            return
+        if contenido.get("version") == self.VERSION:
+            self.entradas = contenido.get("entradas", {})
+
+    def vigente(self, ruta_salida: str, huella: str, origen: str | None = None) -> bool:
+        """
+        Indica si `ruta_salida` ya existe con el contenido de `huella`. Si lo
+        está, se le asocia el PDF `origen`.
+        """
+        entrada = self.entradas.get(ruta_salida)
+        if entrada is None or entrada["huella"] != huella or not self._sin_cambios(ruta_salida, entrada):
+            return False
+        if origen is not None and origen not in entrada.get("origenes", []):
+            entrada["origenes"] = sorted({*entrada.get("origenes", []), origen})
+            self.modificado = True
+        return True
+
+    @staticmethod
+    def _sin_cambios(ruta_salida: str, entrada: dict) -> bool:
+        """Indica si el archivo sigue en disco tal como se registró."""
+        try:
+            stat = os.stat(ruta_salida)
+        except OSError:
+            return False
+        return entrada["tam"] == stat.st_size and entrada["mtime_ns"] == stat.st_mtime_ns
+
+    def registrar(self, ruta_salida: str, huella: str, origen: str | None = None):
+        """
+        Registra una salida recién escrita con su huella, su estado en disco
+        y, si es de una factura, el PDF `origen`.
+        """
+        stat = os.stat(ruta_salida)
+        origenes = self.entradas.get(ruta_salida, {}).get("origenes", [])
+        self.entradas[ruta_salida] = {
+            "huella": huella,
+            "tam": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if origen is not None:
+            self.entradas[ruta_salida]["origenes"] = sorted({*origenes, origen})
+        self.modificado = True
+
+    def descartar_huerfanas(self, origenes_actuales) -> list:
+        """
+        Retira las salidas cuyos PDF de origen ya no están entre
+        `origenes_actuales`: se eliminan del manifiesto y, si nadie las
+        modificó desde que se escribieron, también de disco. Las salidas sin
+        origen (reportes agregados) no se tocan.
+
+        Args:
+            origenes_actuales (Iterable[str]): Rutas de los PDF descubiertos.
+
+        Returns:
+            list: Rutas de las salidas retiradas del manifiesto.
+        """
+        origenes_actuales = set(origenes_actuales)
+        retiradas = []
+        for ruta_salida, entrada in list(self.entradas.items()):
+            if "origenes" not in entrada:
+                continue
+            vigentes = [origen for origen in entrada["origenes"] if origen in origenes_actuales]
+            if vigentes:
+                if vigentes != entrada["origenes"]:
+                    entrada["origenes"] = vigentes
+                    self.modificado = True
+                continue
+
+            del self.entradas[ruta_salida]
+            self.modificado = True
+            retiradas.append(ruta_salida)
+            if self._sin_cambios(ruta_salida, entrada):
+                os.remove(ruta_salida)
+                logger.info(f"Salida retirada (su PDF ya no está): {ruta_salida}")
+            elif os.path.exists(ruta_salida):
+                logger.warning(f"Salida sin PDF de origen, modificada a mano; se conserva: {ruta_salida}")
+        return retiradas
+
+    def guardar(self):
+        """
+        Escribe el manifiesto de forma atómica (archivo temporal + replace),
+        solo si hubo salidas nuevas.
+        """
+        if not self.modificado:
+            return
+        carpeta = os.path.dirname(self.ruta_manifiesto) or "."
+        os.makedirs(carpeta, exist_ok=True)
+        descriptor, ruta_tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": self.VERSION, "entradas": self.entradas},
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            os.replace(ruta_tmp, self.ruta_manifiesto)
+        except BaseException:
+            os.remove(ruta_tmp)
+            raise
+        self.modificado = False
@@ -0,0 +1,114 @@
+## Métricas de ejecución del proyecto Facturas pdf
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from loguru import logger
+
+
+class MetricasEjecucion:
+    """
+    Acumula métricas simples de una ejecución: contadores, tiempos por etapa,
+    valores puntuales y profundidad de las colas del pipeline.
+
+    Todas las operaciones son O(1) para poder llamarse en caminos calientes.
+    """
+
+    def __init__(self):
+        self.contadores = defaultdict(int)
+        self.tiempos = defaultdict(float)
+        self.valores = {}
+        self._colas = {}
+
+    def incrementar(self, nombre: str, cantidad: int = 1):
+        """
+        Incrementa un contador.
+
+        Args:
+            nombre (str): Nombre del contador.
+            cantidad (int): Valor a sumar. Por defecto 1.
+        """
+        self.contadores[nombre] += cantidad
+
+    def registrar_valor(self, nombre: str, valor):
+        """
+        Guarda un valor puntual (ej. bytes de memoria, número de archivos).
+
+        Args:
+            nombre (str): Nombre de la métrica.
+            valor (Any): Valor a registrar.
+        """
+        self.valores[nombre] = valor
+
+    @contextmanager
+    def medir(self, nombre: str):
+        """
+        Context manager que acumula el tiempo transcurrido en la etapa `nombre`.
+
+        Args:
+            nombre (str): Nombre de la etapa medida.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] += time.perf_counter() - inicio
+
+    def sumar_tiempo(self, nombre: str, segundos: float):
+        """
+        Suma a la etapa `nombre` un tiempo medido en otro lugar (por ejemplo,
+        dentro de un proceso trabajador).
+        """
+        self.tiempos[nombre] += segundos
+
+    def registrar_profundidad(self, nombre_cola: str, profundidad: int):
+        """
+        Registra una muestra de la profundidad de una cola del pipeline.
+
+        Args:
+            nombre_cola (str): Nombre de la cola (etapa).
+            profundidad (int): Número de elementos en la cola al momento de la muestra.
+        """
+        cola = self._colas.get(nombre_cola)
+        if cola is None:
+            cola = self._colas[nombre_cola] = {"max": 0, "suma": 0, "muestras": 0}
+        cola["max"] = max(cola["max"], profundidad)
+        cola["suma"] += profundidad
+        cola["muestras"] += 1
+
+    def profundidad_colas(self) -> dict:
+        """
+        Retorna el resumen de profundidad por cola.
+
+        Returns:
+            dict: {nombre_cola: {"max": int, "promedio": float, "muestras": int}}
+        """
+        return {
+            nombre: {
+                "max": cola["max"],
+                "promedio": round(cola["suma"] / cola["muestras"], 2)
+                if cola["muestras"]
+                else 0.0,
+                "muestras": cola["muestras"],
+            }
+            for nombre, cola in self._colas.items()
+        }
+
+    def resumen(self) -> dict:
+        """
+        Construye un diccionario con todas las métricas registradas.
+
+        Returns:
+            dict: Métricas agrupadas por tipo.
+        """
+        return {
+            "contadores": dict(self.contadores),
+            "tiempos_s": {k: round(v, 3) for k, v in self.tiempos.items()},
+            "valores": dict(self.valores),
+            "colas": self.profundidad_colas(),
+        }
+
+    def log_resumen(self):
+        """Registra en el logger el resumen de las métricas."""
+        for tipo, metricas in self.resumen().items():
+            if metricas:
+                logger.info(f"Métricas {tipo}: {metricas}")
@@ -0,0 +1,92 @@
+## Reporte de códigos EAN faltantes agregado por (oficina, EAN)
+import os
+import pandas as pd
+
+FORMATOS_FALTANTES = ("csv", "parquet", "txt")
+COLUMNAS_FALTANTES = ["oficina", "ean", "descripcion", "ocurrencias", "primera_factura"]
+
+
+class ContadorFaltantes:
+    """
+    Cuenta los EAN faltantes por (oficina, EAN) en un diccionario, guardando
+    la descripción y la primera factura en que apareció cada par. El orden de
+    las filas es el de primera aparición.
+    """
+
+    def __init__(self):
+        # (oficina, ean) -> [ocurrencias, descripcion, primera_factura]
+        self.conteos = {}
+
+    def agregar(self, factura: str, registros: list):
+        """
+        Suma los faltantes de una factura.
+
+        Args:
+            factura (str): Identificador de la factura (nombre del PDF).
+            registros (list): Registros (oficina, ean, descripcion).
+        """
+        for oficina, ean, descripcion in registros:
+            conteo = self.conteos.get((oficina, ean))
+            if conteo is None:
+                self.conteos[(oficina, ean)] = [1, descripcion, factura]
+            else:
+                conteo[0] += 1
+                if not conteo[1]:
+                    conteo[1] = descripcion
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """
+        Retorna el reporte con las columnas `COLUMNAS_FALTANTES`.
+        """
+        return pd.DataFrame(
+            [(oficina, ean, descripcion, ocurrencias, factura)
+             for (oficina, ean), (ocurrencias, descripcion, factura) in self.conteos.items()],
+            columns=COLUMNAS_FALTANTES,
+        )
+
+
+def escribir_reporte_faltantes(ruta: str, faltantes_por_factura: list, formato: str) -> str:
+    """
+    Escribe el reporte de EAN faltantes en una sola escritura.
+
+    - "csv" / "parquet": una fila por (oficina, EAN) con ocurrencias,
+      descripción y primera factura. La extensión de `ruta` se reemplaza por
+      la del formato.
+    - "txt": formato anterior, una línea "num_oficina ean" por ocurrencia.
+
+    Args:
+        ruta (str): Ruta configurada del reporte (`paths_resultados.cods_faltantes`).
+        faltantes_por_factura (list): Tuplas (ruta_pdf, registros), en orden
+            de descubrimiento.
+        formato (str): Uno de `FORMATOS_FALTANTES`.
+
+    Returns:
+        str: Ruta del archivo escrito.
+
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    if formato not in FORMATOS_FALTANTES:
+        raise ValueError(f"Formato de faltantes inválido '{formato}': use {FORMATOS_FALTANTES}")
+
+    if formato == "txt":
+        lineas = [
+            f"{oficina} {ean}\n"
+            for _, registros in faltantes_por_factura
+            for oficina, ean, _ in registros
+        ]
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("".join(lineas))
+        return ruta
+
+    contador = ContadorFaltantes()
+    for ruta_pdf, registros in faltantes_por_factura:
+        contador.agregar(os.path.basename(ruta_pdf), registros)
+    df_faltantes = contador.a_dataframe()
+
+    ruta = os.path.splitext(ruta)[0] + "." + formato
+    if formato == "csv":
+        df_faltantes.to_csv(ruta, index=False, encoding="utf-8")
+    else:
+        df_faltantes.to_parquet(ruta, index=False)
+    return ruta
@@ -0,0 +1,251 @@
+## Salida consolidada: todas las devoluciones de una ejecución en un solo archivo
+import io
+import os
+import re
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter, column_index_from_string
+from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from Utils.manifiesto_salidas import huella_dataframe
+
+MODOS_SALIDA = ("plantillas", "libro_unico", "csv", "parquet")
+DISPOSICIONES_LIBRO = ("hojas", "larga")
+# Columnas que identifican la factura en la hoja larga y en CSV/Parquet.
+COLUMNAS_FACTURA = ["factura", "num_oficina", "tienda", "observacion"]
+HOJA_LARGA = "Devoluciones"
+LARGO_MAX_HOJA = 31
+_CARACTERES_INVALIDOS_HOJA = re.compile(r"[\[\]:*?/\\]")
+
+
+def nombre_hoja(base: str, usados: set) -> str:
+    """
+    Nombre de hoja válido para Excel (máximo 31 caracteres, sin []:*?/\\) y
+    no repetido en el libro; agrega "~2", "~3"... si hace falta.
+    """
+    base = _CARACTERES_INVALIDOS_HOJA.sub("_", base or "factura")[:LARGO_MAX_HOJA]
+    nombre, n = base, 1
+    while nombre.lower() in usados:
+        n += 1
+        sufijo = f"~{n}"
+        nombre = base[:LARGO_MAX_HOJA - len(sufijo)] + sufijo
+    usados.add(nombre.lower())
+    return nombre
+
+
+def filas_encabezado(plantilla_base) -> list:
+    """
+    Filas de la plantilla base (título y encabezados de columna), sin las
+    celdas vacías del final de cada fila.
+
+    Args:
+        plantilla_base (ExcelPlantilla): Plantilla base de las maestras.
+    """
+    plantilla_base.leer_contenido()
+    wb = load_workbook(io.BytesIO(plantilla_base.contenido), read_only=True)
+    filas = []
+    for fila in wb[plantilla_base.hoja].iter_rows(values_only=True):
+        fila = list(fila)
+        while fila and fila[-1] is None:
+            fila.pop()
+        filas.append(fila)
+    wb.close()
+    return filas
+
+
+def escribir_libro(ruta: str, hojas, encabezado: list, columna_motivos: str, motivos: tuple):
+    """
+    Escribe un libro en modo write-only (las filas se envían al archivo a
+    medida que se agregan, sin mantener el libro en memoria).
+
+    Args:
+        ruta (str): Ruta del .xlsx.
+        hojas (iterable): Pares (título, filas de datos).
+        encabezado (list): Filas que van antes de los datos en cada hoja.
+        columna_motivos (str): Letra de la columna con la lista de motivos.
+        motivos (tuple): Opciones de la lista desplegable.
+    """
+    wb = Workbook(write_only=True)
+    usados = set()
+    for titulo, filas in hojas:
+        ws = wb.create_sheet(nombre_hoja(titulo, usados))
+        for fila in encabezado:
+            ws.append(fila)
+        primera = len(encabezado) + 1
+        ultima = len(encabezado)
+        for fila in filas:
+            ws.append(fila)
+            ultima += 1
+        if ultima >= primera:
+            dv = DataValidation(type="list", formula1=f'"{",".join(motivos)}"', allow_blank=True)
+            dv.add(f"{columna_motivos}{primera}:{columna_motivos}{ultima}")
+            ws.data_validations.append(dv)
+    wb.save(ruta)
+
+
+class SalidaConsolidada:
+    """
+    Acumula las devoluciones de la ejecución y las escribe en un solo archivo:
+
+    - "libro_unico": un libro write-only, con una hoja por factura
+      (disposición "hojas", cada una con el encabezado de la plantilla) o una
+      sola hoja con las columnas de la factura al inicio ("larga").
+    - "csv" / "parquet": una tabla con `COLUMNAS_FACTURA` y las `cols_finales`.
+    """
+
+    def __init__(self, modo: str, disposicion: str, cols_finales: tuple):
+        """
+        Raises:
+            ValueError: Si el modo o la disposición no son válidos.
+        """
+        if modo not in MODOS_SALIDA or modo == "plantillas":
+            raise ValueError(f"Modo de salida consolidada inválido '{modo}': use {MODOS_SALIDA[1:]}")
+        if disposicion not in DISPOSICIONES_LIBRO:
+            raise ValueError(
+                f"config_reportes.disposicion_libro inválida '{disposicion}': use {DISPOSICIONES_LIBRO}")
+        self.modo = modo
+        self.disposicion = disposicion
+        self.cols_finales = list(cols_finales)
+        # (valores de COLUMNAS_FACTURA, df_final) en orden de llegada.
+        self.facturas = []
+
+    def agregar(self, cruce: dict, tienda: str):
+        """
+        Agrega una factura cruzada.
+
+        Args:
+            cruce (dict): Resultado de `Run.cruzar_factura`.
+            tienda (str): Nombre de la oficina en la maestra de tiendas.
+        """
+        num_oficina = cruce["num_oficina"]
+        factura = [cruce.get("numero") or num_oficina, num_oficina, tienda, cruce["obs_fact"]]
+        self.facturas.append((factura, cruce["df_final"]))
+
+    def vaciar(self):
+        self.facturas = []
+
+    def ordenadas(self) -> list:
+        """
+        Facturas ordenadas por número (y oficina): el archivo no depende del
+        orden en que terminaron de procesarse (modo async, aislado).
+        """
+        return sorted(self.facturas, key=lambda item: [str(valor) for valor in item[0][:2]])
+
+    def huella(self) -> list:
+        """
+        Partes que determinan el archivo, para el manifiesto de salidas.
+        """
+        return [self.modo, self.disposicion] + [
+            [factura, huella_dataframe(df)] for factura, df in self.ordenadas()
+        ]
+
+    def ruta_salida(self, ruta: str) -> str:
+        """
+        `ruta` con la extensión del modo (.xlsx, .csv o .parquet).
+        """
+        extension = "xlsx" if self.modo == "libro_unico" else self.modo
+        return os.path.splitext(ruta)[0] + "." + extension
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """
+        Todas las facturas en una tabla: `COLUMNAS_FACTURA` + `cols_finales`.
+        """
+        bloques = [
+            df.reindex(columns=self.cols_finales).assign(
+                **dict(zip(COLUMNAS_FACTURA, factura)))
+            for factura, df in self.ordenadas()
+        ]
+        if not bloques:
+            return pd.DataFrame(columns=COLUMNAS_FACTURA + self.cols_finales)
+        return pd.concat(bloques, ignore_index=True)[COLUMNAS_FACTURA + self.cols_finales]
+
+    def escribir(self, ruta: str, plantilla_base, motivos: tuple, columna_motivos: str):
+        """
+        Escribe el archivo consolidado en `ruta` (ya con la extensión del modo).
+
+        Args:
+            ruta (str): Ruta de salida.
+            plantilla_base (ExcelPlantilla): Para el encabezado del libro.
+            motivos (tuple): Opciones de la lista desplegable de motivos.
+            columna_motivos (str): Columna de motivos en la plantilla ("E").
+        """
+        if self.modo == "csv":
+            self.a_dataframe().to_csv(ruta, index=False, encoding="utf-8")
+            return
+        if self.modo == "parquet":
+            self.a_dataframe().astype(object).to_parquet(ruta, index=False)
+            return
+
+        encabezado = filas_encabezado(plantilla_base)
+        if self.disposicion == "hojas":
+            hojas = (
+                (str(factura[0]), dataframe_to_rows(df, index=False, header=False))
+                for factura, df in self.ordenadas()
+            )
+        else:
+            encabezado, columna_motivos = encabezado_largo(encabezado, columna_motivos)
+            hojas = [(HOJA_LARGA, (
+                factura + list(fila)
+                for factura, df in self.ordenadas()
+                for fila in dataframe_to_rows(df, index=False, header=False)
+            ))]
+        escribir_libro(ruta, hojas, encabezado, columna_motivos, motivos)
+
+
+def encabezado_largo(encabezado: list, columna_motivos: str) -> tuple:
+    """
+    Encabezado de la hoja larga: `COLUMNAS_FACTURA` seguidas de los títulos de
+    columna de la plantilla (su última fila). La columna de motivos se corre
+    a la derecha en la misma cantidad.
+
+    Returns:
+        tuple: (filas de encabezado, letra de la columna de motivos)
+    """
+    titulos = encabezado[-1] if encabezado else []
+    columna = get_column_letter(column_index_from_string(columna_motivos) + len(COLUMNAS_FACTURA))
+    return [COLUMNAS_FACTURA + list(titulos)], columna
+
+
+def fusionar_consolidados(rutas_parciales: list, ruta: str, modo: str, disposicion: str,
+                          plantilla_base, motivos: tuple, columna_motivos: str):
+    """
+    Combina los archivos consolidados parciales de los shards, en orden de shard.
+
+    Args:
+        rutas_parciales (list): Rutas de los parciales (deben existir).
+        ruta (str): Ruta del archivo final.
+        modo (str): "libro_unico", "csv" o "parquet".
+        disposicion (str): "hojas" o "larga" (solo "libro_unico").
+        plantilla_base (ExcelPlantilla): Para el encabezado del libro.
+        motivos (tuple): Opciones de la lista desplegable.
+        columna_motivos (str): Columna de motivos en la plantilla.
+    """
+    if modo == "csv":
+        pd.concat(
+            [pd.read_csv(r, dtype=str, keep_default_na=False) for r in rutas_parciales],
+            ignore_index=True,
+        ).to_csv(ruta, index=False, encoding="utf-8")
+        return
+    if modo == "parquet":
+        pd.concat([pd.read_parquet(r) for r in rutas_parciales], ignore_index=True).to_parquet(
+            ruta, index=False)
+        return
+
+    encabezado = filas_encabezado(plantilla_base)
+    if disposicion == "larga":
+        encabezado, columna_motivos = encabezado_largo(encabezado, columna_motivos)
+    n_encabezado = len(encabezado)
+
+    libros = [load_workbook(r, read_only=True) for r in rutas_parciales]
+    try:
+        hojas = [
+            (ws.title, list(ws.iter_rows(min_row=n_encabezado + 1, values_only=True)))
+            for wb in libros for ws in wb.worksheets
+        ]
+    finally:
+        for wb in libros:
+            wb.close()
+    if disposicion == "larga":
+        hojas = [(HOJA_LARGA, [fila for _, filas in hojas for fila in filas])]
+    escribir_libro(ruta, hojas, encabezado, columna_motivos, motivos)
@@ -1,6 +1,8 @@
 
+import io
+import hashlib
 import tempfile
-import shutil
+import numpy as np
 import pandas as pd
 from typing import List
 from loguru import logger
@@ -10,6 +12,8 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.utils import get_column_letter, column_index_from_string
 
+from Utils.config_logger import detalle_activo
+
 
 def seleccionar_columnas_pd(
     df: pd.DataFrame, cols_elegidas: List[str]
@@ -71,7 +75,8 @@ def pd_left_merge(
 
     try:
         base = pd.merge(left=base_left, right=base_right, how="left", on=key)
-        logger.success("Proceso de merge satisfactorio")
+        if detalle_activo():
+            logger.debug("Proceso de merge satisfactorio")
     except pd.errors.MergeError as e:
         logger.critical(f"Proceso de merge fallido: {e}")
         raise e
@@ -112,7 +117,8 @@ def pd_left_merge_two_keys(
             left_on=left_key,
             right_on=right_key,
         )
-        logger.success("Proceso de merge satisfactorio")
+        if detalle_activo():
+            logger.debug("Proceso de merge satisfactorio")
     except pd.errors.MergeError as e:
         logger.critical(f"Proceso de merge fallido: {e}")
         raise e
@@ -141,6 +147,7 @@ class ExcelPlantilla:
         self.hoja = hoja
         self.ruta_plantilla = ruta_plantilla
         self.ruta_salida = None
+        self.contenido = None  # bytes de la plantilla, leídos en el primer clon
 
         if wb:
             self.wb = wb
@@ -160,10 +167,28 @@ class ExcelPlantilla:
         """
         return cls(ruta_plantilla=ruta_plantilla, hoja=hoja)
 
+    def leer_contenido(self):
+        """Lee (una sola vez) los bytes del archivo base."""
+        if self.contenido is None:
+            with open(self.ruta_plantilla, "rb") as f:
+                self.contenido = f.read()
+
+    def huella(self) -> str:
+        """
+        SHA-256 del archivo base: identifica la versión de la plantilla en el
+        manifiesto de salidas.
+        """
+        if not self.ruta_plantilla:
+            raise ValueError("No se ha definido ruta_plantilla en la instancia base.")
+        self.leer_contenido()
+        return hashlib.sha256(self.contenido).hexdigest()
+
     def clonar_con_salida(self, ruta_salida: str):
         """
-        Crea una copia física del archivo de plantilla en disco, la abre y actualiza
-        la instancia actual para trabajar sobre la copia (no una nueva instancia).
+        Abre una copia de la plantilla y actualiza la instancia actual para
+        trabajar sobre ella (no una nueva instancia). El archivo base se lee
+        una sola vez y cada clon se carga desde memoria; el archivo de salida
+        solo se crea al `guardar`.
 
         Args:
             ruta_salida (str): Ruta donde se guardará el nuevo archivo generado.
@@ -174,12 +199,11 @@ class ExcelPlantilla:
         if not self.ruta_plantilla:
             raise ValueError("No se ha definido ruta_plantilla en la instancia base.")
 
-        # Copiar físicamente el archivo
-        shutil.copyfile(self.ruta_plantilla, ruta_salida)
+        self.leer_contenido()
 
-        # Cargar el nuevo archivo y actualizar atributos
+        # Cargar la copia en memoria y actualizar atributos
         self.ruta_salida = ruta_salida
-        self.wb = load_workbook(ruta_salida)
+        self.wb = load_workbook(io.BytesIO(self.contenido))
         self.ws = self.wb[self.hoja]
 
         return self
@@ -234,37 +258,13 @@ class ExcelPlantilla:
             raise ValueError("Debe establecerse una ruta_salida antes de guardar.")
         self.wb.save(self.ruta_salida)
 
-def Crear_diccionario_desde_dataframe(
-        df: pd.DataFrame, col_clave: str, col_valor: str
-    ) -> dict:
+    def a_bytes(self) -> bytes:
         """
-        Crea un diccionario a partir de un DataFrame utilizando dos columnas especificadas.
-
-        Args:
-            df (pd.DataFrame): El DataFrame de entrada.
-            col_clave (str): El nombre de la columna que se utilizará como clave en el diccionario.
-            col_valor (str): El nombre de la columna que se utilizará como valor en el diccionario.
-
-        Returns:
-            dict: Un diccionario creado a partir de las columnas especificadas.
+        Retorna el libro como bytes .xlsx, sin escribirlo en disco.
         """
-        try:
-            # Verificar si las columnas existen en el DataFrame
-            if col_clave not in df.columns or col_valor not in df.columns:
-                raise ValueError(
-                    "Las columnas especificadas no existen en el DataFrame."
-                )
-
-            # Crear el diccionario a partir de las columnas especificadas
-            resultado_dict = df.set_index(col_clave)[col_valor].to_dict()
-
-            return resultado_dict
-
-        except ValueError as ve:
-            # Registrar un mensaje crítico si hay un error
-            logger.critical(f"Error: {ve}")
-            raise ve
-
+        buffer = io.BytesIO()
+        self.wb.save(buffer)
+        return buffer.getvalue()
 
 
 def merge_con_fallback(
@@ -272,7 +272,8 @@ def merge_con_fallback(
     df_right: pd.DataFrame,
     primera_clave: str = "EAN_UN",
     segunda_clave: str = "EAN_PQ",
-    columna_objetivo: str = "COD_MATERIAL"
+    columna_objetivo: str = "COD_MATERIAL",
+    columna_fuente: str | None = None,
 ) -> pd.DataFrame:
     """
     Realiza un merge por la primera clave y luego intenta completar los valores faltantes
@@ -284,6 +285,9 @@ def merge_con_fallback(
         primera_clave (str): Columna para el primer merge
         segunda_clave (str): Columna para el segundo merge (fallback)
         columna_objetivo (str): Columna que debe rellenarse si está vacía
+        columna_fuente (str, opcional): Si se indica, se agrega esta columna con
+            la clave que cruzó cada fila (`primera_clave`, `segunda_clave` o
+            nulo si no cruzó)
 
     Returns:
         pd.DataFrame: DataFrame combinado sin duplicar columnas
@@ -292,7 +296,13 @@ def merge_con_fallback(
     # Primer merge por primera_clave
     df_merge_1 = pd.merge(df_left, df_right, how="left", on=primera_clave)
 
+    if isinstance(df_merge_1[segunda_clave].dtype, pd.CategoricalDtype):
+        # fillna no puede agregar categorías nuevas (los EAN de la factura).
+        df_merge_1[segunda_clave] = df_merge_1[segunda_clave].astype(object)
     df_merge_1[segunda_clave] = df_merge_1[segunda_clave].fillna(df_merge_1[primera_clave])
+    if columna_fuente:
+        df_merge_1[columna_fuente] = np.where(
+            df_merge_1[columna_objetivo].notna(), primera_clave, None)
     # Detectar filas que no cruzaron (donde columna_objetivo es NaN)
     df_incompletos = df_merge_1[df_merge_1[columna_objetivo].isna()]
 
@@ -311,6 +321,10 @@ def merge_con_fallback(
         # merge_2 solo tiene los incompletos pero con posibles datos ahora
         df_merge_1.update(df_merge_2)
 
+        if columna_fuente:
+            por_fallback = df_merge_1[columna_fuente].isna() & df_merge_1[columna_objetivo].notna()
+            df_merge_1.loc[por_fallback, columna_fuente] = segunda_clave
+
     return df_merge_1
 
 def filtrar_por_valores(
@@ -349,4 +363,63 @@ def filtrar_por_valores(
     except Exception as e:
         logger.critical(f"Error al filtrar por valores en la columna '{columna}': {e}")
         return None
-    
\ No newline at end of file
+    
+
+DTYPES_TEXTO = ("object", "string[pyarrow]", "category")
+
+
+def convertir_columnas_texto(df: pd.DataFrame, dtype: str = "object") -> pd.DataFrame:
+    """
+    Convierte las columnas de texto (dtype object) de un DataFrame al dtype
+    indicado. Con "object" retorna el mismo DataFrame sin copiarlo.
+
+    Args:
+        df (pd.DataFrame): DataFrame a convertir.
+        dtype (str): "object", "string[pyarrow]" o "category".
+
+    Returns:
+        pd.DataFrame: DataFrame con las columnas de texto convertidas.
+
+    Raises:
+        ValueError: Si el dtype no es uno de DTYPES_TEXTO.
+    """
+    if dtype not in DTYPES_TEXTO:
+        raise ValueError(f"dtype de texto no soportado '{dtype}'. Opciones: {DTYPES_TEXTO}")
+    if dtype == "object":
+        return df
+
+    cols_texto = df.select_dtypes(include="object").columns
+    return df.astype({col: dtype for col in cols_texto})
+
+
+def columnas_a_objeto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Inverso de `convertir_columnas_texto`: vuelve a dtype object las columnas
+    string/category y reemplaza pd.NA por NaN, que es lo que esperan openpyxl
+    y el resto del proyecto. Si no hay columnas que convertir, retorna el
+    mismo DataFrame.
+
+    Args:
+        df (pd.DataFrame): DataFrame a convertir.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas object.
+    """
+    cols_convertir = [
+        col for col in df.columns
+        if isinstance(df[col].dtype, (pd.StringDtype, pd.CategoricalDtype))
+    ]
+    if not cols_convertir:
+        return df
+
+    return df.assign(**{
+        col: df[col].astype(object).where(df[col].notna(), np.nan)
+        for col in cols_convertir
+    })
+
+
+def memoria_bytes(df: pd.DataFrame) -> int:
+    """
+    Memoria ocupada por un DataFrame, incluyendo el contenido de los strings.
+    """
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,62 @@
+## Benchmark de Utils.agrupaciones frente a los helpers que reemplazó, sobre
+## una maestra de megatiendas sintética de 10k PDV.
+##
+##     python tests/bench_agrupaciones.py [--pdvs 10000] [--repeticiones 5]
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Utils.agrupaciones as ag
+import referencia_agrupaciones as ref
+
+
+def medir_ms(funcion, repeticiones: int) -> float:
+    """Mejor tiempo de `repeticiones` llamadas, en milisegundos."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de Utils.agrupaciones.")
+    parser.add_argument("--pdvs", type=int, default=10_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    df = ref.maestra_megatiendas(n_pdvs=args.pdvs)
+    cols = ["Cod_Cliente", "Nom_Cliente", "Ciudad"]
+    df["CONCATENADA"] = ag.concatenar_columnas(df, cols)
+    casos = [
+        ("concatenar columnas",
+         lambda: ref.concatenar_filas(df, cols), lambda: ag.concatenar_columnas(df, cols)),
+        ("dict PDV -> nombre",
+         lambda: ref.crear_diccionario_desde_dataframe(df, "PDV", "CONCATENADA"),
+         lambda: ag.mapear_columnas(df, "PDV", "CONCATENADA")),
+    ]
+    for col_clave in ("Cod_Cliente", "Ciudad"):
+        casos.append((
+            f"agrupar PDV por {col_clave} ({df[col_clave].nunique()} claves)",
+            lambda c=col_clave: ref.crear_dict_col_llave_col_valores(df, c, "PDV"),
+            lambda c=col_clave: ag.agrupar_valores_unicos(df, c, "PDV"),
+        ))
+
+    print(f"Maestra sintética: {len(df)} PDV, mejor de {args.repeticiones} repeticiones")
+    for nombre, anterior, nuevo in casos:
+        resultado_anterior, resultado_nuevo = anterior(), nuevo()
+        iguales = (resultado_anterior.equals(resultado_nuevo) if hasattr(resultado_nuevo, "equals")
+                   else resultado_anterior == resultado_nuevo)
+        if not iguales:
+            raise AssertionError(f"Resultados distintos en '{nombre}'")
+        t_anterior = medir_ms(anterior, args.repeticiones)
+        t_nuevo = medir_ms(nuevo, args.repeticiones)
+        print(f"  {nombre:<40} {t_anterior:9.1f} ms -> {t_nuevo:7.1f} ms  (x{t_anterior / t_nuevo:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+## Fixtures comunes: copia del proyecto en una carpeta temporal
+import os
+import sys
+import shutil
+import subprocess
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Las pruebas unitarias importan `Utils` y `Scripts` desde la raíz del proyecto.
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def proyecto(tmp_path):
+    """
+    Copia el código, la configuración y los insumos de ejemplo en una carpeta
+    temporal, para que cada prueba tenga sus propias cachés y salidas.
+    """
+    for carpeta in ("Scripts", "Utils", "Config", "Insumos"):
+        shutil.copytree(
+            os.path.join(RAIZ, carpeta), tmp_path / carpeta,
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+    (tmp_path / "Plantilla_Resultado").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def ejecutar(proyecto):
+    """
+    Ejecuta un script del proyecto copiado y retorna su salida (stdout y stderr).
+    """
+
+    def _ejecutar(script: str, *args: str) -> str:
+        resultado = subprocess.run(
+            [sys.executable, os.path.join("Scripts", script), *args],
+            cwd=proyecto, capture_output=True, text=True, encoding="utf-8",
+        )
+        salida = resultado.stdout + resultado.stderr
+        assert resultado.returncode == 0, salida
+        return salida
+
+    return _ejecutar
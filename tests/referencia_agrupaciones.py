@@ -0,0 +1,45 @@
+## Helpers anteriores a `Utils.agrupaciones`, conservados como referencia de
+## equivalencia para las pruebas y el benchmark.
+import pandas as pd
+
+
+def crear_diccionario_desde_dataframe(df: pd.DataFrame, col_clave: str, col_valor: str) -> dict:
+    """Antes `gf.crear_diccionario_desde_dataframe` (y su duplicado en `tf`)."""
+    if col_clave not in df.columns or col_valor not in df.columns:
+        raise ValueError("Las columnas especificadas no existen en el DataFrame.")
+    if col_clave == col_valor:
+        return df[col_clave].to_dict()
+    return df.set_index(col_clave)[col_valor].to_dict()
+
+
+def crear_dict_col_llave_col_valores(df, columna_clave, columna_valores):
+    """Antes `gf.crear_dict_col_llave_col_valores`."""
+    diccionario = {}
+    for clave in df[columna_clave].unique():
+        diccionario[clave] = (
+            df.loc[df[columna_clave] == clave, columna_valores].unique().tolist()
+        )
+    return diccionario
+
+
+def concatenar_filas(df: pd.DataFrame, columnas: list, separador: str = "_") -> pd.Series:
+    """Antes en `Run.construir_indice_megatiendas`: unión fila por fila."""
+    return df[columnas].astype(str).agg(separador.join, axis=1)
+
+
+def maestra_megatiendas(n_pdvs: int = 10_000, n_clientes: int = 2_000, n_ciudades: int = 41,
+                        semilla: int = 0) -> pd.DataFrame:
+    """
+    Maestra de megatiendas sintética con las columnas de la real
+    (Cod_Cliente, Nom_Cliente, Ciudad, PDV), como texto.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    clientes = rng.integers(0, n_clientes, n_pdvs)
+    return pd.DataFrame({
+        "Cod_Cliente": [f"C{c:05d}" for c in clientes],
+        "Nom_Cliente": [f"CLIENTE {c}" for c in clientes],
+        "Ciudad": [f"CIUDAD {c}" for c in rng.integers(0, n_ciudades, n_pdvs)],
+        "PDV": [str(100 + i) for i in range(n_pdvs)],
+    })
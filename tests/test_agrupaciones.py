@@ -0,0 +1,51 @@
+## Equivalencia de Utils.agrupaciones con los helpers que reemplazó
+import numpy as np
+import pandas as pd
+import pytest
+
+import Utils.agrupaciones as ag
+import referencia_agrupaciones as ref
+
+
+@pytest.fixture
+def maestra():
+    df = ref.maestra_megatiendas(n_pdvs=2_000, n_clientes=300, n_ciudades=12)
+    # Claves repetidas, nulas y valores nulos, como en una maestra real.
+    df.loc[5, "PDV"] = df.loc[3, "PDV"]
+    df.loc[[7, 11], "Ciudad"] = np.nan
+    df.loc[[13, 17], "Cod_Cliente"] = np.nan
+    df.loc[[19, 23], "PDV"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("col_clave, col_valores", [
+    ("Ciudad", "PDV"), ("Cod_Cliente", "PDV"), ("Cod_Cliente", "Ciudad"), ("PDV", "Nom_Cliente"),
+])
+def test_agrupar_valores_unicos_equivale(maestra, col_clave, col_valores):
+    esperado = ref.crear_dict_col_llave_col_valores(maestra, col_clave, col_valores)
+    obtenido = ag.agrupar_valores_unicos(maestra, col_clave, col_valores)
+    # Las claves NaN no son iguales entre sí: se comparan aparte.
+    assert [pd.isna(k) for k in obtenido] == [pd.isna(k) for k in esperado]
+    assert [k for k in obtenido if not pd.isna(k)] == [k for k in esperado if not pd.isna(k)]
+    assert [v for k, v in obtenido.items() if not pd.isna(k)] == [
+        v for k, v in esperado.items() if not pd.isna(k)
+    ]
+    assert all(v == [] for k, v in obtenido.items() if pd.isna(k))
+
+
+@pytest.mark.parametrize("col_clave, col_valor", [("PDV", "Nom_Cliente"), ("PDV", "PDV")])
+def test_mapear_columnas_equivale(maestra, col_clave, col_valor):
+    maestra = maestra.dropna(subset=[col_clave])
+    assert ag.mapear_columnas(maestra, col_clave, col_valor) == ref.crear_diccionario_desde_dataframe(
+        maestra, col_clave, col_valor)
+
+
+def test_concatenar_columnas_equivale(maestra):
+    columnas = ["Cod_Cliente", "Nom_Cliente", "Ciudad"]
+    pd.testing.assert_series_equal(
+        ag.concatenar_columnas(maestra, columnas), ref.concatenar_filas(maestra, columnas))
+
+
+def test_columnas_inexistentes(maestra):
+    with pytest.raises(ValueError):
+        ag.agrupar_valores_unicos(maestra, "Ciudad", "No_Existe")
@@ -0,0 +1,56 @@
+## Lectura de facturas dentro de .zip / .tar
+import os
+import io
+import tarfile
+import zipfile
+
+import Utils.archivos_comprimidos as ac
+from Utils.general_functions import firma_archivo
+
+
+def crear_zip(ruta, miembros: dict):
+    with zipfile.ZipFile(ruta, "w") as zf:
+        for nombre, datos in miembros.items():
+            zf.writestr(nombre, datos)
+
+
+def crear_tar(ruta, miembros: dict, modo: str):
+    with tarfile.open(ruta, modo) as tf:
+        for nombre, datos in miembros.items():
+            info = tarfile.TarInfo(nombre)
+            info.size = len(datos)
+            tf.addfile(info, io.BytesIO(datos))
+
+
+def test_firmas_de_miembros_en_una_pasada(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "lote.zip")
+    crear_zip(ruta, {f"{i:03d}.pdf": b"x" * (i + 1) for i in range(50)})
+    llamadas = []
+    infolist = zipfile.ZipFile.infolist
+    monkeypatch.setattr(zipfile.ZipFile, "infolist", lambda self: llamadas.append(1) or infolist(self))
+
+    firmas = [firma_archivo(ac.ruta_miembro(ruta, f"{i:03d}.pdf")) for i in range(50)]
+    assert [firma["tam"] for firma in firmas] == list(range(1, 51))
+    assert len(llamadas) == 1
+
+
+def test_contenedor_reemplazado_se_vuelve_a_abrir(tmp_path):
+    ruta = str(tmp_path / "lote.zip")
+    crear_zip(ruta, {"a.pdf": b"uno"})
+    assert ac.leer_miembro(ac.ruta_miembro(ruta, "a.pdf")) == b"uno"
+
+    crear_zip(ruta, {"a.pdf": b"otro contenido", "b.pdf": b"dos"})
+    os.utime(ruta, (os.path.getatime(ruta), os.path.getmtime(ruta) + 10))
+    assert [nombre for nombre, _, _ in ac.iterar_miembros(ruta)] == ["a.pdf", "b.pdf"]
+    assert ac.leer_miembro(ac.ruta_miembro(ruta, "a.pdf")) == b"otro contenido"
+
+
+def test_orden_de_miembros(tmp_path):
+    miembros = {"c.pdf": b"c", "a.pdf": b"a", "b.pdf": b"b"}
+    crear_tar(tmp_path / "lote.tar", miembros, "w")
+    crear_tar(tmp_path / "lote.tar.gz", miembros, "w:gz")
+
+    # Un .tar sin comprimir admite acceso directo: orden por nombre.
+    assert [n for n, _, _ in ac.iterar_miembros(str(tmp_path / "lote.tar"))] == ["a.pdf", "b.pdf", "c.pdf"]
+    # Un .tar.gz se lee en el orden del flujo, sin retroceder.
+    assert [n for n, _, _ in ac.iterar_miembros(str(tmp_path / "lote.tar.gz"))] == ["c.pdf", "a.pdf", "b.pdf"]
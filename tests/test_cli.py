@@ -0,0 +1,24 @@
+## Subcomandos de Scripts/cli.py
+import pytest
+
+
+def configurar(proyecto, reemplazos: dict):
+    ruta = proyecto / "Config" / "config.yaml"
+    texto = ruta.read_text(encoding="utf-8")
+    for anterior, nuevo in reemplazos.items():
+        assert anterior in texto
+        texto = texto.replace(anterior, nuevo)
+    ruta.write_text(texto, encoding="utf-8")
+
+
+@pytest.mark.parametrize("nivel, con_detalle", [("INFO", False), ("DEBUG", True)])
+def test_validate_respeta_nivel_de_logs(proyecto, ejecutar, nivel, con_detalle):
+    configurar(proyecto, {'nivel: "INFO"': f'nivel: "{nivel}"'})
+    salida = ejecutar("cli.py", "validate")
+    assert ("Cruce oficina" in salida) is con_detalle
+
+
+def test_validate_respeta_formato_json(proyecto, ejecutar):
+    configurar(proyecto, {'formato: "texto"': 'formato: "json"'})
+    salida = ejecutar("cli.py", "validate", "--solo-rutas")
+    assert '"mensaje": "Configuración, insumos y carpetas sin problemas."' in salida
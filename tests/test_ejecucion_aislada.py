@@ -0,0 +1,13 @@
+## Extracción aislada en procesos trabajadores
+import json
+
+
+def test_aislado_usa_cache_de_extraccion(proyecto, ejecutar):
+    primera = ejecutar("main.py", "--aislado")
+    assert "cache_extraccion_aciertos" not in primera
+
+    segunda = ejecutar("main.py", "--aislado")
+    assert "'cache_extraccion_aciertos': 4" in segunda
+    assert "'facturas_escritas': 4" in segunda
+    errores = proyecto / "Plantilla_Resultado" / "errores_procesamiento.json"
+    assert json.loads(errores.read_text(encoding="utf-8")) == []
@@ -0,0 +1,53 @@
+## Lectura de maestras: lector streaming vs pd.read_excel
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import Utils.transformation_functions as tf
+from Utils.general_functions import ExcelReader
+
+COLS = ["Codigo", "Descripcion", "Precio"]
+
+
+@pytest.fixture
+def maestra(tmp_path):
+    # Bloques de 3 filas con valores distintos en cada uno: cada bloque por
+    # separado tendría otras categorías.
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.title = "Precios"
+    hoja.append(["Codigo", "Ignorada", "Descripcion", "Precio"])
+    filas = [
+        (7701, "x", "Leche", 3500.0),
+        (7702, "x", "Arroz", 4200.5),
+        (7703, "x", None, "#N/A"),
+        (7701, "x", "Leche", 3500.0),
+        (7704, "x", "Café", 12000),
+        (None, None, None, None),
+        (7705, "x", "arroz", "NULL"),
+        (7706, "x", "Azúcar", 2800.0),
+    ]
+    for fila in filas:
+        hoja.append(fila)
+    libro.save(tmp_path / "maestra.xlsx")
+    return str(tmp_path) + "/"
+
+
+@pytest.mark.parametrize("dtype", tf.DTYPES_TEXTO)
+def test_streaming_igual_a_pandas(maestra, dtype):
+    lector = ExcelReader(path=maestra)
+    por_pandas = tf.seleccionar_columnas_pd(
+        df=lector.Lectura_insumos_excel(nom_insumo="maestra.xlsx", nom_hoja="Precios"),
+        cols_elegidas=COLS,
+    )
+    por_pandas = tf.convertir_columnas_texto(por_pandas, dtype)
+    por_streaming = lector.Lectura_insumos_excel_streaming(
+        nom_insumo="maestra.xlsx", nom_hoja="Precios", cols=COLS, filas_por_bloque=3, dtype=dtype,
+    )
+
+    assert list(por_streaming.dtypes) == list(por_pandas.dtypes)
+    pd.testing.assert_frame_equal(por_streaming, por_pandas)
+    if dtype == "category":
+        for col in COLS:
+            assert por_streaming[col].cat.categories.dtype == np.dtype(object)
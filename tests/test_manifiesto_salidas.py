@@ -0,0 +1,35 @@
+## Manifiesto de salidas: salidas vigentes y retiro de las huérfanas
+import os
+
+from Utils.manifiesto_salidas import ManifiestoSalidas
+
+
+def escribir(ruta, texto="libro"):
+    ruta.write_text(texto, encoding="utf-8")
+    return str(ruta)
+
+
+def test_descartar_huerfanas(tmp_path):
+    manifiesto = ManifiestoSalidas(str(tmp_path / "manifiesto.json"))
+    libro_a = escribir(tmp_path / "a.xlsx")
+    libro_b = escribir(tmp_path / "b.xlsx")
+    libro_editado = escribir(tmp_path / "editado.xlsx")
+    reporte = escribir(tmp_path / "duplicados.xlsx")
+    manifiesto.registrar(libro_a, "h1", origen="pdfs/a.pdf")
+    manifiesto.registrar(libro_b, "h2", origen="pdfs/b.pdf")
+    # Una salida compartida por dos PDF se conserva mientras quede uno.
+    assert manifiesto.vigente(libro_b, "h2", origen="pdfs/b2.pdf")
+    manifiesto.registrar(libro_editado, "h3", origen="pdfs/c.pdf")
+    manifiesto.registrar(reporte, "h4")
+    escribir(tmp_path / "editado.xlsx", "cambiado a mano")
+
+    retiradas = manifiesto.descartar_huerfanas(["pdfs/b2.pdf"])
+
+    assert sorted(retiradas) == [libro_a, libro_editado]
+    assert not os.path.exists(libro_a)
+    assert os.path.exists(libro_editado)
+    assert manifiesto.entradas[libro_b]["origenes"] == ["pdfs/b2.pdf"]
+    assert reporte in manifiesto.entradas and os.path.exists(reporte)
+
+    manifiesto.guardar()
+    assert set(ManifiestoSalidas(manifiesto.ruta_manifiesto).entradas) == {libro_b, reporte}
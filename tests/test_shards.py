@@ -0,0 +1,26 @@
+## Estado incremental y reanudable por shard
+import os
+
+
+def test_incremental_dos_shards_conserva_estado(proyecto, ejecutar):
+    primera = [ejecutar("main.py", "--incremental", "--shard", shard) for shard in ("0/2", "1/2")]
+    assert "Incremental: 3 por procesar" in primera[0]
+    assert "Incremental: 1 por procesar" in primera[1]
+
+    # Alternar shards no debe borrar el estado del otro.
+    for shard in ("0/2", "1/2"):
+        assert "Sin facturas nuevas o modificadas." in ejecutar("main.py", "--incremental", "--shard", shard)
+
+    cache = proyecto / ".cache_facturas"
+    assert (cache / "manifiesto_procesados.shard-0-de-2.json").exists()
+    assert (cache / "manifiesto_procesados.shard-1-de-2.json").exists()
+    assert not (cache / "manifiesto_procesados.json").exists()
+
+
+def test_reanudable_registro_por_shard(proyecto, ejecutar):
+    for shard in ("0/2", "1/2"):
+        ejecutar("main.py", "--reanudable", "--shard", shard)
+    cache = proyecto / ".cache_facturas"
+    assert sorted(nombre for nombre in os.listdir(cache) if nombre.startswith("trabajos")) == [
+        "trabajos.shard-0-de-2.sqlite", "trabajos.shard-1-de-2.sqlite",
+    ]